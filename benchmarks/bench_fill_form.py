@@ -0,0 +1,324 @@
+"""End-to-end benchmark: ``fill_form`` against the local form replica.
+
+Serves ``benchmarks/form_replica`` from a local HTTP server (its ``/api/*``
+endpoints answer after ``--latency-ms``, standing in for the portal's
+save/OCR requests) and fills all ten steps with ``AUTO_NEXT=True`` for N
+synthetic applicants, one fresh form per applicant.  Reports applicants per
+minute, p50/p95 wall time per step and per step transition (from the
+``visa_trace`` traces) and the number of Playwright driver round-trips per
+step.
+
+    python benchmarks/bench_fill_form.py [-n 10] [--latency-ms 50] [--headed]
+    python benchmarks/bench_fill_form.py --channel chrome   # installed Chrome
+    python benchmarks/bench_fill_form.py --serve   # just serve the replica
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import date, timedelta
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+ROOT = Path(__file__).resolve().parent.parent
+REPLICA = Path(__file__).resolve().parent / "form_replica"
+sys.path.insert(0, str(ROOT))
+
+from playwright._impl._connection import Connection  # noqa: E402
+from playwright.sync_api import sync_playwright  # noqa: E402
+
+import visa_autofill as va  # noqa: E402
+from visa_itinerary import itinerary  # noqa: E402
+
+# ---------------------------------------------------------------------------
+# Replica server ----------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+class ReplicaHandler(SimpleHTTPRequestHandler):
+    latency_ms = 0.0
+
+    def do_POST(self):
+        if not self.path.startswith("/api/"):
+            self.send_error(404)
+            return
+        time.sleep(self.latency_ms / 1000)
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_replica(latency_ms: float, port: int = 0) -> Iterator[str]:
+    """Serve the replica in a background thread; yields its URL."""
+    handler = type("Handler", (ReplicaHandler,), {"latency_ms": latency_ms})
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port), partial(handler, directory=str(REPLICA))
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/index.html"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# ---------------------------------------------------------------------------
+# Synthetic applicants ----------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+FAMILY = ["NGUYEN", "TRAN", "LE", "PHAM", "HOANG", "VU", "DANG", "BUI"]
+GIVEN = ["VAN AN", "THI BINH", "QUANG VINH", "TRUNG LOC", "BAO LINH", "MINH"]
+PROVINCES = ["TAY NINH", "PHU THO", "HA NOI", "DA NANG", "CAN THO"]
+OCCUPATIONS = ["COMPANY EMPLOYEE", "STUDENT", "SELF-EMPLOYED", "RETIRED"]
+
+
+def _dmy(day: date) -> str:
+    return day.strftime("%d/%m/%Y")
+
+
+def synthetic_applicants(count: int, seed: int = 7) -> List[Dict[str, str]]:
+    """Applicant rows shaped like ``application.xlsx``."""
+    rng = random.Random(seed)
+
+    def name() -> str:
+        return f"{rng.choice(FAMILY)} {rng.choice(GIVEN)}"
+
+    def born(low: int, high: int) -> str:
+        return _dmy(
+            date(rng.randint(low, high), rng.randint(1, 12), rng.randint(1, 28))
+        )
+
+    applicants = []
+    for i in range(count):
+        has_father = rng.random() < 0.7
+        applicants.append(
+            {
+                "full_name": name(),
+                "birth_date": born(1970, 2010),
+                "country": "Viet Nam",
+                "province": rng.choice(PROVINCES),
+                "marital_status": rng.choice(["SINGLE", "MARRIED"]),
+                "id_number": f"0792{rng.randrange(10**8):08d}",
+                "passport_number": f"B{i:08d}",
+                "place_of_issue": "Immigration Department",
+                "visa_type": "L",
+                "entries": rng.choice(["single", "double"]),
+                "occupation": rng.choice(OCCUPATIONS),
+                "home_address": f"{rng.randint(1, 400)} QUANG TRUNG, GO VAP, HCMC",
+                "phone_number": f"09{rng.randrange(10**8):08d}",
+                "father_fullname": name() if has_father else None,
+                "father_nationality": "VIET NAM" if has_father else None,
+                "father_dob": born(1940, 1980) if has_father else None,
+                "mother_fullname": name(),
+                "mother_nationality": "VIET NAM",
+                "mother_dob": born(1940, 1980),
+                "date_of_arrival": _dmy(
+                    date(2025, 7, 1) + timedelta(rng.randint(0, 60))
+                ),
+                "travel_city": rng.choice(itinerary().city_names()),
+                "emergency_fullname": name(),
+                "emergency_relationship": "FRIEND",
+                "emergency_phone": f"84{rng.randrange(10**9):09d}",
+            }
+        )
+    return applicants
+
+
+# ---------------------------------------------------------------------------
+# Round-trip counting -------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+class RoundTrips:
+    """Count driver messages per step by wrapping Playwright's connection.
+
+    The benchmark drives one page from one thread, so the current step is a
+    plain attribute, switched by a wrapper around ``va.run_step``.
+    """
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.label = "setup"
+
+    @contextmanager
+    def installed(self):
+        send = Connection._send_message_to_server
+        run_step = va.run_step
+
+        def counting_send(connection, *args, **kwargs):
+            self.counts[self.label] += 1
+            return send(connection, *args, **kwargs)
+
+        def labelled_step(page, step, applicant):
+            self.label = f"step {step.number}"
+            return run_step(page, step, applicant)
+
+        Connection._send_message_to_server = counting_send
+        va.run_step = labelled_step
+        try:
+            yield self
+        finally:
+            Connection._send_message_to_server = send
+            va.run_step = run_step
+
+
+# ---------------------------------------------------------------------------
+# Benchmark ---------------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def step_durations(trace_dir: Path, kind: str = "step") -> Dict[str, List[float]]:
+    durations: Dict[str, List[float]] = defaultdict(list)
+    for path in sorted(trace_dir.glob("*.json")):
+        spans = json.loads(path.read_text(encoding="utf-8"))["spans"]
+        for span in spans:
+            if span["kind"] == kind:
+                durations[span["name"]].append(span["duration_ms"])
+    return durations
+
+
+def prepare_workdir(workdir: Path, applicants: List[Dict[str, str]]) -> Path:
+    """Passport images for every applicant plus step 10's relative upload."""
+    images = workdir / "images"
+    images.mkdir()
+    source = ROOT / "example_visa.jpeg"
+    for applicant in applicants:
+        shutil.copyfile(source, images / f"{applicant['passport_number']}.jpeg")
+    # step 10 uploads "example_visa.jpg" relative to the working directory
+    shutil.copyfile(source, workdir / "example_visa.jpg")
+    return images
+
+
+def run(args) -> None:
+    applicants = synthetic_applicants(args.applicants)
+    workdir = Path(tempfile.mkdtemp(prefix="visa-bench-"))
+    trace_dir = workdir / "traces"
+    config = {
+        "AUTO_NEXT": True,
+        "IMAGE_FOLDER": str(prepare_workdir(workdir, applicants)),
+        "TRACE_DIR": str(trace_dir),
+        "BATCH_TEXT_FILLS": args.batch_text_fills,
+    }
+    for key, value in config.items():
+        setattr(va, key, value)
+
+    results = []
+    round_trips = RoundTrips()
+    with serve_replica(args.latency_ms) as url, sync_playwright() as p:
+        browser = p.chromium.launch(
+            headless=not args.headed, channel=args.channel or None
+        )
+        page = browser.new_page()
+        page.set_default_timeout(args.timeout_ms)
+        with round_trips.installed(), _chdir(workdir):
+            started = time.perf_counter()
+            for applicant in applicants:
+                round_trips.label = "load"
+                page.goto(url)
+                page.wait_for_selector("button:has-text('Next')")
+                round_trips.label = "upload"
+                results.append(va.run_applicant(page, applicant, config))
+            elapsed = time.perf_counter() - started
+        browser.close()
+
+    ok = sum(result["status"] == "SUCCESS" for result in results)
+    print(
+        f"\n{len(results)} applicants ({ok} ok) in {elapsed:.1f}s "
+        f"– {len(results) / elapsed * 60:.2f} applicants/min "
+        f"(api latency {args.latency_ms:.0f} ms)"
+    )
+    for result in results:
+        if result["status"] != "SUCCESS":
+            print(f"  {result['passport_number']}: {result['error']}")
+
+    durations = step_durations(trace_dir)
+    print(f"\n{'step':<10}{'p50 ms':>10}{'p95 ms':>10}{'round-trips':>14}")
+    for name, values in durations.items():
+        trips = round_trips.counts[name] / len(results)
+        print(
+            f"{name:<10}{percentile(values, 50):>10.0f}{percentile(values, 95):>10.0f}"
+            f"{trips:>14.1f}"
+        )
+    total = sum(round_trips.counts.values()) / len(results)
+    print(f"{'total':<10}{'':>20}{total:>14.1f}  (per applicant, incl. page load)")
+
+    transitions = step_durations(trace_dir, "transition")
+    print(f"\n{'next':<16}{'p50 ms':>10}{'p95 ms':>10}  (included in the step times)")
+    for name, values in transitions.items():
+        print(
+            f"{name:<16}{percentile(values, 50):>10.0f}{percentile(values, 95):>10.0f}"
+        )
+    print(f"\ntraces: {trace_dir}")
+
+
+@contextmanager
+def _chdir(path: Path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--applicants", type=int, default=5)
+    parser.add_argument(
+        "--latency-ms", type=float, default=50, help="delay of the replica's /api/*"
+    )
+    parser.add_argument("--timeout-ms", type=float, default=10_000)
+    parser.add_argument("--batch-text-fills", action="store_true")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument(
+        "--channel",
+        default="",
+        help="installed browser instead of Playwright's Chromium (chrome, msedge)",
+    )
+    parser.add_argument(
+        "--serve", action="store_true", help="only serve the replica (Ctrl+C stops)"
+    )
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.serve:
+        with serve_replica(args.latency_ms, args.port) as url:
+            print(f"Serving {url}")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
+        return
+
+    logging.basicConfig(level=logging.ERROR)
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
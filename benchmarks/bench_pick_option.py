@@ -0,0 +1,83 @@
+"""Micro-benchmark: CDP round-trips per ``pick_option`` call.
+
+Compares the original Python-side scan (``count()`` + ``inner_text()`` per
+option) with the single in-page ``evaluate_all`` lookup, on dropdowns the size
+of the ones the form actually has.
+
+    python benchmarks/bench_pick_option.py [--rtt-ms 2]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import visa_autofill as va  # noqa: E402
+from roundtrips import FakePage  # noqa: E402
+
+DROPDOWNS = {
+    "month (1-12)": 12,
+    "day (1-31)": 31,
+    "3.1 occupation": 40,
+    "1.4A country/region": 240,
+}
+
+
+def legacy_pick_option(container, trigger_selector: str, text: str, page):
+    """``pick_option`` as it was before the in-page lookup."""
+    va.safe("open combobox", container.locator(trigger_selector).click)
+    dropdown = page.locator(
+        ".el-select-dropdown.el-popper:not([style*='display: none'])"
+    )
+    items = dropdown.locator("li.el-select-dropdown__item")
+    target = text.strip().lower()
+    for i in range(items.count()):
+        item = items.nth(i)
+        if target in item.inner_text().strip().lower():
+            va.safe("pick_option click", item.click)
+            va.safe(
+                "dropdown wait hidden", dropdown.wait_for, state="hidden", timeout=3_000
+            )
+            return
+    logging.warning("[pick_option] No match found for '%s'", text)
+
+
+def measure(impl, size: int, position: int, rtt_ms: float):
+    options = [{"text": f"Option {i:03d}"} for i in range(size)]
+    page = FakePage({"el-select-dropdown__item": options}, rtt_ms=rtt_ms)
+    wanted = f"Option {position:03d}" if position >= 0 else "missing"
+    started = time.perf_counter()
+    impl(page.locator("div.el-form-item"), "input.el-input__inner", wanted, page)
+    return page.round_trips, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rtt-ms", type=float, default=0, help="simulated latency per round-trip"
+    )
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(
+        f"{'dropdown':<22}{'match':>8}{'before':>10}{'after':>8}{'before ms':>12}{'after ms':>10}"
+    )
+    for name, size in DROPDOWNS.items():
+        for label, position in (
+            ("first", 0),
+            ("middle", size // 2),
+            ("last", size - 1),
+            ("none", -1),
+        ):
+            before, before_ms = measure(legacy_pick_option, size, position, args.rtt_ms)
+            after, after_ms = measure(va.pick_option, size, position, args.rtt_ms)
+            print(
+                f"{name:<22}{label:>8}{before:>10}{after:>8}{before_ms:>12.1f}{after_ms:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Round-trip counting fakes for Playwright micro-benchmarks.
+
+``FakePage`` / ``FakeLocator`` implement just enough of the sync Locator API
+for the widget helpers in ``visa_autofill``.  Building locators (``locator``,
+``nth``, ``first``) is free, exactly like in Playwright; every call that would
+cross the driver boundary (``count``, ``inner_text``, ``evaluate_all``,
+``click`` ...) is counted as one round-trip.  ``rtt_ms`` adds a simulated
+latency per round-trip so the wall-clock effect is visible too.
+
+Elements are modelled as plain dicts: ``{"text": ..., "sub": ..., "checked": ...}``.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+
+class FakePage:
+    def __init__(
+        self, elements: Optional[Dict[str, List[dict]]] = None, rtt_ms: float = 0
+    ):
+        # selector fragment → elements matched by a locator ending in it
+        self.elements = elements or {}
+        self.rtt_ms = rtt_ms
+        self.round_trips = 0
+        self.clicked: List[dict] = []
+
+    def trip(self):
+        self.round_trips += 1
+        if self.rtt_ms:
+            time.sleep(self.rtt_ms / 1000)
+
+    def locator(self, selector: str) -> "FakeLocator":
+        return FakeLocator(self, [selector])
+
+    def wait_for_timeout(self, timeout: float):
+        self.trip()
+
+
+class FakeLocator:
+    def __init__(self, page: FakePage, path: List[str], index: Optional[int] = None):
+        self.page = page
+        self.path = path
+        self.index = index
+
+    # -- local (no round-trip) ------------------------------------------------
+    def locator(self, selector: str) -> "FakeLocator":
+        return FakeLocator(self.page, self.path + [selector])
+
+    def nth(self, index: int) -> "FakeLocator":
+        return FakeLocator(self.page, self.path, index)
+
+    @property
+    def first(self) -> "FakeLocator":
+        return self.nth(0)
+
+    def _matches(self) -> List[dict]:
+        for fragment, elements in self.page.elements.items():
+            if any(fragment in selector for selector in self.path):
+                if self.index is not None:
+                    return elements[self.index : self.index + 1]
+                return elements
+        return [{"text": ""}]
+
+    def _element(self) -> dict:
+        return self._matches()[0]
+
+    def _text(self, element: dict) -> str:
+        # ``span.el-radio__label`` style sub-selectors read the nested text
+        if any("__label" in selector for selector in self.path[-1:]):
+            return element.get("sub", element["text"])
+        return element["text"]
+
+    # -- remote (one round-trip each) -------------------------------------------
+    def count(self) -> int:
+        self.page.trip()
+        return len(self._matches())
+
+    def inner_text(self) -> str:
+        self.page.trip()
+        return self._text(self._element())
+
+    def evaluate_all(self, script: str, arg=None):
+        """Python stand-in for the in-page helpers from ``visa_steps``."""
+        self.page.trip()
+        needle, sub = arg
+        for i, element in enumerate(self._matches()):
+            text = element.get("sub", element["text"]) if sub else element["text"]
+            if needle in text.strip().lower():
+                return i
+        return -1
+
+    def click(self, **kwargs):
+        self.page.trip()
+        self.page.clicked.append(self._element())
+
+    def fill(self, value: str, **kwargs):
+        self.page.trip()
+
+    def wait_for(self, **kwargs):
+        self.page.trip()
+
+    def is_visible(self) -> bool:
+        self.page.trip()
+        return True
+
+    def is_checked(self) -> bool:
+        self.page.trip()
+        return bool(self._element().get("checked"))
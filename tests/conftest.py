@@ -0,0 +1,24 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+# The visa_* modules live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(scope="session")
+def chromium():
+    """Path of a Chromium to run the browser tests with; skips without one."""
+    for name in ("chromium", "chromium-browser", "google-chrome"):
+        if shutil.which(name):
+            return shutil.which(name)
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        path = p.chromium.executable_path
+    if not os.path.exists(path):
+        pytest.skip("no Chromium installed")
+    return path
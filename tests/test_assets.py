@@ -0,0 +1,133 @@
+import os
+import time
+from types import SimpleNamespace
+
+from visa_assets import AssetCache, AssetRoute
+
+SITE = "https://consular.mfa.gov.cn"
+
+
+def meta(cache_control="", stored_at=None):
+    return {
+        "headers": {"cache-control": cache_control},
+        "stored_at": time.time() if stored_at is None else stored_at,
+    }
+
+
+def test_freshness():
+    cache = AssetCache("unused", 1024)
+    assert cache.fresh(f"{SITE}/assets/index-4f3a9c1d.js", meta())
+    assert cache.fresh(f"{SITE}/app.js", meta("public, immutable"))
+    assert cache.fresh(f"{SITE}/app.js", meta("max-age=600"))
+    assert not cache.fresh(f"{SITE}/app.js", meta("max-age=600", time.time() - 601))
+    assert not cache.fresh(f"{SITE}/app.js", meta("no-cache, max-age=600"))
+    assert not cache.fresh(f"{SITE}/app.js", meta())
+
+
+def test_put_and_get(tmp_path):
+    cache = AssetCache(tmp_path, 100_000)
+    headers = {"content-type": "text/css", "etag": '"v1"', "set-cookie": "x"}
+    cache.put(f"{SITE}/a.css", 200, headers, b"body")
+    stored, body = cache.get(f"{SITE}/a.css")
+    assert body == b"body"
+    assert stored["headers"] == {"content-type": "text/css", "etag": '"v1"'}
+    assert cache.get(f"{SITE}/b.css") is None
+
+
+def test_private_and_oversized_responses_are_not_stored(tmp_path):
+    cache = AssetCache(tmp_path, 100_000)
+    cache.put(f"{SITE}/a.js", 200, {"cache-control": "private"}, b"x")
+    cache.put(f"{SITE}/b.js", 200, {"cache-control": "no-store"}, b"x")
+    cache.put(f"{SITE}/c.js", 200, {}, b"x" * 10_001)  # over a tenth of the cap
+    assert not list(tmp_path.glob("*.body"))
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = AssetCache(tmp_path, 10_000)
+    urls = [f"{SITE}/{name}.png" for name in "abcd"]
+    for age, url in zip((40, 30, 20), urls):
+        cache.put(url, 200, {}, b"x" * 1000)
+        body_path, _ = cache._paths(url)
+        os.utime(body_path, (time.time() - age, time.time() - age))
+    cache.get(urls[0])  # a is used again: b is now the oldest
+    cache.max_bytes = 3_000
+    cache.put(urls[3], 200, {}, b"x" * 250)
+    assert cache.get(urls[1]) is None
+    assert all(cache.get(url) is not None for url in (urls[0], urls[2], urls[3]))
+    assert cache._size() <= 3_000 * 0.9
+
+
+def test_not_modified_restarts_freshness_and_takes_new_validators(tmp_path):
+    cache = AssetCache(tmp_path, 100_000)
+    url = f"{SITE}/app.js"
+    cache.put(url, 200, {"etag": '"v1"', "cache-control": "max-age=60"}, b"js")
+    old, _ = cache.get(url)
+    old["stored_at"] -= 120
+    assert not cache.fresh(url, old)
+
+    route = AssetRoute(cache, [SITE])
+    response = SimpleNamespace(
+        status=304, headers={"etag": '"v2"', "cache-control": "max-age=600"}
+    )
+    status, headers, body = route._answer(url, (old, b"js"), response, None)
+    assert (status, body) == (200, b"js")
+    assert headers["etag"] == '"v2"'
+
+    stored, _ = cache.get(url)
+    assert stored["headers"]["etag"] == '"v2"'
+    assert cache.fresh(url, stored)
+    assert route.counts["revalidated"] == 1
+
+
+def test_only_own_site_assets_are_cacheable():
+    route = AssetRoute(AssetCache("unused", 1024), [SITE])
+
+    def request(url, resource_type="script", method="GET"):
+        return SimpleNamespace(url=url, resource_type=resource_type, method=method)
+
+    assert route.cacheable(request("https://cdn.mfa.gov.cn/app.js"))
+    assert not route.cacheable(request("https://cdn.example.com/app.js"))
+    assert not route.cacheable(request(f"{SITE}/api/save", "fetch"))
+    assert not route.cacheable(request(f"{SITE}/app.js", method="POST"))
+
+
+def test_browser_validators_are_not_sent_without_a_cached_entry(tmp_path):
+    cache = AssetCache(tmp_path, 100_000)
+    route = AssetRoute(cache, [SITE])
+    url = f"{SITE}/app.js"
+    request = SimpleNamespace(
+        url=url,
+        headers={"accept": "*/*", "if-none-match": '"v0"', "if-modified-since": "x"},
+    )
+    assert route._conditional(request, None) == {"accept": "*/*"}
+
+    cache.put(url, 200, {"etag": '"v1"'}, b"js")
+    stored, _ = cache.get(url)
+    assert route._conditional(request, stored) == {
+        "accept": "*/*",
+        "if-none-match": '"v1"',
+    }
+
+
+def test_not_modified_without_a_cached_entry(tmp_path):
+    class Route:
+        request = SimpleNamespace(
+            url=f"{SITE}/app.js",
+            method="GET",
+            resource_type="script",
+            headers={"if-none-match": '"v0"'},
+        )
+
+        def fetch(self, headers):
+            self.sent = headers
+            if "if-none-match" in headers:  # the browser's copy is gone
+                return SimpleNamespace(status=304, headers={}, body=lambda: b"")
+            return SimpleNamespace(status=200, headers={}, body=lambda: b"js")
+
+        def fulfill(self, status, headers, body):
+            self.fulfilled = (status, body)
+
+    route = Route()
+    AssetRoute(AssetCache(tmp_path, 100_000), [SITE]).handle(route)
+    assert "if-none-match" not in route.sent
+    assert route.fulfilled == (200, b"js")
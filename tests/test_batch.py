@@ -0,0 +1,170 @@
+import asyncio
+import queue
+import threading
+from contextlib import asynccontextmanager, contextmanager
+
+import pytest
+
+import visa_async
+import visa_autofill as va
+import visa_batch
+from visa_batch import WorkerProgress, run_batch, worker_for_row
+
+ROWS = [{"passport_number": f"P{i}"} for i in range(9)]
+
+
+class Recorder:
+    """Stands in for the status journal."""
+
+    def __init__(self):
+        self.results = []
+
+    def record(self, result):
+        self.results.append(result)
+
+
+class Browser:
+    def close(self):
+        pass
+
+
+class Context:
+    def new_page(self):
+        return threading.current_thread().name
+
+
+@pytest.fixture
+def fake_browser(monkeypatch):
+    """Workers without Playwright: worker 1 crashes on its first applicant."""
+
+    @contextmanager
+    def sync_playwright():
+        yield None
+
+    def run_applicant(page, applicant, config):
+        if page == "visa-worker-1":
+            raise RuntimeError("browser crashed")
+        return {**applicant, "status": "SUCCESS", "error": ""}
+
+    monkeypatch.setattr(visa_batch, "sync_playwright", sync_playwright)
+    monkeypatch.setattr(va, "CDP_URL", "")
+    monkeypatch.setattr(va, "AUTO_NEXT", True)
+    monkeypatch.setattr(va, "launch_browser", lambda p: Browser())
+    monkeypatch.setattr(va, "new_form_context", lambda browser: Context())
+    monkeypatch.setattr(va, "open_start_page", lambda page: None)
+    monkeypatch.setattr(va, "run_applicant", run_applicant)
+
+
+def test_rows_keep_their_worker():
+    assert [worker_for_row(row, 3) for row in range(7)] == [0, 1, 2, 0, 1, 2, 0]
+    assert worker_for_row(10, 1) == 0
+
+
+def run_in_thread(fn, *args, **kwargs):
+    """Run *fn*; fail instead of hanging when it does not return."""
+    outcome = {}
+    thread = threading.Thread(
+        target=lambda: outcome.setdefault("value", fn(*args, **kwargs)), daemon=True
+    )
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive(), "the batch did not finish"
+    return outcome["value"]
+
+
+def test_crashed_worker_fails_its_rows_without_blocking(fake_browser):
+    journal = Recorder()
+    results = run_in_thread(
+        run_batch,
+        iter(ROWS),
+        {},
+        workers=3,
+        queue_size=1,
+        start_index=10,
+        journal=journal,
+    )
+    assert [result["row"] for result in results] == list(range(10, 19))
+    crashed = [r for r in results if worker_for_row(r["row"], 3) == 1]
+    assert [r["passport_number"] for r in crashed] == ["P0", "P3", "P6"]  # row 10 → 1
+    assert all(r["status"] == "FAILURE" for r in crashed)
+    assert all("Worker 1 failed: browser crashed" in r["error"] for r in crashed)
+    others = [r for r in results if r not in crashed]
+    assert all(r["status"] == "SUCCESS" for r in others)
+    assert len(journal.results) == 9
+
+
+def test_drain_fails_the_in_flight_row_first():
+    work = queue.Queue()
+    work.put((5, {"passport_number": "B"}))
+    work.put(visa_batch._STOP)
+    progress, results = WorkerProgress(worker_id=0), []
+    visa_batch._drain(
+        work,
+        progress,
+        results,
+        threading.Lock(),
+        "dead",
+        None,
+        (2, {"passport_number": "A"}),
+    )
+    assert [(r["row"], r["status"]) for r in results] == [
+        (2, "FAILURE"),
+        (5, "FAILURE"),
+    ]
+    assert progress.failed == 2
+
+
+def test_crashed_page_fails_its_rows_without_blocking(monkeypatch):
+    class AsyncBrowser:
+        async def close(self):
+            pass
+
+    class AsyncContext:
+        def __init__(self):
+            self.name = f"page-{next(names)}"
+
+        async def new_page(self):
+            return self.name
+
+        async def close(self):
+            pass
+
+    names = iter(range(3))
+
+    @asynccontextmanager
+    async def async_playwright():
+        yield None
+
+    async def launch_browser(p):
+        return AsyncBrowser()
+
+    async def new_form_context(browser):
+        return AsyncContext()
+
+    async def open_start_page(page):
+        pass
+
+    async def run_applicant(page, applicant, config):
+        await asyncio.sleep(0)
+        if page == "page-1":
+            raise RuntimeError("page crashed")
+        return {**applicant, "status": "SUCCESS", "error": ""}
+
+    monkeypatch.setattr(va, "CDP_URL", "")
+    monkeypatch.setattr(va, "WORKER_QUEUE_SIZE", 1)
+    monkeypatch.setattr(visa_async, "async_playwright", async_playwright)
+    monkeypatch.setattr(visa_async, "launch_browser", launch_browser)
+    monkeypatch.setattr(visa_async, "new_form_context", new_form_context)
+    monkeypatch.setattr(visa_async, "open_start_page", open_start_page)
+    monkeypatch.setattr(visa_async, "run_applicant", run_applicant)
+
+    journal = Recorder()
+    results = asyncio.run(
+        asyncio.wait_for(
+            visa_async.run_pages(iter(ROWS), {}, pages=3, journal=journal), 10
+        )
+    )
+    assert [result["row"] for result in results] == list(range(9))
+    failed = [r["passport_number"] for r in results if r["status"] == "FAILURE"]
+    assert failed == ["P1", "P4", "P7"]
+    assert len(journal.results) == 9
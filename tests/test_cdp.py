@@ -0,0 +1,83 @@
+import asyncio
+import socket
+import subprocess
+import time
+import urllib.request
+
+import pytest
+from playwright.async_api import async_playwright
+from playwright.sync_api import sync_playwright
+
+import visa_async
+import visa_autofill as va
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def cdp_url(chromium, tmp_path, monkeypatch):
+    """A headless Chromium started with --remote-debugging-port, as an operator
+    would start Chrome for CDP_URL."""
+    port = free_port()
+    chrome = subprocess.Popen(
+        [
+            chromium,
+            "--headless=new",
+            f"--remote-debugging-port={port}",
+            f"--user-data-dir={tmp_path / 'profile'}",
+            "--no-first-run",
+            "--no-sandbox",
+            "about:blank",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 15
+    while True:
+        try:
+            urllib.request.urlopen(f"{url}/json/version", timeout=1).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline or chrome.poll() is not None:
+                chrome.kill()
+                pytest.fail("Chromium did not open its debugging port")
+            time.sleep(0.2)
+    monkeypatch.setattr(va, "CDP_URL", url)
+    yield url
+    chrome.kill()
+    chrome.wait()
+
+
+def test_attach_uses_the_running_profile(cdp_url):
+    with sync_playwright() as p:
+        browser = va.attach_browser(p)
+        context = va.attached_context(browser)
+        assert context is browser.contexts[0]
+        tabs = len(context.pages)
+        page = context.new_page()
+        va.close_page(page)
+        va.close_page(page)  # already closed: no error
+        assert len(context.pages) == tabs
+        assert browser.is_connected()
+
+
+def test_attach_without_chrome_explains(monkeypatch):
+    monkeypatch.setattr(va, "CDP_URL", f"http://127.0.0.1:{free_port()}")
+    with sync_playwright() as p:
+        with pytest.raises(RuntimeError, match="remote-debugging-port"):
+            va.attach_browser(p)
+
+
+def test_async_attach_without_chrome_explains(monkeypatch):
+    async def attach():
+        async with async_playwright() as p:
+            await visa_async.attach_browser(p)
+
+    monkeypatch.setattr(va, "CDP_URL", f"http://127.0.0.1:{free_port()}")
+    with pytest.raises(RuntimeError, match="remote-debugging-port"):
+        asyncio.run(attach())
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from visa_dates import YMD, detect_format, normalize_dates, parse_column, parse_date
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["03/04/2010", "2010/04/03", "2010-04-03", "2010-04-03 00:00:00", "03.04.2010"],
+)
+def test_parse_date_formats_day_first(text):
+    assert parse_date(text) == YMD(2010, 4, 3)
+
+
+def test_excel_serials():
+    assert parse_date("45858") == YMD(2025, 7, 20)
+    assert parse_date("45858.0") == YMD(2025, 7, 20)
+    with pytest.raises(ValueError):
+        parse_date("999999")
+
+
+def test_unrecognised_date():
+    with pytest.raises(ValueError, match="Unrecognised"):
+        parse_date("31/31/2010")
+
+
+def test_ymd_helpers():
+    day = YMD(2024, 2, 28)
+    assert str(day) == "28/02/2024"
+    assert day.parts() == ("2024", "02", "28")
+    assert day.plus_days(2) == YMD(2024, 3, 1)
+
+
+def test_column_format_detection_and_mixed_values():
+    values = pd.Series(["2010/04/03", "2011/05/06", "07/08/2012", "nonsense", None])
+    assert detect_format(values.dropna().astype("string")) == "%Y/%m/%d"
+    parsed, fmt = parse_column(values)
+    assert fmt == "%Y/%m/%d"
+    assert parsed[2] == pd.Timestamp(2012, 8, 7)  # fell through to dd/mm/yyyy
+    assert parsed[3:].isna().all()
+
+
+def test_normalize_dates_leaves_unparseable_values():
+    rows = [
+        {"date_of_arrival": "03/04/2026", "father_dob": None},
+        {"date_of_arrival": "bad", "father_dob": "45858"},
+    ]
+    out = list(normalize_dates(rows))
+    assert out[0]["date_of_arrival"] == YMD(2026, 4, 3)
+    assert out[0]["father_dob"] is None
+    assert out[1]["date_of_arrival"] == "bad"
+    assert out[1]["father_dob"] == YMD(2025, 7, 20)
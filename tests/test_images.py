@@ -0,0 +1,53 @@
+import sys
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+import visa_images  # noqa: E402
+from visa_images import image_index, prepare_images, upload_path  # noqa: E402
+
+
+@pytest.fixture
+def threads(monkeypatch):
+    """Prepare in threads, as a frozen build does, so patches reach the workers."""
+    monkeypatch.setattr(sys, "frozen", True, raising=False)
+
+
+def photo(path, size=(400, 300)):
+    Image.new("RGB", size, "white").save(path, "PNG")
+    return path
+
+
+def test_index_finds_any_case_and_extension(tmp_path):
+    photo(tmp_path / "e01203813.PNG")
+    (tmp_path / "E01203813.jpg").write_bytes(b"jpg")
+    index = image_index(tmp_path, refresh=True)
+    assert index.find(" E01203813 ") == tmp_path / "E01203813.jpg"
+    assert index.find("X1") is None
+
+
+def test_one_bad_image_does_not_stop_the_others(tmp_path, threads, monkeypatch):
+    good = photo(tmp_path / "A1.png", (100, 100))
+    bomb = photo(tmp_path / "B2.png", (200, 200))
+    broken = tmp_path / "C3.png"
+    broken.write_bytes(b"not an image")
+    # B2 (40,000 px) is over twice the limit: DecompressionBombError
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 15_000)
+
+    results = prepare_images([good, bomb, broken], tmp_path / "cache", 50, 50)
+
+    assert results[good].parent == tmp_path / "cache"
+    assert results[bomb] == bomb and results[broken] == broken
+    assert upload_path(good) == results[good]
+    assert upload_path(broken) == broken
+
+
+def test_missing_source_is_an_error_result(tmp_path, threads):
+    gone = tmp_path / "D4.png"
+    assert prepare_images([gone], tmp_path / "cache") == {gone: gone}
+
+
+def test_without_pillow_nothing_is_prepared(tmp_path, monkeypatch):
+    monkeypatch.setattr(visa_images, "Image", None)
+    assert prepare_images([photo(tmp_path / "A1.png")]) == {}
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from visa_itinerary import (
+    BY_DATE,
+    ItineraryError,
+    load_itinerary,
+    parse_itinerary,
+)
+
+CITY = "ShangHai,Shanghai"
+
+
+def table(selection="round-robin"):
+    return parse_itinerary(
+        {
+            "selection": selection,
+            "cities": {
+                CITY: {
+                    "arrival_flights": ["VN1", "VN3"],
+                    "departure_flights": ["VN2", "VN4"],
+                    "addresses": "Hotel A",
+                }
+            },
+        }
+    )
+
+
+def test_round_robin_per_city():
+    itinerary = table()
+    chosen = [itinerary.choose(CITY)["arrival_flight_no"] for _ in range(3)]
+    assert chosen == ["VN1", "VN3", "VN1"]
+    assert itinerary.choose(CITY)["address_to_stay"] == "Hotel A"
+
+
+def test_same_arrival_date_shares_a_flight():
+    itinerary = table(BY_DATE)
+    first = itinerary.choose(CITY, {"date_of_arrival": "03/04/2026"})
+    again = itinerary.choose(CITY, {"date_of_arrival": "03/04/2026"})
+    next_day = itinerary.choose(CITY, {"date_of_arrival": "04/04/2026"})
+    assert first == again
+    assert next_day["arrival_flight_no"] != first["arrival_flight_no"]
+
+
+def test_plan_travel_keeps_given_values():
+    itinerary = table()
+    applicant = {"travel_city": f" {CITY} ", "arrival_flight_no": "OWN1"}
+    planned = itinerary.plan_travel(applicant)
+    assert planned["arrival_flight_no"] == "OWN1"
+    assert planned["departure_flight_no"] == "VN2"
+    assert planned["travel_city"] == f" {CITY} "
+
+
+def test_unknown_city():
+    with pytest.raises(ValueError, match="Unknown travel city"):
+        table().choose("Beijing")
+
+
+def test_every_problem_is_reported():
+    with pytest.raises(ItineraryError) as error:
+        parse_itinerary(
+            {
+                "selection": "random",
+                "cities": {CITY: {"arrival_flights": [], "departure_flights": 3}},
+            }
+        )
+    message = str(error.value)
+    for problem in ("selection", "arrival_flights", "departure_flights", "addresses"):
+        assert problem in message
+
+
+def test_load_json_csv_and_default(tmp_path):
+    data = {
+        "cities": {
+            CITY: {
+                "arrival_flights": ["A"],
+                "departure_flights": ["D"],
+                "addresses": ["H"],
+            }
+        }
+    }
+    (tmp_path / "it.json").write_text(json.dumps(data), encoding="utf-8")
+    assert load_itinerary(tmp_path / "it.json").city_names() == [CITY]
+
+    (tmp_path / "it.csv").write_text(
+        "city,arrival_flight,departure_flight,address\n"
+        f'"{CITY}",A1,D1,H1\n"{CITY}",A2,,\n',
+        encoding="utf-8",
+    )
+    loaded = load_itinerary(tmp_path / "it.csv")
+    assert loaded.cities[CITY].arrival_flights == ("A1", "A2")
+    assert loaded.cities[CITY].departure_flights == ("D1",)
+
+    assert CITY in load_itinerary(tmp_path / "missing.json")
+
+    (tmp_path / "bad.json").write_text("{", encoding="utf-8")
+    with pytest.raises(ItineraryError):
+        load_itinerary(tmp_path / "bad.json")
@@ -0,0 +1,103 @@
+import csv
+from pathlib import Path
+
+from visa_journal import JOURNAL_COLUMNS, Journal, skip_succeeded
+
+
+def read(path):
+    with open(path, newline="", encoding="utf-8") as fh:
+        return list(csv.DictReader(fh))
+
+
+def blank(row):
+    return {key: "" for key in row}
+
+
+def test_failure_first_then_itinerary_columns(tmp_path):
+    path = tmp_path / "status.csv"
+    with Journal(path) as journal:
+        # a drained row: no itinerary columns yet
+        journal.record({"passport_number": "A1", "status": "FAILURE", "error": "x"})
+        journal.record(
+            {
+                "passport_number": "B2",
+                "arrival_flight_no": "VN1",
+                "address_to_stay": "Somewhere",
+                "status": "SUCCESS",
+                "error": "",
+                "row": 3,
+            }
+        )
+    rows = read(path)
+    assert [row["passport_number"] for row in rows] == ["A1", "B2"]
+    assert rows[0]["arrival_flight_no"] == ""
+    assert rows[1]["arrival_flight_no"] == "VN1"
+    assert "row" not in rows[1]
+    assert list(rows[0]) == list(JOURNAL_COLUMNS)
+
+
+def test_header_does_not_depend_on_the_first_row(tmp_path):
+    spreadsheet_row = {"full_name": "A", "passport_number": "A1", "status": "FAILURE"}
+    store_row = {"passport_number": "B2", "image_path": "/img/B2.jpg", "row": 1}
+    for first, second in [(spreadsheet_row, store_row), (store_row, spreadsheet_row)]:
+        path = tmp_path / f"{first['passport_number']}.csv"
+        with Journal(path) as journal:
+            journal.record({"error": "", **first})
+            journal.record({"status": "SUCCESS", "error": "", **second})
+        rows = read(path)
+        assert list(rows[0]) == list(JOURNAL_COLUMNS)
+        images = {row["passport_number"]: row["image_path"] for row in rows}
+        assert images == {"A1": "", "B2": "/img/B2.jpg"}
+
+
+def test_reopen_adds_new_columns_to_the_header(tmp_path):
+    path = tmp_path / "status.csv"
+    path.write_text("passport_number,status,error\nA1,SUCCESS,\n", encoding="utf-8")
+    with Journal(path) as journal:
+        journal.record(
+            {"passport_number": "B2", "status": "FAILURE", "error": "e", "new": 1}
+        )
+        journal.record({"passport_number": "C3", "status": "SUCCESS", "error": ""})
+    rows = read(path)
+    header = list(rows[0])
+    assert header[0] == "passport_number"
+    assert header[-4:] == ["new", "status", "error", "recorded_at"]
+    assert set(JOURNAL_COLUMNS) < set(header)
+    assert [row["new"] for row in rows] == ["", "1", ""]
+    assert rows[0]["status"] == "SUCCESS" and rows[1]["recorded_at"]
+    assert Journal(path).succeeded() == {"A1", "C3"}
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_shipped_journal_keeps_travel_and_father_columns(tmp_path):
+    path = tmp_path / "status.csv"
+    shipped = Path(__file__).resolve().parent.parent / "submission_status.csv"
+    path.write_bytes(shipped.read_bytes())
+    before = read(path)
+    with Journal(path) as journal:
+        journal.record(
+            {
+                **before[0],
+                "father_fullname": "LY VAN A",
+                "arrival_flight_no": "VN1",
+                "status": "SUCCESS",
+            }
+        )
+    rows = read(path)
+    assert rows[: len(before)] == [{**blank(rows[0]), **row} for row in before]
+    assert rows[-1]["father_fullname"] == "LY VAN A"
+    assert rows[-1]["arrival_flight_no"] == "VN1"
+    assert rows[-1]["recorded_at"]
+
+
+def test_half_written_line_is_finished(tmp_path):
+    path = tmp_path / "status.csv"
+    path.write_text("passport_number,status,error\nA1,SUC", encoding="utf-8")
+    with Journal(path) as journal:
+        journal.record({"passport_number": "B2", "status": "SUCCESS", "error": ""})
+    assert Journal(path).succeeded() == {"B2"}
+
+
+def test_skip_succeeded():
+    rows = [{"passport_number": "A1"}, {"passport_number": "B2"}]
+    assert list(skip_succeeded(rows, {"A1"}, quiet=True)) == [rows[1]]
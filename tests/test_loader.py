@@ -0,0 +1,111 @@
+import csv
+from datetime import datetime
+
+import pytest
+
+from visa_autofill import iter_applicants, load_applicants
+
+openpyxl = pytest.importorskip("openpyxl")
+
+HEADER = ["full_name", "passport_number", "phone", None, "date_of_birth"]
+ROWS = [
+    ["NGUYEN VAN A", "C1234567", 84912345678, None, datetime(1990, 5, 1)],
+    [None, None, None, None, None],
+    ["  ", "", None, None, None],
+    ["TRAN THI B", "C7654321", 84987654321.0, "stray", "01/02/1985"],
+    [None, None, None, None, None],
+    ["LE VAN C", "C1111111", None, None, None],
+]
+
+
+def write_xlsx(path, rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in [HEADER, *rows]:
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        for row in [HEADER, *rows]:
+            writer.writerow(["" if value is None else value for value in row])
+    return path
+
+
+@pytest.fixture(params=["xlsx", "csv"])
+def data_file(request, tmp_path):
+    write = write_xlsx if request.param == "xlsx" else write_csv
+    return write(tmp_path / f"applicants.{request.param}", ROWS)
+
+
+def passports(path, start_index=0):
+    return [row["passport_number"] for row in iter_applicants(path, start_index)]
+
+
+def test_blank_rows_and_unnamed_columns_are_dropped(data_file):
+    rows = list(iter_applicants(data_file))
+    assert [row["passport_number"] for row in rows] == [
+        "C1234567",
+        "C7654321",
+        "C1111111",
+    ]
+    assert all(
+        set(row) == {"full_name", "passport_number", "phone", "date_of_birth"}
+        for row in rows
+    )
+    assert rows[2]["phone"] is None
+
+
+@pytest.mark.parametrize(
+    "start_index, expected",
+    [
+        (0, ["C1234567", "C7654321", "C1111111"]),
+        (1, ["C7654321", "C1111111"]),
+        (2, ["C1111111"]),
+        (3, []),
+    ],
+)
+def test_start_index_does_not_count_blank_rows(data_file, start_index, expected):
+    assert passports(data_file, start_index) == expected
+
+
+@pytest.mark.parametrize("write", [write_xlsx, write_csv])
+def test_start_index_matches_the_dataframe(tmp_path, write):
+    # the DataFrame keeps whitespace-only rows; the stream drops them as blank
+    rows = [row for row in ROWS if row[0] != "  "]
+    path = write(tmp_path / f"a.{'xlsx' if write is write_xlsx else 'csv'}", rows)
+    frame = load_applicants(path).to_dict(orient="records")
+    for start_index in range(4):
+        expected = [row["passport_number"] for row in frame[start_index:]]
+        assert passports(path, start_index) == expected
+
+
+def test_cells_are_text(tmp_path):
+    rows = list(iter_applicants(write_xlsx(tmp_path / "a.xlsx", ROWS)))
+    assert rows[0]["phone"] == "84912345678"
+    assert rows[1]["phone"] == "84987654321"  # no trailing ".0"
+    assert rows[0]["date_of_birth"] == "1990-05-01 00:00:00"
+    assert rows[1]["date_of_birth"] == "01/02/1985"
+
+
+def test_csv_values_are_kept_verbatim(tmp_path):
+    path = write_csv(tmp_path / "a.csv", [["A", "0123", "+84 912", None, "1.0"]])
+    assert list(iter_applicants(path)) == [
+        {
+            "full_name": "A",
+            "passport_number": "0123",
+            "phone": "+84 912",
+            "date_of_birth": "1.0",
+        }
+    ]
+
+
+def test_empty_and_missing_files(tmp_path):
+    empty = tmp_path / "empty.csv"
+    empty.write_text("", encoding="utf-8")
+    assert list(iter_applicants(empty)) == []
+    with pytest.raises(FileNotFoundError):
+        iter_applicants(tmp_path / "missing.xlsx")
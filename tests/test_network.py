@@ -0,0 +1,58 @@
+from collections import Counter
+from types import SimpleNamespace
+
+from visa_network import RequestFilter, host_matches, site_of
+
+FORM = "https://consular.mfa.gov.cn/VISA/"
+
+
+def test_site_of():
+    assert site_of("consular.mfa.gov.cn") == "mfa.gov.cn"
+    assert site_of("cdn.mfa.gov.cn.") == "mfa.gov.cn"
+    assert site_of("www.example.com") == "example.com"
+    assert site_of("static.example.co.uk") == "example.co.uk"
+    assert site_of("localhost") == "localhost"
+
+
+def test_host_matches_subdomains_only():
+    assert host_matches("hm.baidu.com", ["baidu.com"])
+    assert host_matches("BAIDU.com", [".baidu.com"])
+    assert not host_matches("notbaidu.com", ["baidu.com"])
+
+
+def test_reason_rules_in_order():
+    request_filter = RequestFilter(first_party=[FORM], allow_hosts=["img.mfa.gov.cn"])
+    reason = request_filter.reason
+    assert reason("https://www.google-analytics.com/g.js", "script") == "denied host"
+    assert reason("https://img.mfa.gov.cn/logo.png", "image") is None
+    assert reason("https://consular.mfa.gov.cn/logo.png", "image") == "image"
+    assert reason("https://consular.mfa.gov.cn/app.js", "script") is None
+    assert reason("https://cdn.example.com/vue.js", "script") is None
+    assert reason("data:image/png;base64,xx", "image") is None
+
+
+def test_essential_types_are_never_blocked_by_type():
+    request_filter = RequestFilter(first_party=[FORM], block_types=["script", "font"])
+    assert request_filter.block_types == {"font"}
+    assert request_filter.reason("https://consular.mfa.gov.cn/a.js", "script") is None
+
+
+def test_third_party_blocking_is_opt_in():
+    request_filter = RequestFilter(first_party=[FORM], block_third_party=True)
+    assert request_filter.reason("https://cdn.example.com/vue.js", "script") == (
+        "third-party"
+    )
+    assert request_filter.reason("https://cdn.mfa.gov.cn/vue.js", "script") is None
+
+
+def test_report_since_snapshot():
+    request_filter = RequestFilter(first_party=[FORM])
+    request_filter.counts["image"] += 2
+    before = request_filter.snapshot()
+    request_filter.counts["image"] += 3
+    request_filter.counts["denied host"] += 1
+    request_filter._downloaded(SimpleNamespace(headers={"content-length": "2048"}))
+    assert request_filter.report(before) == (
+        "blocked 4 requests (image 3, denied host 1), downloaded 2 KB"
+    )
+    assert RequestFilter().report(Counter()) == "blocked 0 requests, downloaded 0 KB"
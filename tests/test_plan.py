@@ -0,0 +1,149 @@
+import pytest
+
+from visa_dates import YMD
+from visa_steps import STEPS, Action, Field, StepDef, Target, plan
+
+OPTIONS = {"PLUS_DAY_TO_DATE": 4}
+
+APPLICANT = {
+    "country": "Viet Nam",
+    "province": "HO CHI MINH",
+    "marital_status": "Married",
+    "id_number": 79169014520,
+    "place_of_issue": "Immigration Department",
+    "visa_type": "L",
+    "entries": "Single entry",
+    "occupation": "student",
+    "home_address": "240 Nguyen Van Luong",
+    "phone_number": "840903839609",
+    "spouse_fullname": "WANG YAO TSAN",
+    "spouse_nationality": "China",
+    "spouse_dob": "05/03/1952",
+    "spouse_city": "TAIPEI",
+    "father_fullname": None,
+    "mother_fullname": "VUONG THI LOI",
+    "mother_nationality": "Viet Nam",
+    "mother_dob": YMD(1950, 1, 1),
+    "children_fullname": "  ",
+    "date_of_arrival": "30/07/2025",
+    "travel_city": "ShangHai,Shanghai",
+    "arrival_flight_no": "VN530",
+    "departure_flight_no": "",
+    "address_to_stay": "Bund 1",
+    "emergency_fullname": "NGUYEN XUAN LUONG",
+    "emergency_relationship": "FRIEND",
+    "emergency_phone": "84366006555",
+}
+
+
+def step(number):
+    return next(step for step in STEPS if step.number == number)
+
+
+def values(number, applicant=APPLICANT):
+    """{(kind, for_id or label or selector): value} of the planned actions."""
+    return {
+        (action.kind, key(action.target)): action.value
+        for action in plan(step(number), applicant, OPTIONS)
+    }
+
+
+def key(target):
+    if target is None:
+        return None
+    return target.for_id or target.label or target.selector
+
+
+@pytest.mark.parametrize(
+    "number, field, expected",
+    [
+        (1, ("text", "1.6B ID number in the country of nationality"), "79169014520"),
+        (1, ("text", "1.4C City"), "HO CHI MINH"),
+        (1, ("radio", "1.7A Type of passport/travel document"), "Ordinary"),
+        (3, ("remark", "Please specify."), "Student"),
+        (5, ("text", "spouses.0.familyName"), "WANG"),
+        (5, ("text", "spouses.0.firstName"), "YAO TSAN"),
+        (5, ("date", "spouses.0.birthday"), ("1952", "03", "05")),
+        (5, ("text", "spouses.0.birthCity"), "TAIPEI"),
+        (5, ("text", "spouses.0.address"), "240 Nguyen Van Luong"),
+        (5, ("date", "mother.0.birthday"), ("1950", "01", "01")),
+        (5, ("radio", "mother.0.inChinaFlag"), "No"),
+        (6, ("date", "arrivalCityDate"), ("2025", "07", "30")),
+        (6, ("date", "leaveDate"), ("2025", "08", "03")),
+        (6, ("text", "emergencyContactFamilyName"), "NGUYEN"),
+        (6, ("text", "emergencyContactFirstName"), "XUAN LUONG"),
+        (6, ("text", "arrivalVehicleType"), "VN530"),
+    ],
+)
+def test_values_and_transforms(number, field, expected):
+    assert values(number)[field] == expected
+
+
+def test_visa_type_is_wrapped_like_the_dropdown():
+    (visa_type,) = [v for (kind, _), v in values(2).items() if kind == "select"]
+    assert visa_type == "(L)"
+
+
+@pytest.mark.parametrize(
+    "number, field",
+    [
+        (6, ("text", "leaveVehicleType")),  # "" departure flight
+        (5, ("text", "children.0.familyName")),  # whitespace-only name
+        (5, ("select", "children.0.nationalityCountry")),
+        (5, ("text", "father.0.familyName")),  # None
+        (5, ("date", "father.0.birthday")),
+        (5, ("radio", "father.0.inChinaFlag")),
+    ],
+)
+def test_empty_values_are_skipped(number, field):
+    assert field not in values(number)
+
+
+@pytest.mark.parametrize(
+    "relative, title, present, remark",
+    [
+        ("father", "5.5B Father", False, True),
+        ("mother", "5.5C Mother", True, False),
+        ("children", "5.5D Children", False, False),
+    ],
+)
+def test_missing_relatives_are_not_applicable(relative, title, present, remark):
+    actions = plan(step(5), APPLICANT, OPTIONS)
+    ticked = [a for a in actions if a.kind == "checkbox" and title in a.target.selector]
+    notes = [a.value for a in actions if a.kind == "note"]
+    remarks = {a.target.for_id: a.value for a in actions if a.kind == "remark"}
+    assert len(ticked) == (0 if present else 1)
+    assert (f"No {relative} information provided" in notes) is not present
+    if remark:
+        assert remarks[f"notApplyItems.{relative}.remark"] == "DESEASED"
+    else:
+        assert f"notApplyItems.{relative}.remark" not in remarks
+
+
+def test_present_relative_is_not_ticked():
+    applicant = {**APPLICANT, "father_fullname": "LY VAN A", "children_fullname": "X"}
+    planned = values(5, applicant)
+    assert planned[("text", "father.0.familyName")] == "LY"
+    assert not any(kind == "checkbox" for kind, _ in planned)
+    assert ("note", None) not in planned
+
+
+def test_field_options():
+    target = Target(for_id="x")
+    schema = StepDef(
+        0,
+        "",
+        "",
+        (
+            Field("text", target, "a", when="gate"),
+            Field("text", target, "b", unless="gate"),
+            Field("remark", target, "missing", always=True),
+            Field("text", target, "n", transform=lambda value, options: ""),
+            Field("radio", target, value=3),
+        ),
+    )
+    applicant = {"a": "A", "b": "B", "n": "N"}
+    assert [a.value for a in plan(schema, applicant, {})] == ["B", None, "3"]
+    gated = plan(schema, {**applicant, "gate": "yes"}, {})
+    assert [a.value for a in gated] == ["A", None, "3"]
+    assert isinstance(gated[0], Action)
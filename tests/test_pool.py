@@ -0,0 +1,60 @@
+import threading
+import time
+
+from visa_pool import BrowserHost, current_host
+
+
+def test_jobs_run_on_the_host_thread():
+    host = BrowserHost().start(warm=False)
+    try:
+        assert host.submit(current_host).result(timeout=5) is host
+        assert not host.busy
+    finally:
+        host.close()
+    assert not host._thread.is_alive()
+
+
+def test_close_does_not_wait_for_a_blocked_job():
+    host = BrowserHost().start(warm=False)
+    release = threading.Event()
+    job = host.submit(release.wait)
+    deadline = time.monotonic() + 5
+    while not host.busy and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    host.close(timeout=5)
+    assert time.monotonic() - started < 1
+
+    release.set()  # the blocked prompt is answered (or cancelled) later
+    assert job.result(timeout=5) is True
+    host._thread.join(5)
+    assert not host._thread.is_alive()
+
+
+def test_start_warms_the_browser_in_the_background(monkeypatch):
+    monkeypatch.setattr("visa_pool.cached_browser", lambda: "playwright")
+    host = BrowserHost()
+    launched = threading.Event()
+
+    def launch():  # stands in for a slow Chromium launch
+        time.sleep(0.3)
+        launched.set()
+
+    host.browser = launch
+    started = time.monotonic()
+    host.start()
+    assert time.monotonic() - started < 0.2
+    assert launched.wait(5)
+    host.close()
+
+
+def test_start_does_not_warm_an_unprobed_browser(monkeypatch):
+    monkeypatch.setattr("visa_pool.cached_browser", lambda: None)
+    host = BrowserHost()
+    launches = []
+    host.browser = lambda: launches.append(1)
+    host.start()
+    host.close()
+    assert not host._thread.is_alive()
+    assert not launches
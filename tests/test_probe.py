@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+import visa_autofill as va
+import visa_probe
+from visa_probe import SYSTEM, cached_browser, forget_browser, remember_browser
+
+
+@pytest.fixture
+def chrome(tmp_path, monkeypatch):
+    """A stand-in browser executable and an empty probe cache."""
+    monkeypatch.setattr(visa_probe, "PROBE_FILE", tmp_path / "probe" / "probe.json")
+    monkeypatch.delenv("PLAYWRIGHT_BROWSERS_PATH", raising=False)
+    monkeypatch.delenv("PLAYWRIGHT_CHROMIUM_EXECUTABLE_PATH", raising=False)
+    path = tmp_path / "chrome"
+    path.write_bytes(b"chrome 1")
+    return path
+
+
+def test_remembered_browser_is_a_hit(chrome):
+    assert cached_browser() is None
+    remember_browser(str(chrome), SYSTEM, "120.0")
+    probe = cached_browser()
+    assert (probe["path"], probe["kind"], probe["version"]) == (
+        str(chrome),
+        SYSTEM,
+        "120.0",
+    )
+
+
+def test_changed_or_removed_browser_is_a_miss(chrome):
+    remember_browser(str(chrome))
+    chrome.write_bytes(b"chrome 2, updated")
+    assert cached_browser() is None
+
+    remember_browser(str(chrome))
+    chrome.unlink()
+    assert cached_browser() is None
+
+
+def test_other_browsers_path_is_a_miss(chrome, monkeypatch, tmp_path):
+    remember_browser(str(chrome))
+    monkeypatch.setenv("PLAYWRIGHT_BROWSERS_PATH", str(tmp_path / "ms-playwright"))
+    assert cached_browser() is None
+
+
+def test_forgotten_or_corrupt_probe_is_a_miss(chrome):
+    remember_browser(str(chrome))
+    forget_browser()
+    forget_browser()  # nothing left to drop
+    assert cached_browser() is None
+
+    visa_probe.PROBE_FILE.write_text("{not json", encoding="utf-8")
+    assert cached_browser() is None
+    visa_probe.PROBE_FILE.write_text('{"kind": "system"}', encoding="utf-8")
+    assert cached_browser() is None
+
+
+def test_hit_starts_no_driver(chrome, monkeypatch):
+    remember_browser(str(chrome), SYSTEM)
+    monkeypatch.setattr(
+        "playwright.sync_api.sync_playwright",
+        lambda: pytest.fail("driver started on a cache hit"),
+    )
+    va.ensure_browsers_available()
+    assert os.environ["PLAYWRIGHT_CHROMIUM_EXECUTABLE_PATH"] == str(chrome)
@@ -0,0 +1,86 @@
+import os
+import stat
+import time
+
+import pytest
+
+from visa_session import expired_reason, load_state, save_state, session_path
+
+PORTAL = ("https://www.visaforchina.cn/user/login", "https://consular.mfa.gov.cn/VISA/")
+
+
+def cookie(name="SESSION", domain=".visaforchina.cn", expires=-1):
+    return {"name": name, "value": "v", "domain": domain, "expires": expires}
+
+
+def state(*cookies):
+    return {"cookies": list(cookies), "origins": []}
+
+
+@pytest.mark.parametrize(
+    "saved, age_h, expected",
+    [
+        (state(cookie()), 1, None),
+        (state(cookie(expires=time.time() + 3600)), 1, None),
+        (state(cookie(domain="consular.mfa.gov.cn")), 1, None),
+        (state(cookie()), 13, "older than 12 h"),
+        (state(), 1, "no cookies"),
+        ({"origins": []}, 1, "no cookies"),
+        (state(cookie(expires=time.time() - 60)), 1, "cookie SESSION expired"),
+        (state(cookie(domain=".example.com")), 1, "no cookies for"),
+        (state(cookie(domain="visaforchina.cn.example.com")), 1, "no cookies for"),
+        ({"cookies": ["SESSION=v"]}, 1, "malformed cookies"),
+    ],
+)
+def test_expired_reason(saved, age_h, expected):
+    reason = expired_reason(saved, time.time() - age_h * 3600, 12, PORTAL)
+    if expected is None:
+        assert reason is None
+    else:
+        assert reason.startswith(expected)
+
+
+def test_no_age_limit_and_no_portal_check():
+    assert expired_reason(state(cookie(domain="a.example")), 0, 0) is None
+
+
+def test_round_trip_is_private(tmp_path):
+    path = tmp_path / "nested" / "session.json"
+    save_state(path, state(cookie()))
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert load_state(path, 12, PORTAL) == state(cookie())
+    assert not list(path.parent.glob("*.tmp"))
+
+
+def test_stale_session_is_discarded(tmp_path):
+    path = tmp_path / "session.json"
+    save_state(path, state(cookie()))
+    old = time.time() - 13 * 3600
+    os.utime(path, (old, old))
+    assert load_state(path, 12, PORTAL) is None
+    assert not path.exists()
+
+
+def test_session_of_another_portal_is_discarded(tmp_path):
+    path = tmp_path / "session.json"
+    save_state(path, state(cookie(domain=".example.com")))
+    assert load_state(path, 12, PORTAL) is None
+    assert not path.exists()
+
+
+@pytest.mark.parametrize("content", ["{not json", "[]", '"cookies"', ""])
+def test_corrupt_file_is_ignored(tmp_path, content):
+    path = tmp_path / "session.json"
+    path.write_text(content, encoding="utf-8")
+    assert load_state(path, 12, PORTAL) is None
+
+
+def test_missing_file(tmp_path):
+    assert load_state(tmp_path / "none.json", 12, PORTAL) is None
+
+
+def test_session_path_is_per_account(tmp_path):
+    assert session_path(str(tmp_path / "s.json"), "a@b.c") == tmp_path / "s.json"
+    assert session_path("", " A@B.c ") == session_path("", "a@b.c")
+    assert session_path("", "a@b.c") != session_path("", "x@b.c")
+
@@ -0,0 +1,85 @@
+from visa_steps import (
+    FieldIndex,
+    Target,
+    cached_index,
+    invalidate_index,
+    start_page,
+    store_index,
+)
+
+
+class Page:
+    """Stands in for a Playwright page as a weak-reference key."""
+
+
+def test_index_resolves_labels_and_for_ids():
+    index = FieldIndex(
+        {"forIds": {"surname": ["3"]}, "labels": [["Surname (as in passport)", "3"]]}
+    )
+    assert index.selector_for(Target(for_id="surname")) == "div[data-va-field='3']"
+    assert index.selector_for(Target(label="surname (as")) == "div[data-va-field='3']"
+    assert index.selector_for(Target(label="Given name")) is None
+
+
+def test_invalidated_index_stops_resolving():
+    page = Page()
+    index = store_index(page, {"forIds": {"surname": ["3"]}, "labels": []})
+    assert cached_index(page) is index
+    invalidate_index(page)
+    assert cached_index(page) is None
+    assert index.selector_for(Target(for_id="surname")) is None
+
+
+OPTIONS = {
+    "CACHE_ASSETS": False,
+    "BLOCK_REQUESTS": False,
+    "CDP_URL": "",
+    "USE_EXISTING_BROWSER": False,
+    "REUSE_SESSION": True,
+    "AUTO_NEXT": False,
+    "LOGIN_URL": "https://visa.example.cn/login",
+    "FORM_URL": "https://visa.example.cn/form",
+    "QUICK_FORM_URL": "https://visa.example.cn/quick",
+    "EMAIL_LOGIN": "agent@example.com",
+    "PASSWORD_LOGIN": "secret",
+}
+
+
+def run_flow(flow, answers):
+    """Drive *flow* like an engine would, answering ops from *answers*."""
+    kinds, result = [], None
+    while True:
+        try:
+            op = flow.send(result)
+        except StopIteration as stop:
+            return kinds, stop.value
+        kinds.append(op.kind)
+        result = answers.get(op.kind)
+
+
+def test_saved_session_skips_login():
+    kinds, _ = run_flow(start_page(OPTIONS), {"has_cookies": True, "open_form": True})
+    assert kinds == ["has_cookies", "open_form", "print"]
+
+
+def test_expired_session_logs_in_and_saves():
+    kinds, _ = run_flow(start_page(OPTIONS), {"has_cookies": True, "open_form": False})
+    assert kinds[:6] == [
+        "has_cookies",
+        "open_form",
+        "url",
+        "log",
+        "discard_session",
+        "clear_cookies",
+    ]
+    assert "fill" in kinds and kinds[-1] == "save_session"
+
+
+def test_attached_chrome_on_form_can_start_here():
+    options = {**OPTIONS, "CDP_URL": "http://127.0.0.1:9222", "BLOCK_REQUESTS": True}
+    kinds, _ = run_flow(
+        start_page(options), {"url": "https://visa.example.cn/step/4", "prompt": "Y"}
+    )
+    assert kinds == ["url", "prompt", "filter_requests"]
+    kinds, _ = run_flow(start_page({**options, "AUTO_NEXT": True}), {"open_form": True})
+    assert kinds == ["open_form", "print", "filter_requests"]
@@ -0,0 +1,87 @@
+import os
+
+from visa_store import ApplicantStore, FAILURE, REMOVED, SUCCESS
+
+
+def touch(path, step):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + step * 1_000_000_000))
+
+
+def applicants(*passports, **fields):
+    return [{"passport_number": p, "visa_type": "L", **fields} for p in passports]
+
+
+def pending(store, filters=None):
+    return [row["passport_number"] for row in store.pending(filters)]
+
+
+def test_sync_skips_unchanged_source(tmp_path):
+    data = tmp_path / "applicants.xlsx"
+    data.write_bytes(b"x")
+    with ApplicantStore(tmp_path / "a.db") as store:
+        assert store.sync(data, lambda: applicants("A1", "B2")) == 2
+        assert store.sync(data, lambda: applicants("A1", "B2", "C3")) == 0
+        assert pending(store) == ["A1", "B2"]
+
+
+def test_missing_passports_are_removed_and_revived(tmp_path):
+    data = tmp_path / "applicants.xlsx"
+    data.write_bytes(b"x")
+    with ApplicantStore(tmp_path / "a.db") as store:
+        store.sync(data, lambda: applicants("A1", "B2", "C3"))
+        store.record({"passport_number": "C3", "status": SUCCESS})
+        touch(data, 1)
+        store.sync(data, lambda: applicants("A1"))
+        assert pending(store) == ["A1"]
+        assert store.counts() == {"PENDING": 1, REMOVED: 2}
+        assert pending(store, {"status": REMOVED}) == ["B2", "C3"]
+
+        touch(data, 2)
+        store.sync(data, lambda: applicants("A1", "B2"))
+        assert pending(store) == ["A1", "B2"]
+
+
+def test_status_survives_reimport(tmp_path):
+    data = tmp_path / "applicants.xlsx"
+    data.write_bytes(b"x")
+    with ApplicantStore(tmp_path / "a.db") as store:
+        store.sync(data, lambda: applicants("A1", "B2"))
+        store.record({"passport_number": "A1", "status": SUCCESS})
+        store.record({"passport_number": "B2", "status": FAILURE, "error": "e"})
+        touch(data, 1)
+        store.sync(data, lambda: applicants("A1", "B2", travel_city="Hanoi"))
+        assert store.counts() == {SUCCESS: 1, FAILURE: 1}
+        assert list(store.pending())[0]["travel_city"] == "Hanoi"
+
+
+def test_new_image_triggers_reimport(tmp_path):
+    data = tmp_path / "applicants.xlsx"
+    data.write_bytes(b"x")
+    images = tmp_path / "images"
+    images.mkdir()
+
+    def image_for(passport):
+        path = images / f"{passport}.jpg"
+        return path if path.exists() else None
+
+    with ApplicantStore(tmp_path / "a.db") as store:
+        rows = lambda: applicants("A1")
+        store.sync(data, rows, image_for, images)
+        assert "image_path" not in list(store.pending())[0]
+        (images / "A1.jpg").write_bytes(b"jpg")
+        touch(images, 1)  # mtime granularity may hide the change otherwise
+        assert store.sync(data, rows, image_for, images) == 1
+        assert list(store.pending())[0]["image_path"] == str(images / "A1.jpg")
+
+
+def test_filters(tmp_path):
+    data = tmp_path / "applicants.xlsx"
+    data.write_bytes(b"x")
+    with ApplicantStore(tmp_path / "a.db") as store:
+        store.sync(
+            data,
+            lambda: applicants("A1", travel_city="Hanoi")
+            + applicants("B2", travel_city="Saigon"),
+        )
+        assert pending(store, {"travel_city": ["Saigon"]}) == ["B2"]
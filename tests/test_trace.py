@@ -0,0 +1,28 @@
+import pytest
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+import visa_autofill as va
+import visa_trace
+
+
+def fail():
+    raise PlaywrightTimeoutError("Timeout 3000ms exceeded")
+
+
+def test_traced_records_action_and_raises():
+    with visa_trace.tracing("A1") as trace:
+        assert va.traced("click", lambda: "ok") == "ok"
+        with pytest.raises(PlaywrightTimeoutError):
+            va.traced("upload", fail)
+    actions = [span for span in trace.spans if span.kind == visa_trace.ACTION]
+    assert [(span.name, span.ok) for span in actions] == [
+        ("click", True),
+        ("upload", False),
+    ]
+
+
+def test_safe_records_and_swallows():
+    with visa_trace.tracing("A1") as trace:
+        assert va.safe("pick_option click", fail) is None
+    (action,) = [span for span in trace.spans if span.kind == visa_trace.ACTION]
+    assert not action.ok and "Timeout" in action.error
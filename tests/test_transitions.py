@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import pytest
+from playwright.sync_api import sync_playwright
+
+import visa_autofill as va
+import visa_steps as steps
+
+REPLICA = Path(__file__).resolve().parent.parent / "benchmarks/form_replica/index.html"
+
+
+@pytest.fixture
+def page(chromium, monkeypatch):
+    """The form replica on step 1; its /api/* calls fail fast from file://."""
+    monkeypatch.setattr(va, "AUTO_NEXT", True)
+    monkeypatch.setattr(va, "STEP_TRANSITION_TIMEOUT", 1_000)
+    with sync_playwright() as p:
+        browser = p.chromium.launch(executable_path=chromium, headless=True)
+        page = browser.new_page()
+        page.goto(REPLICA.as_uri())
+        yield page
+        browser.close()
+
+
+def show_step(page, number):
+    page.evaluate("(index) => render(index)", number - 1)
+
+
+def test_state_names_the_current_step(page):
+    state = page.evaluate(steps.STEP_STATE_JS, "1.")
+    assert state["title"] == "1. Personal information"
+    assert state["expected"]
+    assert not page.evaluate(steps.STEP_STATE_JS, "2.")["expected"]
+    assert not page.evaluate(steps.STEP_STATE_JS, None)["expected"]
+
+
+def test_ready_only_after_the_next_step_shows(page):
+    before = page.evaluate(steps.STEP_STATE_JS, "2.")
+    assert page.evaluate(steps.STEP_READY_JS, [before, "2."]) is False
+    page.click("button:has-text('Next')")
+    signal = page.wait_for_function(steps.STEP_READY_JS, arg=[before, "2."])
+    assert signal.json_value() == "step title"
+
+
+def test_next_step_waits_for_the_next_title(page):
+    show_step(page, 4)
+    assert va.next_step(page, 4) > 0
+    assert page.inner_text("#step-title") == "5. Family information"
+
+
+def test_stuck_step_fails_the_applicant(page):
+    show_step(page, 11)  # "Next" re-renders the same page
+    with pytest.raises(RuntimeError, match="did not advance"):
+        va.next_step(page, 9)
+
+
+def test_last_step_is_not_a_failure(page):
+    show_step(page, 11)
+    assert steps.next_step_prefix(len(steps.STEPS)) is None
+    assert va.next_step(page, len(steps.STEPS)) is None
+
+
+class StuckPage:
+    """A page on which "Next" never changes anything."""
+
+    def evaluate(self, script, arg=None):
+        return {"route": "/", "active": -1, "title": "Review", "expected": False}
+
+    def wait_for_function(self, script, arg=None, timeout=None):
+        raise va.PlaywrightTimeoutError("timeout")
+
+
+@pytest.mark.parametrize("auto_next", [True, False])
+def test_no_change_after_the_last_step_is_only_logged(monkeypatch, auto_next):
+    monkeypatch.setattr(va, "AUTO_NEXT", auto_next)
+    monkeypatch.setattr(va, "click_button", lambda page, text: None)
+    monkeypatch.setattr(va, "show_prompt", pytest.fail)
+    assert va.next_step(StuckPage(), len(steps.STEPS)) is None
+    if auto_next:
+        with pytest.raises(RuntimeError, match="did not advance"):
+            va.next_step(StuckPage(), len(steps.STEPS) - 1)
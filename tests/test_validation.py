@@ -0,0 +1,65 @@
+from visa_validation import (
+    REQUIRED_COLUMNS,
+    report_invalid,
+    skip_invalid,
+    validate,
+)
+
+
+def applicant(passport="A1", **changes):
+    row = {column: "x" for column in REQUIRED_COLUMNS}
+    row.update(
+        passport_number=passport,
+        full_name="NGUYEN VAN A",
+        date_of_arrival="01/02/2026",
+        travel_city="ShangHai,Shanghai",
+        phone_number="+84 901 269 595",
+        emergency_phone="0901269595",
+    )
+    row.update(changes)
+    return row
+
+
+def test_valid_rows_pass():
+    assert validate([applicant("A1"), applicant("B2")]).empty
+
+
+def test_problems_are_reported_per_row_and_column():
+    errors = validate(
+        [
+            applicant("A1", date_of_arrival="31/31/2026"),
+            applicant("B2"),
+            applicant("C3", travel_city="Beijing", phone_number="12"),
+        ],
+        first_row=10,
+    )
+    assert list(zip(errors["row"], errors["column"])) == [
+        (10, "date_of_arrival"),
+        (12, "travel_city"),
+        (12, "phone_number"),
+    ]
+
+
+def test_relative_columns_required_once_named():
+    errors = validate([applicant(father_fullname="NGUYEN VAN B")])
+    assert set(errors["column"]) == {"father_nationality", "father_dob"}
+
+
+def test_rejections_are_keyed_by_row(tmp_path):
+    rows = [
+        applicant(None),
+        applicant("A1", country=""),
+        applicant("A1"),  # same passport, a later corrected row
+        applicant("D4"),
+    ]
+    rejected = report_invalid(validate(rows, first_row=5), tmp_path / "report.csv")
+    assert rejected == {5, 6}
+    kept = list(skip_invalid(rows, rejected, first_row=5, quiet=True))
+    assert kept == rows[2:]
+
+
+def test_clean_run_removes_stale_report(tmp_path):
+    report = tmp_path / "report.csv"
+    report.write_text("stale", encoding="utf-8")
+    assert report_invalid(validate([applicant()]), report) == set()
+    assert not report.exists()
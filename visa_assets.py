@@ -0,0 +1,340 @@
+"""Disk cache for the form app's static assets, shared by applicants and runs.
+
+Every applicant reloads the same Vue / Element-Plus bundles, stylesheets and
+fonts, and so does every restart of the tool.  :class:`AssetRoute` is a
+Playwright ``route`` handler that answers those ``GET`` requests from an
+:class:`AssetCache` on disk:
+
+* file names with a content hash (``index-4f3a9c1d.js``) and responses still
+  fresh per ``Cache-Control`` are served straight from disk;
+* anything else is revalidated with ``If-None-Match`` / ``If-Modified-Since``
+  and served from disk on ``304``, which also restarts its freshness and
+  takes any new validators;
+* ``200`` responses are stored unless marked ``no-store`` / ``private``.
+
+Only scripts, stylesheets, fonts and images on the form's own site are
+cached.  XHR/fetch calls and documents always go to the network.  Each entry
+is a body file plus a small JSON file of headers.  The body's mtime is
+touched on every hit, and once the cache outgrows its size cap the least
+recently used entries are deleted.  Writes are atomic, so a crash or a
+parallel worker never leaves a half-written asset behind.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import weakref
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+from playwright.sync_api import Error as PlaywrightError
+
+from visa_network import site_of
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "visa_autofill" / "assets"
+
+CACHED_TYPES = {"script", "stylesheet", "font", "image"}
+
+# A bundler's content hash in the file name: index-4f3a9c1d.js, app.8e1b2c3d.css
+HASHED_NAME = re.compile(r"[.-](?=[0-9a-zA-Z_]*\d)[0-9a-zA-Z_]{8,}\.\w+$")
+
+# Response headers kept with an entry (the body is stored decoded)
+STORED_HEADERS = (
+    "content-type",
+    "etag",
+    "last-modified",
+    "cache-control",
+    "access-control-allow-origin",
+)
+
+# Request validators the browser adds from its own HTTP cache
+CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+
+# Evict down to this share of the cap so the next stores do not evict again
+_EVICT_TO = 0.9
+
+
+def _max_age(cache_control: str) -> Optional[int]:
+    match = re.search(r"max-age=(\d+)", cache_control)
+    return int(match.group(1)) if match else None
+
+
+class AssetCache:
+    """Size-capped, least-recently-used store of asset responses."""
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.directory / f"{key}.body", self.directory / f"{key}.json"
+
+    def get(self, url: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """The stored headers and body of *url*, marking it recently used."""
+        body_path, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = body_path.read_bytes()
+            os.utime(body_path)
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or len(body) != meta.get("size"):
+            return None
+        return meta, body
+
+    def fresh(self, url: str, meta: Dict[str, Any]) -> bool:
+        """Whether *meta* may be served without asking the server."""
+        cache_control = meta["headers"].get("cache-control", "")
+        if "no-cache" in cache_control:
+            return False
+        if HASHED_NAME.search(urlparse(url).path) or "immutable" in cache_control:
+            return True
+        max_age = _max_age(cache_control)
+        return max_age is not None and time.time() - meta["stored_at"] < max_age
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes):
+        cache_control = headers.get("cache-control", "")
+        if "no-store" in cache_control or "private" in cache_control:
+            return
+        if len(body) > self.max_bytes // 10:
+            return  # one asset should not flush the cache
+        meta = {
+            "url": url,
+            "status": status,
+            "headers": {k: headers[k] for k in STORED_HEADERS if k in headers},
+            "size": len(body),
+            "stored_at": time.time(),
+        }
+        body_path, meta_path = self._paths(url)
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            total = self._size()
+            previous = body_path.stat().st_size if body_path.exists() else 0
+            _write_atomic(body_path, body)
+            _write_atomic(meta_path, json.dumps(meta).encode())
+            self._total = total + len(body) - previous
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def refresh(
+        self, url: str, meta: Dict[str, Any], headers: Dict[str, str]
+    ) -> Dict[str, Any]:
+        """*meta* after a ``304`` with *headers*: fresh again, new validators."""
+        meta = {
+            **meta,
+            "headers": {
+                **meta["headers"],
+                **{k: headers[k] for k in STORED_HEADERS if k in headers},
+            },
+            "stored_at": time.time(),
+        }
+        body_path, meta_path = self._paths(url)
+        with self._lock:
+            if not body_path.exists():
+                return meta  # evicted meanwhile – the body in hand is still served
+            try:
+                _write_atomic(meta_path, json.dumps(meta).encode())
+            except OSError as e:
+                logging.debug("Asset cache: cannot refresh %s: %s", url, e)
+        return meta
+
+    def _size(self) -> int:
+        if self._total is None:
+            self._total = sum(
+                entry.stat().st_size
+                for entry in os.scandir(self.directory)
+                if entry.name.endswith(".body")
+            )
+        return self._total
+
+    def _evict(self):
+        bodies = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".body"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # evicted by another process
+                    continue
+                bodies.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+        bodies.sort()
+        target = self.max_bytes * _EVICT_TO
+        evicted = 0
+        for _, size, path in bodies:
+            if self._total <= target:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+            self._total -= size
+            evicted += 1
+        logging.info(
+            "Asset cache: evicted %d entries, %.1f MB left",
+            evicted,
+            self._total / 1e6,
+        )
+
+
+def _write_atomic(path: Path, data: bytes):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _served_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    # The body handed to fulfill() is already decoded and complete
+    return {
+        name: value
+        for name, value in headers.items()
+        if name not in ("content-encoding", "content-length", "transfer-encoding")
+    }
+
+
+_caches: Dict[Tuple[Path, int], AssetCache] = {}
+_caches_lock = threading.Lock()
+
+
+def asset_cache(directory: Optional[Path] = None, max_mb: float = 200) -> AssetCache:
+    """The process-wide cache for *directory* (shared by all workers)."""
+    key = (Path(directory or DEFAULT_CACHE_DIR), int(max_mb * 1024 * 1024))
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = AssetCache(*key)
+        return _caches[key]
+
+
+class AssetRoute:
+    """One page's route handler in front of a shared :class:`AssetCache`."""
+
+    def __init__(self, cache: AssetCache, sites: Iterable[str]):
+        # sites: URLs or hosts whose assets are cached
+        self.cache = cache
+        self.sites = {site_of(urlparse(url).hostname or url) for url in sites if url}
+        self.counts: Counter = Counter()
+
+    def cacheable(self, request) -> bool:
+        if request.method != "GET" or request.resource_type not in CACHED_TYPES:
+            return False
+        parsed = urlparse(request.url)
+        return parsed.scheme in ("http", "https") and (
+            site_of(parsed.hostname or "") in self.sites
+        )
+
+    def _conditional(self, request, meta: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        # Only our own validators: a 304 to the browser's, with nothing cached
+        # here, would leave no body to fulfill with
+        headers = {
+            name: value
+            for name, value in request.headers.items()
+            if name.lower() not in CONDITIONAL_HEADERS
+        }
+        if meta is not None:
+            if "etag" in meta["headers"]:
+                headers["if-none-match"] = meta["headers"]["etag"]
+            if "last-modified" in meta["headers"]:
+                headers["if-modified-since"] = meta["headers"]["last-modified"]
+        return headers
+
+    def _answer(self, url: str, cached, response, body: Optional[bytes]):
+        """What to fulfill with: (status, headers, body), counted."""
+        if response.status == 304 and cached is not None:
+            self.counts["revalidated"] += 1
+            meta = self.cache.refresh(url, cached[0], response.headers)
+            return meta["status"], meta["headers"], cached[1]
+        headers = _served_headers(response.headers)
+        if response.status == 200 and body is not None:
+            self.cache.put(url, response.status, response.headers, body)
+            self.counts["downloaded"] += 1
+        return response.status, headers, body
+
+    def handle(self, route):
+        request = route.request
+        if not self.cacheable(request):
+            route.fallback()
+            return
+        cached = self.cache.get(request.url)
+        if cached is not None and self.cache.fresh(request.url, cached[0]):
+            self.counts["from cache"] += 1
+            meta, body = cached
+            route.fulfill(status=meta["status"], headers=meta["headers"], body=body)
+            return
+        try:
+            response = route.fetch(
+                headers=self._conditional(request, cached and cached[0])
+            )
+            body = response.body() if response.status == 200 else None
+        except PlaywrightError as e:
+            logging.debug("Asset fetch failed for %s: %s", request.url, e)
+            route.fallback()
+            return
+        status, headers, body = self._answer(request.url, cached, response, body)
+        route.fulfill(status=status, headers=headers, body=body)
+
+    async def handle_async(self, route):
+        request = route.request
+        if not self.cacheable(request):
+            await route.fallback()
+            return
+        cached = self.cache.get(request.url)
+        if cached is not None and self.cache.fresh(request.url, cached[0]):
+            self.counts["from cache"] += 1
+            meta, body = cached
+            await route.fulfill(
+                status=meta["status"], headers=meta["headers"], body=body
+            )
+            return
+        try:
+            response = await route.fetch(
+                headers=self._conditional(request, cached and cached[0])
+            )
+            body = await response.body() if response.status == 200 else None
+        except PlaywrightError as e:
+            logging.debug("Asset fetch failed for %s: %s", request.url, e)
+            await route.fallback()
+            return
+        status, headers, body = self._answer(request.url, cached, response, body)
+        await route.fulfill(status=status, headers=headers, body=body)
+
+    def install(self, target):
+        """Cache the assets of a sync ``BrowserContext`` or ``Page``."""
+        target.route("**/*", self.handle)
+
+    async def install_async(self, target):
+        """Cache the assets of an async ``BrowserContext`` or ``Page``."""
+        await target.route("**/*", self.handle_async)
+
+    def snapshot(self) -> Counter:
+        return Counter(self.counts)
+
+    def report(self, since: Optional[Counter] = None) -> str:
+        delta = self.counts - (since or Counter())
+        return (
+            f"assets: {delta['from cache']} from cache, "
+            f"{delta['revalidated']} revalidated, {delta['downloaded']} downloaded"
+        )
+
+
+_routes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def page_assets(page) -> Optional[AssetRoute]:
+    """The asset route installed for *page*, if any."""
+    return _routes.get(page)
+
+
+def register(page, asset_route: AssetRoute) -> AssetRoute:
+    _routes[page] = asset_route
+    return asset_route
@@ -0,0 +1,731 @@
+"""Asyncio engine for the visa autofill automation.
+
+Runs the same step plans as the sync engine (see ``visa_steps``) on
+``playwright.async_api`` so one process and one event loop can drive many
+pages at once: while one page waits for a dropdown or a network round-trip,
+the others keep filling.  The sync engine in ``visa_autofill`` stays the one
+used by the GUI's single-page mode.
+
+Only the widget helpers are duplicated here; they mirror their sync
+counterparts one-to-one.  The async engine always runs unattended (as if
+``AUTO_NEXT`` were set) because per-step prompts cannot be shared between
+pages.
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright
+
+import visa_assets
+import visa_autofill as va
+import visa_steps as steps
+import visa_trace
+from visa_batch import WorkerProgress, worker_for_row
+from visa_images import upload_path
+from visa_itinerary import itinerary
+from visa_journal import Journal
+from visa_network import page_filter, register
+from visa_session import discard, save_state
+from visa_steps import Action
+
+# ---------------------------------------------------------------------------
+# Widget helpers (async mirrors of visa_autofill) ----------------------------
+# ---------------------------------------------------------------------------
+
+
+async def traced(desc: str, fn, *args, **kwargs):
+    """Await *fn* as an action span (see ``va.traced``)."""
+    with visa_trace.span(visa_trace.ACTION, desc):
+        return await fn(*args, **kwargs)
+
+
+async def safe(desc: str, fn, *args, **kwargs):
+    """Await *fn* ignoring Playwright locator errors (see ``va.safe``)."""
+    try:
+        return await traced(desc, fn, *args, **kwargs)
+    except (PlaywrightTimeoutError, PlaywrightError, ValueError) as exc:
+        logging.warning("SAFE-IGNORED: %s → %s", desc, exc)
+        return None
+
+
+async def fill_text(container, trigger_selector: str, text: str):
+    await safe("fill_text", container.locator(trigger_selector).fill, text)
+
+
+async def pick_option(container, trigger_selector: str, text: str, page: Page):
+    # Open the combobox
+    await safe("open combobox", container.locator(trigger_selector).click)
+
+    # Find the visible dropdown
+    dropdown = page.locator(
+        ".el-select-dropdown.el-popper:not([style*='display: none'])"
+    )
+    items = dropdown.locator("li.el-select-dropdown__item")
+    target = text.strip().lower()
+
+    index = await safe(
+        "pick_option lookup", items.evaluate_all, steps.FIND_TEXT_JS, [target, None]
+    )
+    if index is not None and index >= 0:
+        await safe("pick_option click", items.nth(index).click)
+        await safe(
+            "dropdown wait hidden", dropdown.wait_for, state="hidden", timeout=3_000
+        )
+        return
+
+    logging.warning("[pick_option] No match found for '%s'", text)
+
+
+async def click_radio_button(container, text: str):
+    text = text.strip().lower()
+    radios = container.locator("label.el-radio")
+
+    index = await safe(
+        "click_radio_button lookup",
+        radios.evaluate_all,
+        steps.FIND_TEXT_JS,
+        [text, "span.el-radio__label"],
+    )
+    if index is not None and index >= 0:
+        await safe("click_radio_button", radios.nth(index).click)
+        return
+
+    logging.warning("Radio option '%s' not found – skipped", text)
+
+
+async def click_button(page: Page, text: str):
+    target = text.strip().lower()
+    buttons = page.locator("button:visible")
+    index = await safe(
+        f"click_button '{text}' lookup",
+        buttons.evaluate_all,
+        steps.FIND_TEXT_JS,
+        [target, None],
+    )
+    if index is not None and index >= 0:
+        await safe(f"click_button '{text}'", buttons.nth(index).click)
+        steps.invalidate_index(page)
+        return
+
+    logging.warning("Button with text '%s' not found – skipped", text)
+
+
+async def pick_date(container, year: str, month: str, day: str, page: Page):
+    print(f"Picking date: {year} / {month} / {day}")
+    year_input = container.locator(
+        "div.select-date-picker-one input.el-input__inner:not([readonly]):not([disabled])"
+    )
+    await traced("pick_date year", year_input.fill, year)
+    await pick_option(
+        container.locator("div.select-date-picker-two"),
+        "input.el-input__inner",
+        month.lstrip("0"),
+        page,
+    )
+    day_input = container.locator(
+        "div.select-date-picker-three input.el-input__inner:not([disabled])"
+    )
+    await traced(
+        "pick_date day enabled", day_input.wait_for, state="visible", timeout=3_000
+    )
+    await pick_option(
+        container.locator("div.select-date-picker-three"),
+        "input.el-input__inner",
+        day.lstrip("0"),
+        page,
+    )
+
+
+async def applicable_checkbox(container, text: str = "Not applicable") -> bool:
+    try:
+        checkbox_label = container.locator(
+            f"label.el-checkbox:has(span.el-checkbox__label:has-text('{text}'))"
+        )
+        if not await checkbox_label.is_visible():
+            print("Checkbox not visible")
+            return False
+        if await checkbox_label.locator("input[type='checkbox']").is_checked():
+            return True
+        await traced("applicable_checkbox click", checkbox_label.click)
+        return True
+    except Exception as e:
+        print(f"[Checkbox Error] {e}")
+        return False
+
+
+async def fill_remark(
+    container, text: str, timeout: Optional[int] = None, warning: str = ""
+):
+    remark_input = container.locator("textarea.el-textarea__inner")
+    if timeout is None:
+        await traced("fill_remark", remark_input.fill, text)
+        return
+    try:
+        await traced(
+            "remark visible", remark_input.wait_for, state="visible", timeout=timeout
+        )
+        await traced("fill_remark", remark_input.fill, text)
+    except PlaywrightTimeoutError:
+        print(warning)
+
+
+async def click_all_no_radios(page: Page):
+    if va.BULK_NO_RADIOS and await bulk_click_radios(page, "no"):
+        return
+    await click_no_radios_one_by_one(page)
+
+
+async def bulk_click_radios(page: Page, text: str, passes: int = 3) -> bool:
+    """Async counterpart of ``visa_autofill.bulk_click_radios``."""
+    for _ in range(passes):
+        result = await safe(
+            "bulk radio click", page.evaluate, steps.CLICK_RADIOS_JS, text
+        )
+        if result is None:
+            return False
+        if not result["clicked"]:
+            return True
+        checked = await safe(
+            "bulk radio verify",
+            page.wait_for_function,
+            steps.RADIOS_CHECKED_JS,
+            arg=text,
+            timeout=va.RADIO_CHECK_TIMEOUT,
+        )
+        if checked is None:
+            logging.warning(
+                "Bulk '%s' selection not confirmed – clicking radios one by one", text
+            )
+            return False
+        await wait_for_network_idle(page)
+    return True
+
+
+async def click_no_radios_one_by_one(page: Page):
+    no_radio_buttons = page.locator("label.el-radio:text-is('No')")
+    for i in range(await no_radio_buttons.count()):
+        radio = no_radio_buttons.nth(i)
+        await traced("no radio click", radio.click)
+        await safe(
+            "radio is-checked",
+            radio.and_(page.locator("label.is-checked")).wait_for,
+            state="attached",
+            timeout=va.RADIO_CHECK_TIMEOUT,
+        )
+    await wait_for_network_idle(page)
+
+
+async def wait_for_network_idle(page: Page, quiet_ms: int = 150, timeout: int = 5_000):
+    """Async counterpart of ``visa_autofill.wait_for_network_idle``."""
+    tracker = va.track_requests(page)
+    deadline = time.monotonic() + timeout / 1000
+    while tracker.idle_for() * 1000 < quiet_ms:
+        if time.monotonic() >= deadline:
+            logging.warning(
+                "Network still busy after %d ms (%d requests)",
+                timeout,
+                len(tracker.pending),
+            )
+            return
+        await asyncio.sleep(0.025)
+
+
+async def wait_for_upload_and_confirm(page: Page):
+    confirm_button = page.locator(
+        "button.confirm-button:has-text('Confirm the auto-filled passport details on the application form.')"
+    )
+    await traced(
+        "confirm visible", confirm_button.wait_for, state="visible", timeout=30_000
+    )
+    await traced("confirm click", confirm_button.click)
+    await safe(
+        "confirm dialog close", confirm_button.wait_for, state="hidden", timeout=5_000
+    )
+    await wait_for_network_idle(page)
+
+
+async def upload_file(page: Page, file_path: str, text: str):
+    file_input = (
+        page.locator(f"label:has-text('{text}')")
+        .locator(steps.FORM_ITEM)
+        .locator("input[type='file']")
+    )
+    await traced("upload_file", file_input.set_input_files, file_path)
+    await wait_for_upload_and_confirm(page)
+
+
+# ---------------------------------------------------------------------------
+# Plan execution --------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+async def field_index(page: Page) -> steps.FieldIndex:
+    index = steps.cached_index(page)
+    if index is None:
+        index = steps.store_index(
+            page, await safe("index form fields", page.evaluate, steps.INDEX_FIELDS_JS)
+        )
+    return index
+
+
+async def locate_target(
+    page: Page, target: steps.Target, index: Optional[steps.FieldIndex] = None
+):
+    """Locator for *target*; an index whose tagged node is gone is dropped."""
+    node = steps.locate(page, target, index)
+    if index is not None and index.selector_for(target) and await node.count() == 0:
+        logging.info("Field index is stale – locating by label instead")
+        steps.invalidate_index(page)
+        node = steps.locate(page, target)
+    return node
+
+
+async def run_action(
+    page: Page, action: Action, index: Optional[steps.FieldIndex] = None
+):
+    container = (
+        await locate_target(page, action.target, index) if action.target else page
+    )
+    kind = action.kind
+
+    if kind == "select":
+        await pick_option(container, action.selector, action.value, page)
+    elif kind == "text":
+        await fill_text(container, action.selector, action.value)
+    elif kind == "radio":
+        await click_radio_button(container, action.value)
+    elif kind == "date":
+        await pick_date(container, *action.value, page)
+    elif kind == "checkbox":
+        await applicable_checkbox(container, action.value)
+    elif kind == "remark":
+        await fill_remark(container, action.value, action.timeout, action.message)
+    elif kind == "click":
+        await traced("click", container.click)
+    elif kind == "upload":
+        await traced(
+            "upload",
+            container.locator(action.selector).set_input_files,
+            action.value,
+        )
+    elif kind == "no_radios":
+        await click_all_no_radios(page)
+    elif kind == "note":
+        print(action.value)
+    else:
+        raise ValueError(f"Unknown action kind: {kind}")
+
+
+async def fill_text_batch(
+    page: Page, actions: List[Action], index: steps.FieldIndex
+) -> List[Action]:
+    batch = [(action, index.batch_entry(action)) for action in actions]
+    entries = [entry for _, entry in batch if entry]
+    if not entries:
+        return actions
+    filled = (
+        await safe("fill_text batch", page.evaluate, steps.FILL_BATCH_JS, entries) or []
+    )
+    done = iter(filled)
+    return [action for action, entry in batch if not entry or not next(done, False)]
+
+
+async def run_actions(page: Page, actions: List[Action]):
+    index = await field_index(page)
+    if va.BATCH_TEXT_FILLS:
+        actions = await fill_text_batch(page, actions, index)
+    for action in actions:
+        with visa_trace.span(visa_trace.FIELD, visa_trace.field_name(action)):
+            await run_action(page, action, index)
+
+
+async def next_step(page: Page, number: int) -> Optional[float]:
+    """Async counterpart of ``visa_autofill.next_step`` (fails when stuck
+    before the last step)."""
+    prefix = steps.next_step_prefix(number)
+    before = await page.evaluate(steps.STEP_STATE_JS, prefix)
+    with visa_trace.span(visa_trace.TRANSITION, f"step {number} → {number + 1}"):
+        started = time.perf_counter()
+        await click_button(page, "Next")
+        try:
+            ready = await page.wait_for_function(
+                steps.STEP_READY_JS,
+                arg=[before, prefix],
+                timeout=va.STEP_TRANSITION_TIMEOUT,
+            )
+        except PlaywrightTimeoutError:
+            if prefix is None:
+                logging.warning(
+                    "No page change within %d ms after the last step",
+                    va.STEP_TRANSITION_TIMEOUT,
+                )
+                return None
+            raise RuntimeError(
+                f"Step {number} did not advance within "
+                f"{va.STEP_TRANSITION_TIMEOUT} ms (is a required field missing?)"
+            ) from None
+        latency = time.perf_counter() - started
+    logging.info(
+        "Step %d → %d ready in %.0f ms (%s)",
+        number,
+        number + 1,
+        latency * 1000,
+        await ready.json_value(),
+    )
+    return latency
+
+
+async def fill_form(page: Page, applicant: Dict[str, Any], config: Dict[str, Any]):
+    """Async counterpart of ``visa_autofill.fill_form`` (always unattended)."""
+    with visa_trace.tracing(applicant.get("passport_number"), va.TRACE_DIR) as trace:
+        va.track_requests(page)
+        image_folder = config.get("IMAGE_FOLDER")
+        if image_folder:
+            image_file = va.stored_image(applicant) or va.find_image_file(
+                Path(image_folder), applicant["passport_number"]
+            )
+            if image_file:
+                with visa_trace.span(visa_trace.STEP, "upload"):
+                    await upload_file(page, str(upload_path(image_file)), "passport")
+            else:
+                print(f"Image file {image_file} not found")
+
+        options = va.step_options()
+        for step in steps.STEPS:
+            with visa_trace.span(visa_trace.STEP, f"step {step.number}", step.number):
+                await run_actions(page, steps.plan(step, applicant, options))
+                await next_step(page, step.number)
+
+        va.print_step_timings(trace.durations(), trace.durations(visa_trace.TRANSITION))
+
+
+async def run_applicant(page: Page, applicant: Dict[str, Any], config: Dict[str, Any]):
+    """Async counterpart of ``visa_autofill.run_applicant``."""
+    watchers = va.traffic_watchers(page)
+    before = [watcher.snapshot() for watcher in watchers]
+    try:
+        applicant = itinerary().plan_travel(applicant)
+        await fill_form(page, applicant, config)
+        status = "SUCCESS"
+        error_msg = ""
+    except PlaywrightTimeoutError:
+        status = "FAILURE"
+        error_msg = "Timeout waiting for success confirmation"
+        logging.error(error_msg)
+    except Exception as exc:
+        status = "FAILURE"
+        error_msg = str(exc)
+        logging.exception(
+            "Unexpected error while submitting passport %s",
+            applicant.get("passport_number"),
+        )
+    if watchers:
+        traffic = "; ".join(w.report(b) for w, b in zip(watchers, before))
+        print(f"🌐 {applicant.get('passport_number')}: {traffic}")
+    return {**applicant, "status": status, "error": error_msg}
+
+
+# ---------------------------------------------------------------------------
+# Session & pool -------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+async def _prompt(text: str, yes_no: bool = False) -> str:
+    # input() blocks – keep it off the event loop so other pages keep running
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, va.show_prompt, text, yes_no)
+
+
+async def new_form_context(browser):
+    """Async counterpart of ``visa_autofill.new_form_context``."""
+    context = await browser.new_context(**va.context_options())
+    context.set_default_timeout(120_000)
+    return context
+
+
+async def open_logged_in_form(page: Page) -> bool:
+    """Async counterpart of ``visa_autofill.open_logged_in_form``."""
+    await page.goto(va.FORM_URL, wait_until="domcontentloaded", timeout=120000)
+    start = page.locator(steps.START_BUTTON)
+    try:
+        await start.wait_for(state="visible", timeout=va.SESSION_CHECK_TIMEOUT)
+    except PlaywrightTimeoutError:
+        return False
+    await start.click()
+    return True
+
+
+async def launch_browser(p):
+    """Async counterpart of ``visa_autofill.launch_browser``."""
+    return await p.chromium.launch(**va.launch_options())
+
+
+async def attach_browser(p):
+    """Async counterpart of ``visa_autofill.attach_browser``."""
+    logging.info("Attaching to Chrome at %s", va.CDP_URL)
+    try:
+        return await p.chromium.connect_over_cdp(va.CDP_URL)
+    except PlaywrightError as e:
+        raise va.attach_failed(e) from e
+
+
+def attached_context(browser):
+    """Async counterpart of ``visa_autofill.attached_context``."""
+    if not browser.contexts:
+        raise RuntimeError(f"The Chrome at {va.CDP_URL} has no open window")
+    context = browser.contexts[0]
+    context.set_default_timeout(120_000)
+    return context
+
+
+async def close_page(page: Page):
+    """Async counterpart of ``visa_autofill.close_page``."""
+    try:
+        await page.close()
+    except PlaywrightError as e:
+        logging.debug("Tab already gone: %s", e)
+
+
+async def filter_requests(page: Page):
+    """Async counterpart of ``visa_autofill.filter_requests``."""
+    request_filter = page_filter(page)
+    if request_filter is None:
+        request_filter = register(page, va.new_request_filter())
+        await request_filter.install_async(page if va.CDP_URL else page.context)
+    return request_filter
+
+
+async def cache_assets(page: Page):
+    """Async counterpart of ``visa_autofill.cache_assets``."""
+    asset_route = visa_assets.page_assets(page)
+    if asset_route is None:
+        asset_route = visa_assets.register(page, va.new_asset_route())
+        await asset_route.install_async(page if va.CDP_URL else page.context)
+    return asset_route
+
+
+async def page_op(page: Page, op: steps.PageOp):
+    """Async counterpart of ``visa_autofill.page_op``."""
+    kind = op.kind
+
+    if kind == "goto":
+        await page.goto(op.arg, wait_until="domcontentloaded", timeout=120000)
+    elif kind == "fill":
+        await page.fill(op.arg, op.value)
+    elif kind == "click":
+        await page.click(op.arg)
+    elif kind == "open_form":
+        return await open_logged_in_form(page)
+    elif kind == "prompt":
+        return await _prompt(op.arg, bool(op.value))
+    elif kind == "print":
+        print(op.arg)
+    elif kind == "log":
+        logging.info("%s", op.arg)
+    elif kind == "url":
+        return page.url
+    elif kind == "has_cookies":
+        return bool(await page.context.cookies())
+    elif kind == "clear_cookies":
+        await page.context.clear_cookies()
+    elif kind == "save_session":
+        save_state(va.saved_session_path(), await page.context.storage_state())
+    elif kind == "discard_session":
+        discard(va.saved_session_path())
+    elif kind == "cache_assets":
+        await cache_assets(page)
+    elif kind == "filter_requests":
+        await filter_requests(page)
+    else:
+        raise ValueError(f"Unknown page operation: {kind}")
+
+
+async def drive(page: Page, flow: steps.Flow):
+    """Async counterpart of ``visa_autofill.drive``."""
+    result = None
+    while True:
+        try:
+            op = flow.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result = await page_op(page, op)
+
+
+async def open_start_page(page: Page):
+    """Async counterpart of ``visa_autofill.open_start_page``."""
+    # Unattended, like every step of this engine
+    await drive(page, steps.start_page({**va.start_options(), "AUTO_NEXT": True}))
+
+
+# Sentinel telling a page worker that no more rows will be queued
+_STOP = None
+
+
+async def _drain(
+    work: asyncio.Queue,
+    progress: WorkerProgress,
+    results: List[Dict[str, Any]],
+    error_msg: str,
+    journal: Optional[Journal] = None,
+    in_flight: Optional[Tuple[int, Dict[str, Any]]] = None,
+):
+    """Fail every row still queued for a dead page so the producer never blocks
+    (the row it was filling, *in_flight*, first)."""
+    while True:
+        item = in_flight or await work.get()
+        in_flight = None
+        if item is _STOP:
+            return
+        row_num, applicant = item
+        result = {**applicant, "status": "FAILURE", "error": error_msg, "row": row_num}
+        progress.failed += 1
+        results.append(result)
+        if journal is not None:
+            journal.record(result)
+
+
+async def _page_worker(
+    browser,
+    progress: WorkerProgress,
+    work: asyncio.Queue,
+    results: List[Dict[str, Any]],
+    login_lock: asyncio.Lock,
+    config: Dict[str, Any],
+    journal: Optional[Journal] = None,
+):
+    tag = f"[page {progress.worker_id}]"
+    context = page = None
+    stopped = False
+    in_flight = None  # the row taken off the queue but not yet recorded
+    try:
+        # The context is created inside the lock so it starts from the session
+        # a page that logged in before it has just saved
+        async with login_lock:
+            if va.CDP_URL:
+                # The attached Chrome's profile, shared by every page; only
+                # the contexts this run created are closed
+                page = await attached_context(browser).new_page()
+            else:
+                context = await new_form_context(browser)
+                page = await context.new_page()
+            await open_start_page(page)
+
+        while True:
+            item = await work.get()
+            if item is _STOP:
+                stopped = True
+                break
+            in_flight = item
+            row_num, applicant = item
+            progress.current_row = row_num
+            result = await run_applicant(page, applicant, config)
+            if result["status"] == "SUCCESS":
+                progress.done += 1
+            else:
+                progress.failed += 1
+            results.append({**result, "row": row_num})
+            in_flight = None
+            if journal is not None:
+                # a short blocking fsync – one per finished applicant
+                journal.record(result)
+            progress.current_row = None
+            print(f"{tag} {progress.summary()}")
+    except Exception as exc:
+        logging.exception("%s stopped", tag)
+        if not stopped:
+            await _drain(work, progress, results, str(exc), journal, in_flight)
+    finally:
+        if context is not None:
+            await context.close()
+        elif page is not None:
+            # An attached Chrome: close only the tab this page worker opened
+            await close_page(page)
+        progress.finished_at = time.monotonic()
+
+
+async def _feed(
+    applicants: Iterable[Dict[str, Any]],
+    queues: List[asyncio.Queue],
+    progress: List[WorkerProgress],
+    start_index: int,
+):
+    """Queue rows as the pages free up, then tell every page to stop."""
+    try:
+        for row_num, applicant in enumerate(applicants, start=start_index):
+            worker = worker_for_row(row_num, len(queues))
+            progress[worker].assigned += 1
+            await queues[worker].put((row_num, applicant))
+    finally:
+        for work in queues:
+            await work.put(_STOP)
+
+
+async def run_pages(
+    applicants: Iterable[Dict[str, Any]],
+    config: Dict[str, Any],
+    pages: Optional[int] = None,
+    start_index: int = 0,
+    journal: Optional[Journal] = None,
+) -> List[Dict[str, Any]]:
+    """Fill every applicant over *pages* concurrent pages on one event loop.
+
+    Rows are split with the same stable ``row % pages`` assignment as the
+    threaded batch runner, one isolated ``BrowserContext`` per page, and are
+    pulled from *applicants* only ``WORKER_QUEUE_SIZE`` rows ahead of a page.
+    """
+    pages = max(1, pages or va.WORKERS)
+    queue_size = max(1, va.WORKER_QUEUE_SIZE)
+    progress = [WorkerProgress(worker_id=i) for i in range(pages)]
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in range(pages)]
+
+    results: List[Dict[str, Any]] = []
+    login_lock = asyncio.Lock()
+    async with async_playwright() as p:
+        if va.CDP_URL:
+            browser = await attach_browser(p)
+        else:
+            browser = await launch_browser(p)
+        feed, *_ = await asyncio.gather(
+            _feed(applicants, queues, progress, start_index),
+            *(
+                _page_worker(
+                    browser,
+                    progress[i],
+                    queues[i],
+                    results,
+                    login_lock,
+                    config,
+                    journal,
+                )
+                for i in range(pages)
+            ),
+            return_exceptions=True,
+        )
+        if not va.CDP_URL:
+            await browser.close()
+
+    for worker in progress:
+        print(worker.summary())
+    if isinstance(feed, Exception):
+        # Reading the spreadsheet failed part way – surface it after cleanup
+        raise feed
+    results.sort(key=lambda result: result["row"])
+    return results
+
+
+def run_batch(
+    applicants: Iterable[Dict[str, Any]],
+    config: Dict[str, Any],
+    pages: Optional[int] = None,
+    start_index: int = 0,
+    journal: Optional[Journal] = None,
+) -> List[Dict[str, Any]]:
+    """Blocking entry point used by ``visa_autofill.main`` when ENGINE="async"."""
+    return asyncio.run(run_pages(applicants, config, pages, start_index, journal))
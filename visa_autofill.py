@@ -1,8 +1,13 @@
+import csv
 import logging
 import sys
-from datetime import datetime, timedelta
+import time
+import weakref
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
 
 import pandas as pd
 from playwright.sync_api import (
@@ -15,40 +20,18 @@ from playwright.sync_api import (
     Error as PlaywrightError,
 )
 
-city_list = [
-    "ShangHai,Shanghai",
-    "GuangDong,Guangzhou",
-    "GuangDong,Shenzhen",
-    "FuJian,Xiamen",
-]
-
-arrival_flight_no = [
-    "VN3542",
-    "VN0502",
-    "VN3544",
-    "VN3550",
-]
-
-departure_flight_no = [
-    "VN3543",
-    "VN0503",
-    "VN3545",
-    "VN3531",
-]
-
-address_to_stay = [
-    "Heng Sheng WanLi Square, No. 3, Shanghai Int'l Tourism Resort and Disney Land",
-    "Room 2120, Floor 21 Zheng Jia Huan Shi Centre Building, No.372 Huanshi East Road, Yuexiu District, Guangzhou,China, 510000",
-    "Golden Bull Plaza Tianxia International Center, Nanshan Science and Technology Park, Shenzhen",
-    "Room 2120, Floor 21 Zheng Jia Huan Shi Centre Building, No.372 Huanshi East Road, Yuexiu District, Guangzhou,China, 510000",
-]
-
-declare_person = {
-    "name": "TRUONG GIANG TRAVEL",
-    "relationship": "AGENT",
-    "phone": "0901269595",
-    "address": "134 9K,  TAM DONG 23 ST, THOI TAM THON VILLAGE, HOC MON DISTRICT, HO CHI MINH CITY",
-}
+import visa_steps as steps
+import visa_trace
+import visa_assets
+from visa_images import check_images, image_index, prepare_images, upload_path
+from visa_dates import normalize_dates
+from visa_itinerary import ItineraryError, itinerary, load_itinerary, use_itinerary
+from visa_journal import Journal, JournalGroup, skip_succeeded
+from visa_network import BLOCK_TYPES, TRACKER_HOSTS, RequestFilter, page_filter, register
+from visa_probe import PLAYWRIGHT, SYSTEM, cached_browser, forget_browser, remember_browser
+from visa_session import discard, load_state, save_state, session_path
+from visa_validation import report_invalid, skip_invalid, validate
+from visa_steps import Action
 
 # Configuration constants (defaults - will be overridden by config from GUI)
 PLUS_DAY_TO_DATE = 4
@@ -61,6 +44,71 @@ HEADLESS = False
 USE_EXISTING_BROWSER = True
 QUICK_FORM_URL = "https://consular.mfa.gov.cn/VISA/?visadata=eyJndWlkIjoiMTcwOTcxMjk0MDU0OTAiLCJleHBpcmVzX2luIjoiIiwidG1wX3NlY3JldCI6InZjZW50ZXJfMTcwOTcxMjk0MDU0OTBfOWEwZGE2MjZkODVmYWE5NzBjYTMzYzJlZjc"
 FORM_URL = "https://consular.mfa.gov.cn/VISA/node"
+# Batch mode: number of parallel browser workers and per-worker queue depth
+WORKERS = 1
+WORKER_QUEUE_SIZE = 2
+# "sync" (threaded, one driver per worker) or "async" (one event loop, WORKERS pages)
+ENGINE = "sync"
+# Fill the plain text fields of a step with one in-page evaluation
+BATCH_TEXT_FILLS = False
+# Upper bound for the next step to show after "Next" (ms); unattended runs fail
+# the applicant when it does not, attended runs hand over to the operator
+STEP_TRANSITION_TIMEOUT = 10_000
+# Upper bound for a clicked radio to show as checked (ms)
+RADIO_CHECK_TIMEOUT = 2_000
+# Steps 7/8: click all "No" radios in one evaluation (falls back to one by one)
+BULK_NO_RADIOS = True
+# Directory for per-applicant JSON/CSV timing traces ("" disables export)
+TRACE_DIR = ""
+# Append-only status journal (relative paths sit next to DATA_FILE)
+JOURNAL_FILE = "submission_status.csv"
+# Skip passports the journal already records as SUCCESS
+RESUME = False
+# Optional SQLite applicant store ("" = read the spreadsheet directly) and the
+# filter applied to its pending rows, e.g. {"visa_type": "L"}
+STORE_FILE = ""
+STORE_FILTER: Dict[str, Any] = {}
+# Rotate/resize/re-encode passport images before the run (needs Pillow); the
+# prepared copies are cached in IMAGE_CACHE_DIR ("" = ~/.cache/visa_autofill/images)
+PREPROCESS_IMAGES = False
+IMAGE_MAX_SIDE = 2000
+IMAGE_MAX_KB = 1024
+IMAGE_CACHE_DIR = ""
+# Validate every applicant before the browser starts and skip rejected rows;
+# the per-row problems go to VALIDATION_REPORT (relative paths sit next to DATA_FILE)
+VALIDATE_APPLICANTS = True
+VALIDATION_REPORT = "validation_errors.csv"
+# Flights and addresses per travel city, JSON or CSV (relative paths sit next to
+# DATA_FILE); the built-in table is used when the file does not exist
+ITINERARY_FILE = "itinerary.json"
+# Login mode (USE_EXISTING_BROWSER=False): save the session after logging in and
+# start later runs and every worker from it.  SESSION_FILE "" = a per-account
+# file in ~/.cache/visa_autofill; older sessions are not reused.
+REUSE_SESSION = True
+SESSION_FILE = ""
+SESSION_MAX_AGE_HOURS = 12
+# How long the form's start button may take to show with a restored session (ms)
+SESSION_CHECK_TIMEOUT = 15_000
+# Attach to the operator's own Chrome instead of launching one: its DevTools
+# endpoint, e.g. "http://localhost:9222" for Chrome started with
+# --remote-debugging-port=9222.  Its profile (already logged in) and an open tab
+# on the form are reused; the operator's Chrome is never closed.
+CDP_URL = ""
+# Abort requests the form pages do not need (visa_network): these resource
+# types, the deny-listed hosts and, with BLOCK_THIRD_PARTY, hosts outside the
+# portal's own sites (allow-list any CDN the form loads scripts from).  Hosts
+# in BLOCK_ALLOW_HOSTS are never blocked.
+BLOCK_REQUESTS = False
+BLOCK_RESOURCE_TYPES = BLOCK_TYPES
+BLOCK_THIRD_PARTY = False
+BLOCK_ALLOW_HOSTS: List[str] = []
+BLOCK_DENY_HOSTS = list(TRACKER_HOSTS)
+# Serve the form app's scripts, stylesheets, fonts and images from a disk cache
+# shared by applicants and runs (visa_assets), capped at ASSET_CACHE_MB;
+# ASSET_CACHE_DIR "" = ~/.cache/visa_autofill/assets
+CACHE_ASSETS = False
+ASSET_CACHE_DIR = ""
+ASSET_CACHE_MB = 200
 
 
 # ---------------------------------------------------------------------------
@@ -90,8 +138,69 @@ def load_applicants(path: Path) -> pd.DataFrame:
     return df
 
 
+def iter_applicants(path: Path, start_index: int = 0) -> Iterator[Dict[str, Any]]:
+    """Stream normalised applicant rows, starting at data row *start_index*.
+
+    Unlike :func:`load_applicants` nothing is materialised up front: CSV files
+    are read with the ``csv`` module and ``.xlsx`` with read-only openpyxl, one
+    row at a time.  Values are strings (as with ``read_excel(dtype=str)``),
+    blank cells become ``None``, blank rows and unnamed columns are dropped.
+    As with the DataFrame, *start_index* counts the remaining rows only, so
+    blank rows do not shift it.  ``.xls`` files still go through pandas.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Data file not found: {path}")
+
+    suffix = path.suffix.lower()
+    if suffix == ".xls":
+        return iter(load_applicants(path).to_dict(orient="records")[start_index:])
+    rows = _xlsx_rows(path) if suffix == ".xlsx" else _csv_rows(path)
+    return islice(_normalised_rows(rows), start_index, None)
+
+
+def _xlsx_rows(path: Path):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _csv_rows(path: Path):
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        yield from csv.reader(fh)
+
+
+def _cell_text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # 72204007965.0 → "72204007965", like pandas
+    text = str(value)
+    return text if text.strip() else None
+
+
+def _normalised_rows(rows) -> Iterator[Dict[str, Any]]:
+    header = next(rows, ())
+    columns = [(i, str(name)) for i, name in enumerate(header) if _cell_text(name)]
+    for row in rows:
+        applicant = {
+            name: _cell_text(row[i]) if i < len(row) else None for i, name in columns
+        }
+        if any(value is not None for value in applicant.values()):
+            yield applicant
+
+
 def ensure_browsers_available():
-    """Ensure Playwright browsers are available, installing if necessary."""
+    """Ensure Playwright browsers are available, installing if necessary.
+
+    A browser found on an earlier start is reused after a ``stat`` of its
+    executable (see ``visa_probe``).  Call it before starting the driver that
+    launches the browser: it sets (or clears) ``PLAYWRIGHT_BROWSERS_PATH``,
+    which the driver only reads when it starts.
+    """
     import os
     import subprocess
     import platform
@@ -222,21 +331,30 @@ def ensure_browsers_available():
         os.environ["PLAYWRIGHT_BROWSERS_PATH"] = str(browser_cache)
         logging.info("PyInstaller bundle: Set PLAYWRIGHT_BROWSERS_PATH to: %s", browser_cache)
     
+    # Same browser as last time? Then nothing needs to be started.
+    probe = cached_browser()
+    if probe:
+        if probe["kind"] == SYSTEM:
+            os.environ["PLAYWRIGHT_CHROMIUM_EXECUTABLE_PATH"] = probe["path"]
+        logging.info("Using cached browser probe: %s", probe["path"])
+        return
+
     # First, try to use Playwright's standard browser detection
     try:
         from playwright.sync_api import sync_playwright
         with sync_playwright() as p:
             browser_path = p.chromium.executable_path
-            if os.path.exists(browser_path):
-                logging.info("Playwright Chromium browser found at: %s", browser_path)
-                return
-            else:
-                logging.warning("Playwright reports browser at %s but file doesn't exist", browser_path)
-                # Clear the invalid path from environment to force re-detection
-                if "PLAYWRIGHT_BROWSERS_PATH" in os.environ:
-                    del os.environ["PLAYWRIGHT_BROWSERS_PATH"]
-                if "PLAYWRIGHT_CHROMIUM_EXECUTABLE_PATH" in os.environ:
-                    del os.environ["PLAYWRIGHT_CHROMIUM_EXECUTABLE_PATH"]
+        if os.path.exists(browser_path):
+            logging.info("Playwright Chromium browser found at: %s", browser_path)
+            remember_browser(browser_path, PLAYWRIGHT)
+            return
+        else:
+            logging.warning("Playwright reports browser at %s but file doesn't exist", browser_path)
+            # Clear the invalid path from environment to force re-detection
+            if "PLAYWRIGHT_BROWSERS_PATH" in os.environ:
+                del os.environ["PLAYWRIGHT_BROWSERS_PATH"]
+            if "PLAYWRIGHT_CHROMIUM_EXECUTABLE_PATH" in os.environ:
+                del os.environ["PLAYWRIGHT_CHROMIUM_EXECUTABLE_PATH"]
     except Exception as e:
         logging.warning("Playwright browser not found: %s", e)
     
@@ -254,7 +372,9 @@ def ensure_browsers_available():
                     os.environ["PLAYWRIGHT_CHROMIUM_EXECUTABLE_PATH"] = browser_path
                     # Test launch
                     browser = p.chromium.launch(headless=True)
+                    version = browser.version
                     browser.close()
+                    remember_browser(browser_path, SYSTEM, version)
                     logging.info(f"Successfully using system browser: {browser_path}")
                     print(f"✅ Using system browser: {browser_path}")
                     return
@@ -360,783 +480,83 @@ def ensure_browsers_available():
 # ---------------------- Form Step Helpers ------------------------------- #
 
 
-def step_personal_info(page: Page, applicant: Dict[str, Any]):
-    """Step 1 – personal information."""
-
-    data = {
-        "full_name": applicant.get("full_name", ""),
-        "birth_date": applicant.get("birth_date", ""),
-        "country": applicant.get("country", ""),
-        "province": applicant.get("province", ""),
-        "city": applicant.get("province", ""),
-        "marital_status": applicant.get("marital_status", ""),
-        "id_number": str(applicant.get("id_number", "")),
-        "passport_type": "Ordinary",
-        "passport_number": str(applicant.get("passport_number", "")),
-        "place_of_issue": applicant.get("place_of_issue", ""),
-    }
-
-    # 1.4A Country/region
-    country = data["country"]
-    country_element = page.locator("label:has-text('1.4A Country/region')").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    pick_option(country_element, "input.el-input__inner", country, page)
-
-    # # 1.4B Province/state
-    province = data["province"]
-    province_element = page.locator("label:has-text('1.4B Province/state')").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    fill_text(province_element, "input.el-input__inner", province)
+def step_options() -> Dict[str, Any]:
+    """Runtime constants the shared step plans depend on."""
+    return {"PLUS_DAY_TO_DATE": PLUS_DAY_TO_DATE}
 
-    # # 1.4C City
-    city = data["city"]
-    city_element = page.locator("label:has-text('1.4C City')").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    fill_text(city_element, "input.el-input__inner", city)
-
-    # 1.4D Marital status
-    marital_status = data["marital_status"]
-    marital_status_element = page.locator(
-        "label:has-text('1.5A Marital status')"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-
-    click_radio_button(marital_status_element, marital_status)
-
-    # 1.6B ID number in the country of nationality
-    id_number = data["id_number"]
-    id_number_element = page.locator(
-        "label:has-text('1.6B ID number in the country of nationality')"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    fill_text(id_number_element, "input.el-input__inner", id_number)
-
-    # 1.6C Do you have any other nationality?
-    other_nationality_element = page.locator(
-        "label:has-text('1.6C Do you have any other nationality?')"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    click_radio_button(other_nationality_element, "No")
-
-    # 1.6F Do you have permanent resident status in any other country or region?
-    permanent_resident_element = page.locator(
-        "label:has-text('1.6F Do you have permanent resident status in any other country or region?')"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    click_radio_button(permanent_resident_element, "No")
-
-    # Have you ever had any other nationalities or resident status?
-    other_nationality_element = page.locator(
-        "label:has-text('Have you ever had any other nationalities or resident status?')"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    click_radio_button(other_nationality_element, "No")
-
-    # 1.7A Type of passport/travel document
-    passport_type = data["passport_type"]
-    passport_type_element = page.locator(
-        "label:has-text('1.7A Type of passport/travel document')"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    click_radio_button(passport_type_element, passport_type)
-
-    # 1.7D Place of issue
-    place_of_issue = data["place_of_issue"]
-    place_of_issue_element = page.locator(
-        "label:has-text('1.7D Place of issue')"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    fill_text(place_of_issue_element, "input.el-input__inner", place_of_issue)
-
-
-def step_type_of_visa(page: Page, applicant: Dict[str, Any]):
-    """Step 2 – type of visa."""
-    data = {
-        "visa_type": f"({applicant.get('visa_type', '')})",
-        "entries": applicant.get("entries", ""),
-    }
 
-    # 2.1 The type of visa that you are applying for and the main purpose of your visit to China
-    type_of_visa = data["visa_type"]
-    type_of_visa_element = page.locator(
-        "div.el-card:has(span.title:has-text('2.1 The type of visa that you are applying for and the main purpose of your visit to China'))"
-    )
-    pick_option(type_of_visa_element, "input.el-input__inner", type_of_visa, page)
+def run_step(page: Page, step: steps.StepDef, applicant: Dict[str, Any]):
+    """Fill one schema step for *applicant*."""
+    run_actions(page, steps.plan(step, applicant, step_options()))
 
-    # 2.2 Service type
-    service_type_element = page.locator(
-        "div.el-card:has(span.title:has-text('2.2 Service type'))"
-    )
-    click_radio_button(service_type_element, "Normal")
-
-    # 2.3A Visa validity of your application (months)
-    visa_validity_element = page.locator(
-        "label:has-text('2.3A Visa validity of your application (months)')"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    fill_text(visa_validity_element, "input.el-input__inner", "3")
-
-    # 2.3B Maximum duration of stay of your application (days)
-    max_duration_element = page.locator(
-        "label:has-text('2.3B Maximum duration of stay of your application (days)')"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    fill_text(max_duration_element, "input.el-input__inner", "30")
-
-    # 2.3C Entries of your application
-    entries = data["entries"]
-    entries_element = page.locator(
-        "label:has-text('2.3C Entries of your application')"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    click_radio_button(entries_element, entries)
-
-
-def step_work_info(page: Page, applicant: Dict[str, Any]):
-    """Step 3 – work information."""
-    data = {
-        "occupation": applicant.get("occupation", ""),
-    }
-
-    # 3.1 Current occupation
-
-    occupation = data["occupation"]
-    occupation_element = page.locator(
-        "div.el-card:has(span.title:has-text('3.1 Current occupation'))"
-    )
-    pick_option(occupation_element, "input.el-input__inner", occupation, page)
-
-    # 3.2 Work experience in the past five years – "Not applicable" checkbox
-    work_exp_card = page.locator(
-        "div.el-card:has(span.title:has-text('3.2 Work experience in the past five years'))"
-    )
 
-    # Element‑Plus renders the real <input type="checkbox"> inside the <label>.
-    # Playwright's native checkbox helpers (`is_checked`, `check`) are the most
-    # robust way to toggle it.  We still guard against it already being ticked.
-    # First try to find the checked checkbox
-    applicable_checkbox(work_exp_card, "Not applicable")
-    # Fill in the "Please specify." textarea after clicking "Not applicable"
-    try:
-        remark_input = (
-            page.locator("label:has-text('Please specify.')")
-            .locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-            .locator("textarea.el-textarea__inner")
+def field_index(page: Page) -> steps.FieldIndex:
+    """Form-item index of the current step, built with one evaluation."""
+    index = steps.cached_index(page)
+    if index is None:
+        index = steps.store_index(
+            page, safe("index form fields", page.evaluate, steps.INDEX_FIELDS_JS)
         )
-        remark_input.wait_for(state="visible", timeout=5000)
-
-        if occupation.lower() == "student":
-            remark_input.fill("Student")
-        else:
-            remark_input.fill("Bussiness Owner")
-
-    except PlaywrightTimeoutError:
-        print(
-            "Warning: Could not find 'Please specify' textarea for work experience, skipping..."
-        )
-
-
-def step_education_info(page: Page, applicant: Dict[str, Any]):
-    """Step 4 – education information."""
-    education = page.locator(
-        "div.el-card:has(span.title:has-text('4.1 Highest diploma/degree'))"
-    )
-    applicable_checkbox(education, "Not applicable")
-
-
-    # Fill in the "Please specify." textarea after clicking "Not applicable"
-    remark_input = (
-        page.locator("label:has-text('Please specify.')")
-        .locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        .locator("textarea.el-textarea__inner")
-    )
-    try:
-        remark_input.wait_for(state="visible", timeout=5000)
-        remark_input.fill("Not mentioned")
-    except PlaywrightTimeoutError:
-        print(
-            "Warning: Could not find 'Please specify' textarea for education, skipping..."
-        )
-
-
-def step_family_info(page: Page, applicant: Dict[str, Any]):
-    """Step 5 – family information."""
-    data = {
-        "home_address": applicant.get("home_address", ""),
-        "phone_number": str(applicant.get("phone_number", "")),
-        "father_fullname": applicant.get("father_fullname", ""),
-        "father_nationality": applicant.get("father_nationality", ""),
-        "father_dob": applicant.get("father_dob", ""),
-        "mother_fullname": applicant.get("mother_fullname", ""),
-        "mother_nationality": applicant.get("mother_nationality", ""),
-        "mother_dob": applicant.get("mother_dob", ""),
-        "children_fullname": applicant.get("children_fullname", ""),
-        "children_nationality": applicant.get("children_nationality", ""),
-        "children_dob": applicant.get("children_dob", ""),
-        "spouse_fullname": applicant.get("spouse_fullname", ""),
-        "spouse_nationality": applicant.get("spouse_nationality", ""),
-        "spouse_dob": applicant.get("spouse_dob", ""),
-        "spouse_city": applicant.get("spouse_city", ""),
-    }
-
-    # 5.1 Current home address
-    address = data["home_address"]
-    address_element = page.locator(
-        "label:has-text('5.1 Current home address')"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    fill_text(address_element, "input.el-input__inner", address)
-
-    # 5.2 Phone number
-    phone_number = data["phone_number"]
-    phone_number_element = page.locator("label:has-text('5.2 Phone number')").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    fill_text(phone_number_element, "input.el-input__inner", phone_number)
-
-    # 5.3 Mobile phone number
-    mobile_phone_number_element = page.locator(
-        "label:has-text('5.3 Mobile phone number')"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    fill_text(mobile_phone_number_element, "input.el-input__inner", phone_number)
-
-    # 5.5A Spouse
-    if data["spouse_fullname"]:
-        spouse_family_name, spouse_given_name = (
-            get_family_name_given_name_from_full_name(data["spouse_fullname"])
-        )
-        spouse_year, spouse_month, spouse_day = get_year_month_day_from_date(
-            data["spouse_dob"]
-        )
-        # narrow the scope to the Spouse card first, then search inside it
-        spouse_card = page.locator(
-            "div.el-card:has(div.el-row:has-text('5.5A Spouse'))"
-        ).first
-
-        spouse_family_item = spouse_card.locator(
-            "label[for='spouses.0.familyName']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        spouse_given_item = spouse_card.locator(
-            "label[for='spouses.0.firstName']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-
-        # fill spouse's name
-        fill_text(
-            spouse_family_item,
-            "input.el-input__inner:not([readonly]):not([disabled])",
-            spouse_family_name,
-        )
-        fill_text(
-            spouse_given_item,
-            "input.el-input__inner:not([readonly]):not([disabled])",
-            spouse_given_name,
-        )
-
-        spouse_nationality_item = spouse_card.locator(
-            "label[for='spouses.0.nationalityCountry']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        pick_option(
-            spouse_nationality_item,
-            "input.el-input__inner",
-            data["spouse_nationality"],
-            page,
-        )
-
-        # fill spouse's date of birth
-        spouse_dob_item = spouse_card.locator(
-            "label[for='spouses.0.birthday']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        pick_date(spouse_dob_item, spouse_year, spouse_month, spouse_day, page)
-
-        # country of birth
-        spouse_country_of_birth_item = spouse_card.locator(
-            "label[for='spouses.0.birthCountry']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        pick_option(
-            spouse_country_of_birth_item,
-            "input.el-input__inner",
-            data["spouse_nationality"],
-            page,
-        )
-
-        # city of birth
-        spouse_city_of_birth_item = safe_locator(spouse_card, "label[for='spouses.0.birthCity']")
-        if spouse_city_of_birth_item:
-            spouse_city_of_birth_item.locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-            fill_text(
-                spouse_city_of_birth_item, "input.el-input__inner", data["spouse_city"]
-            )
-
-        # spouse adress
-        spouse_address = spouse_card.locator("label[for='spouses.0.address']").locator(
-            "xpath=ancestor::div[contains(@class,'el-form-item')]"
-        )
-        fill_text(spouse_address, "textarea.el-textarea__inner", data["home_address"])
-
-    # 5.5B Father
-    if data["father_fullname"]:
-        father_family_name, father_given_name = (
-            get_family_name_given_name_from_full_name(data["father_fullname"])
-        )
-        father_year, father_month, father_day = get_year_month_day_from_date(
-            data["father_dob"]
-        )
-        # narrow the scope to the Father card first, then search inside it
-        father_card = page.locator(
-            "div.el-card:has(span.title:has-text('5.5B Father'))"
-        ).first
-
-        father_family_item = father_card.locator(
-            "label[for='father.0.familyName']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        father_given_item = father_card.locator(
-            "label[for='father.0.firstName']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-
-        # fill father's name
-        fill_text(
-            father_family_item,
-            "input.el-input__inner:not([readonly]):not([disabled])",
-            father_family_name,
-        )
-        fill_text(
-            father_given_item,
-            "input.el-input__inner:not([readonly]):not([disabled])",
-            father_given_name,
-        )
-
-        father_nationality_item = father_card.locator(
-            "label[for='father.0.nationalityCountry']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        # fill father's nationality
-        pick_option(
-            father_nationality_item,
-            "input.el-input__inner",
-            data["father_nationality"],
-            page,
-        )
-
-        # fill father's date of birth
-        # ----- robust date picker -----
-        father_dob_item = father_card.locator("label[for='father.0.birthday']").locator(
-            "xpath=ancestor::div[contains(@class,'el-form-item')]"
-        )
-        pick_date(father_dob_item, father_year, father_month, father_day, page)
-
-        # father in china
-        father_in_china_item = father_card.locator(
-            "label[for='father.0.inChinaFlag']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        click_radio_button(father_in_china_item, "No")
-    else:
-        father_header = page.locator(
-            "div.choice-botton-header.el-row:has(span.title:has-text('5.5B Father'))"
-        )
-        applicable_checkbox(father_header, "Not applicable")
-
-        # Fill in the "Please specify." textarea after clicking "Not applicable"
-        remark_input = (
-            page.locator("label[for='notApplyItems.father.remark']")
-            .locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-            .locator("textarea.el-textarea__inner")
-        )
-        remark_input.fill("DESEASED")
-        print("No father information provided")
-
-    # 5.5C Mother
-    if data["mother_fullname"]:
-        mother_family_name, mother_given_name = (
-            get_family_name_given_name_from_full_name(data["mother_fullname"])
-        )
-        mother_year, mother_month, mother_day = get_year_month_day_from_date(
-            data["mother_dob"]
-        )
-        # narrow the scope to the Mother card first, then search inside it
-        mother_card = page.locator(
-            "div.el-card:has(span.title:has-text('5.5C Mother'))"
-        ).first
-
-        mother_family_item = mother_card.locator(
-            "label[for='mother.0.familyName']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-
-        mother_given_item = mother_card.locator(
-            "label[for='mother.0.firstName']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-
-        # fill mother's name
-        fill_text(
-            mother_family_item,
-            "input.el-input__inner:not([readonly]):not([disabled])",
-            mother_family_name,
-        )
-        fill_text(
-            mother_given_item,
-            "input.el-input__inner:not([readonly]):not([disabled])",
-            mother_given_name,
-        )
-
-        mother_nationality_item = mother_card.locator(
-            "label[for='mother.0.nationalityCountry']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        # fill mother's nationality
-        pick_option(
-            mother_nationality_item,
-            "input.el-input__inner",
-            data["mother_nationality"],
-            page,
-        )
-
-        # fill mother's date of birth
-        mother_dob_item = mother_card.locator("label[for='mother.0.birthday']").locator(
-            "xpath=ancestor::div[contains(@class,'el-form-item')]"
-        )
-        pick_date(mother_dob_item, mother_year, mother_month, mother_day, page)
-
-        # mother in china
-        mother_in_china_item = mother_card.locator(
-            "label[for='mother.0.inChinaFlag']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        click_radio_button(mother_in_china_item, "No")
-    else:
-        mother_header = page.locator(
-            "div.choice-botton-header.el-row:has(span.title:has-text('5.5C Mother'))"
-        )
-        applicable_checkbox(mother_header, "Not applicable")
-        # Fill in the "Please specify." textarea after clicking "Not applicable"
-        remark_input = (
-            page.locator("label[for='notApplyItems.mother.remark']")
-            .locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-            .locator("textarea.el-textarea__inner")
-        )
-        remark_input.fill("DESEASED")
-        print("No mother information provided")
-
-    # 5.5D Children
-    if data["children_fullname"]:
-        children_family_name, children_given_name = (
-            get_family_name_given_name_from_full_name(data["children_fullname"])
-        )
-        children_year, children_month, children_day = get_year_month_day_from_date(
-            data["children_dob"]
-        )
-        # narrow the scope to the Children card first, then search inside it
-        children_card = page.locator(
-            "div.el-card:has(span.title:has-text('5.5D Children'))"
-        ).first
-
-        children_family_item = children_card.locator(
-            "label[for='children.0.familyName']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-
-        children_given_item = children_card.locator(
-            "label[for='children.0.firstName']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-
-        # fill children's name
-        fill_text(
-            children_family_item,
-            "input.el-input__inner:not([readonly]):not([disabled])",
-            children_family_name,
-        )
-        fill_text(
-            children_given_item,
-            "input.el-input__inner:not([readonly]):not([disabled])",
-            children_given_name,
-        )
-
-        children_nationality_item = children_card.locator(
-            "label[for='children.0.nationalityCountry']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        pick_option(
-            children_nationality_item,
-            "input.el-input__inner",
-            data["children_nationality"],
-            page,
-        )
-
-        # fill children's date of birth
-        children_dob_item = children_card.locator(
-            "label[for='children.0.birthday']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        pick_date(children_dob_item, children_year, children_month, children_day, page)
-
-        # children in china
-        children_in_china_item = children_card.locator(
-            "label[for='children.0.inChinaFlag']"
-        ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        click_radio_button(children_in_china_item, "No")
+    return index
+
+
+def fill_text_batch(page: Page, actions: List[Action], index: steps.FieldIndex) -> List[Action]:
+    """Fill every batchable text action at once; return the actions left to run."""
+    batch = [(action, index.batch_entry(action)) for action in actions]
+    entries = [entry for _, entry in batch if entry]
+    if not entries:
+        return actions
+    filled = safe("fill_text batch", page.evaluate, steps.FILL_BATCH_JS, entries) or []
+    done = iter(filled)
+    return [action for action, entry in batch if not entry or not next(done, False)]
+
+
+def run_actions(page: Page, actions: List[Action]):
+    """Execute a step plan from ``visa_steps`` against *page*."""
+    index = field_index(page)
+    if BATCH_TEXT_FILLS:
+        actions = fill_text_batch(page, actions, index)
+    for action in actions:
+        with visa_trace.span(visa_trace.FIELD, visa_trace.field_name(action)):
+            run_action(page, action, index)
+
+
+def locate_target(page: Page, target: steps.Target, index: Optional[steps.FieldIndex] = None):
+    """Locator for *target*; an index whose tagged node is gone is dropped."""
+    node = steps.locate(page, target, index)
+    if index is not None and index.selector_for(target) and node.count() == 0:
+        logging.info("Field index is stale – locating by label instead")
+        steps.invalidate_index(page)
+        node = steps.locate(page, target)
+    return node
+
+
+def run_action(page: Page, action: Action, index: Optional[steps.FieldIndex] = None):
+    container = locate_target(page, action.target, index) if action.target else page
+    kind = action.kind
+
+    if kind == "select":
+        pick_option(container, action.selector, action.value, page)
+    elif kind == "text":
+        fill_text(container, action.selector, action.value)
+    elif kind == "radio":
+        click_radio_button(container, action.value)
+    elif kind == "date":
+        pick_date(container, *action.value, page)
+    elif kind == "checkbox":
+        applicable_checkbox(container, action.value)
+    elif kind == "remark":
+        fill_remark(container, action.value, action.timeout, action.message)
+    elif kind == "click":
+        traced("click", container.click)
+    elif kind == "upload":
+        traced("upload", container.locator(action.selector).set_input_files, action.value)
+    elif kind == "no_radios":
+        click_all_no_radios(page)
+    elif kind == "note":
+        print(action.value)
     else:
-        children_header = page.locator(
-            "div.choice-botton-header.el-row:has(span.title:has-text('5.5D Children'))"
-        )
-        applicable_checkbox(children_header, "Not applicable")
-
-        print("No children information provided")
-
-    # 5.5E Do you have any immediate relatives in China?
-    immediate_relatives_in_china_item = page.locator(
-        "label[for='relativeRelativeFlag']"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    click_radio_button(immediate_relatives_in_china_item, "No")
-
-
-def step_information_on_your_travel(page: Page, applicant: Dict[str, Any]):
-    """Step 6 – information on your travel."""
-    data = {
-        "date_of_arrival": applicant.get("date_of_arrival", ""),
-        "travel_city": applicant.get("travel_city", ""),
-        "emergency_fullname": applicant.get("emergency_fullname", ""),
-        "emergency_phone": str(applicant.get("emergency_phone", "")),
-        "emergency_relationship": applicant.get("emergency_relationship", ""),
-    }
-    emergency_family_name, emergency_given_name = (
-        get_family_name_given_name_from_full_name(data["emergency_fullname"])
-    )
-    date_of_arrival_year, date_of_arrival_month, date_of_arrival_day = (
-        get_year_month_day_from_date(data["date_of_arrival"])
-    )
-
-    travel_info = all_travel_info_base_on_city(data["travel_city"])
-    departure_date = plus_day_to_date(data["date_of_arrival"], PLUS_DAY_TO_DATE)
-    departure_date_year, departure_date_month, departure_date_day = (
-        get_year_month_day_from_date(departure_date)
-    )
-
-    # 6.1A Date of arrival
-    date_of_arrival_item = page.locator("label[for='arrivalCityDate']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    pick_date(
-        date_of_arrival_item,
-        date_of_arrival_year,
-        date_of_arrival_month,
-        date_of_arrival_day,
-        page,
-    )
-
-    # 6.1B Arrival train/ship/flight No.
-    arrival_flight_no_item = page.locator("label[for='arrivalVehicleType']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-
-    fill_text(
-        arrival_flight_no_item,
-        "input.el-input__inner",
-        travel_info["arrival_flight_no"],
-    )
-
-    # 6.1C The city of your destination
-    destination_city_item = page.locator("label[for='arrivalCity']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-
-    pick_option(
-        destination_city_item, "input.el-input__inner", travel_info["travel_city"], page
-    )
-
-    # 6.1D City to stay
-    city_to_stay_item = page.locator("label[for='stayInfo.0.stayCity']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    pick_option(
-        city_to_stay_item, "input.el-input__inner", travel_info["travel_city"], page
-    )
-
-    # 6.1E Address to stay
-    address_to_stay_item = page.locator("label[for='stayInfo.0.travelAddr']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    fill_text(
-        address_to_stay_item, "input.el-input__inner", travel_info["address_to_stay"]
-    )
-
-    # 6.1F Date of arrival
-    date_of_arrival_item = page.locator("label[for='stayInfo.0.arrivalDate']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    pick_date(
-        date_of_arrival_item,
-        date_of_arrival_year,
-        date_of_arrival_month,
-        date_of_arrival_day,
-        page,
-    )
-
-    # 6.1G Date of departure
-    date_of_departure_item = page.locator("label[for='stayInfo.0.leaveDate']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    pick_date(
-        date_of_departure_item,
-        departure_date_year,
-        departure_date_month,
-        departure_date_day,
-        page,
-    )
-
-    # 6.1H Date of departure
-    date_of_departure_item_1 = page.locator("label[for='leaveDate']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    pick_date(
-        date_of_departure_item_1,
-        departure_date_year,
-        departure_date_month,
-        departure_date_day,
-        page,
-    )
-
-    # 6.1J Departure train/ship/flight No.
-    departure_flight_no_item = page.locator("label[for='leaveVehicleType']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    fill_text(
-        departure_flight_no_item,
-        "input.el-input__inner",
-        travel_info["departure_flight_no"],
-    )
-
-    # 6.1K City of departure
-    destination_city_item = page.locator("label[for='leaveCity']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    pick_option(
-        destination_city_item, "input.el-input__inner", travel_info["travel_city"], page
-    )
-
-    # 6.2 Inviting person/contact or organization in China
-    inviting_person_header = page.locator(
-        "div.choice-botton-header.el-row:has(span.title:has-text('6.2 Inviting person/contact or organization in China'))"
-    )
-    inviting_person_not_applicable = inviting_person_header.locator(
-        "label.el-checkbox"
-    ).first
-    inviting_person_not_applicable.click()
-
-    # Fill in the "Please specify." textarea after clicking "Not applicable"
-    remark_input = (
-        page.locator("label[for='notApplyItems.invitation.remark']")
-        .locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-        .locator("textarea.el-textarea__inner")
-    )
-    remark_input.fill("NONE")
-
-    # 6.3 Emergency contact
-
-    emergency_fullname_item = page.locator(
-        "label[for='emergencyContactFamilyName']"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    fill_text(emergency_fullname_item, "input.el-input__inner", emergency_family_name)
-
-    emergency_given_name_item = page.locator(
-        "label[for='emergencyContactFirstName']"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    fill_text(emergency_given_name_item, "input.el-input__inner", emergency_given_name)
-
-    emergency_phone_item = page.locator("label[for='emergencyPhoneNumber']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    fill_text(emergency_phone_item, "input.el-input__inner", data["emergency_phone"])
-
-    emergency_relationship_item = page.locator(
-        "label[for='emergencyRelation']"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    fill_text(
-        emergency_relationship_item,
-        "input.el-input__inner",
-        data["emergency_relationship"],
-    )
-
-    # 6.4AWho will pay for this travel?
-    who_will_pay_for_travel_item = page.locator("label[for='payForTravel']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    click_radio_button(who_will_pay_for_travel_item, "Self")
-
-    # 6.5A Are you traveling with someone who shares the same passport with you?
-    same_passport_item = page.locator("label[for='havePeersFlag']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    click_radio_button(same_passport_item, "No")
-
-
-def step_information_on_previous_travel(page: Page, applicant: Dict[str, Any]):
-    """Step 7 – information on previous travel."""
-    # find all radio button with label "No"
-    no_radio_buttons = page.locator("label.el-radio:has-text('No')")
-    for i in range(no_radio_buttons.count()):
-        no_radio_buttons.nth(i).click()
-        # wait for 1 second
-        page.wait_for_timeout(500)
-        
-
-
-def step_other_information(page: Page, applicant: Dict[str, Any]):
-    """Step 8 – other information."""
-    # find all radio button with label "No"
-    no_radio_buttons = page.locator("label.el-radio:has-text('No')")
-    for i in range(no_radio_buttons.count()):
-        no_radio_buttons.nth(i).click()
-        page.wait_for_timeout(500)
-
-
-def step_declaration(page: Page, applicant: Dict[str, Any]):
-    """Step 9 – declaration."""
-
-    # select The person who fills in the application on behalf of the applicant radio button
-
-    person_who_fills_in_the_application_on_behalf_of_the_applicant_item = page.locator(
-        "label.el-radio:has-text('The person who fills in the application on behalf of the applicant')"
-    )
-    person_who_fills_in_the_application_on_behalf_of_the_applicant_item.click()
-
-    # select The person who fills in the application on behalf of the applicant radio button
-
-    # fill in the declaration person information
-    # 9.2A Name
-    declaration_person_name_item = page.locator("label[for='agentName']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    fill_text(
-        declaration_person_name_item, "input.el-input__inner", declare_person["name"]
-    )
-
-    # 9.2B Relationship with the applicant
-    declaration_person_relationship_item = page.locator(
-        "label[for='relationship']"
-    ).locator("xpath=ancestor::div[contains(@class,'el-form-item')]")
-    fill_text(
-        declaration_person_relationship_item,
-        "input.el-input__inner",
-        declare_person["relationship"],
-    )
-    # 9.2C Address
-    declaration_person_address_item = page.locator("label[for='agentAddr']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    fill_text(
-        declaration_person_address_item,
-        "input.el-input__inner",
-        declare_person["address"],
-    )
-
-    # 9.2D Telephone
-    declaration_person_phone_item = page.locator("label[for='agentTel']").locator(
-        "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    )
-    fill_text(
-        declaration_person_phone_item, "input.el-input__inner", declare_person["phone"]
-    )
-
-    # click on the radio button "I understand and agree with the above."
-    i_understand_and_agree_with_the_above_item = page.locator(
-        "label.el-radio:has-text('I understand and agree with the above.')"
-    )
-    i_understand_and_agree_with_the_above_item.click()
-
-
-
-
-
-def step_upload_materials(page: Page, applicant: Dict[str, Any]):
-    """Step 10 – upload materials."""
-
-    page.locator("div.uploadFile:has-text('The page with photo')").locator(
-        "input[type='file']"
-    ).set_input_files("example_visa.jpg")
+        raise ValueError(f"Unknown action kind: {kind}")
 
 
 def fill_form(page: Page, applicant: Dict[str, Any], config: Dict[str, Any]):
@@ -1154,265 +574,118 @@ def fill_form(page: Page, applicant: Dict[str, Any], config: Dict[str, Any]):
         applicant: Dictionary containing applicant data
     """
 
-    # ============================================================================
-    # STEP 1: Personal Information & File Upload
-    # ============================================================================
-    # Ask user if they want to upload file
-
-    input("Start filling form, Please upload avatar material manually...")
-    
-    if AUTO_NEXT:
-        upload_choice = "Y"
-    else:
-        upload_choice = show_prompt("Do you want to upload passport file? (Y/N): ", yes_no=True)
-        print(upload_choice)
-
-    if upload_choice == "Y":
-        # find image file in image folder with name {passport_number}.jpeg
-        image_folder = config.get("IMAGE_FOLDER")
-        if image_folder:
-            image_folder = Path(image_folder)
-            image_file = find_image_file(image_folder, applicant['passport_number'])
-            if image_file:
-                upload_file(page, str(image_file), "passport") 
-            else:
-                print(f"Image file {image_file} not found")
-
-    # Ask user if they want to fill personal info
-    if AUTO_NEXT:
-        personal_info_choice = "Y"
-    else:
-        personal_info_choice = (
-            show_prompt("Do you want to fill personal information? (Y/N): ", yes_no=True)
-        )
-    
-    if personal_info_choice == "Y":
-        step_personal_info(page, applicant)
-
-    # User checkpoint: Verify Step 1 completion
-    if not AUTO_NEXT:
-        show_prompt("✓ Step 1 Complete - Please verify personal information and press Enter to continue...")
-
-    # Navigate to next step
-    click_button(page, "Next")
-
-    # ============================================================================
-    # STEP 2: Type of Visa Selection
-    # ============================================================================
-    # Wait for next page to load completely
-    page.wait_for_selector("button:has-text('Next')", timeout=10_000)
-
-    # Ask user if they want to fill visa type
-    if AUTO_NEXT:
-        visa_type_choice = "Y"
-    else:
-        visa_type_choice = (
-            show_prompt("Do you want to fill visa type? (Y/N): ", yes_no=True)
-        )
-    if visa_type_choice == "Y":
-        step_type_of_visa(page, applicant)
-
-    # User checkpoint: Verify Step 2 completion
-    if not AUTO_NEXT:
-        show_prompt("✓ Step 2 Complete - Please verify visa type selection and press Enter to continue...")
-
-    # Navigate to next step
-    click_button(page, "Next")
-
-    # ============================================================================
-    # STEP 3: Work Information
-    # ============================================================================
-    # Ask user if they want to fill work info
-    if AUTO_NEXT:
-        work_info_choice = "Y"
-    else:
-        work_info_choice = (
-            show_prompt("Do you want to fill work information? (Y/N): ", yes_no=True)
-        )
-    if work_info_choice == "Y":
-        step_work_info(page, applicant)
-
-    # User checkpoint: Verify Step 3 completion
-    if not AUTO_NEXT:
-        show_prompt("✓ Step 3 Complete - Please verify work information and press Enter to continue...")
-
-    # Navigate to next step
-    click_button(page, "Next")
-
-    # ============================================================================
-    # STEP 4: Education Information
-    # ============================================================================
-    # Ask user if they want to fill education info
-    if AUTO_NEXT:
-        education_info_choice = "Y"
-    else:
-        education_info_choice = (
-            show_prompt("Do you want to fill education information? (Y/N): ", yes_no=True)
-        )
-    if education_info_choice == "Y":
-        step_education_info(page, applicant)
-
-    # User checkpoint: Verify Step 4 completion
-    if not AUTO_NEXT:
-        show_prompt("✓ Step 4 Complete - Please verify education information and press Enter to continue...")
-    # Navigate to next step
-    click_button(page, "Next")
-
-    # Wait for next page to load completely
-    page.wait_for_selector("button:has-text('Next')", timeout=10_000)
-
-    # User checkpoint: Verify Step 4 completion
-
-    # ============================================================================
-    # STEP 5: Family Information
-    # ============================================================================
-    # Ask user if they want to fill family info
-    if AUTO_NEXT:
-        family_info_choice = "Y"
-    else:
-        family_info_choice = (
-            show_prompt("Do you want to fill family information? (Y/N): ", yes_no=True)
-        )
-    if family_info_choice == "Y":
-        step_family_info(page, applicant)
-
-    # User checkpoint: Verify Step 5 completion
-    if not AUTO_NEXT:
-        show_prompt("✓ Step 5 Complete - Please verify family information and press Enter to continue...")
-
-    # Navigate to next step
-    click_button(page, "Next")
-
-    # Wait for next page to load completely
-    page.wait_for_selector("button:has-text('Next')", timeout=10_000)
-
-    # ============================================================================
-    # STEP 6: Information on your travel
-    # ============================================================================
-    # Ask user if they want to fill travel info
-    if AUTO_NEXT:
-        travel_info_choice = "Y"
-    else:
-        travel_info_choice = (
-            show_prompt("Do you want to fill travel information? (Y/N): ", yes_no=True)
-        )
-    if travel_info_choice == "Y":
-        step_information_on_your_travel(page, applicant)
-
-    # User checkpoint: Verify Step 6 completion
-    if not AUTO_NEXT:
-        show_prompt("✓ Step 6 Complete - Please verify travel information and press Enter to continue...")
-
-    # Navigate to next step
-    click_button(page, "Next")
+    with visa_trace.tracing(applicant.get("passport_number"), TRACE_DIR) as trace:
+        # ========================================================================
+        # Passport upload – the portal pre-fills step 1 from it
+        # ========================================================================
+        # Ask user if they want to upload file
+        track_requests(page)
 
-    page.wait_for_selector("button:has-text('Next')", timeout=10_000)
-    # Wait for next page to load completely
+        if not AUTO_NEXT:
+            input("Start filling form, Please upload avatar material manually...")
 
-    # ============================================================================
-    # STEP 7: Information on previous travel
-    # ============================================================================
-    # Ask user if they want to fill previous travel info
-    if AUTO_NEXT:
-        previous_travel_info_choice = "Y"
-    else:
-        previous_travel_info_choice = (
-            show_prompt("Do you want to fill previous travel information? (Y/N): ", yes_no=True)
-        )
-    if previous_travel_info_choice == "Y":
-        step_information_on_previous_travel(page, applicant)
-
-    # User checkpoint: Verify Step 7 completion
-    if not AUTO_NEXT:
-        show_prompt("✓ Step 7 Complete - Please verify previous travel information and press Enter to continue...")
-
-    # Navigate to next step
-    click_button(page, "Next")
-
-    page.wait_for_selector("button:has-text('Next')", timeout=10_000)
-
-    # ============================================================================
-    # STEP 8: Other information
-    # ============================================================================
-    # Ask user if they want to fill other info
-    if AUTO_NEXT:
-        other_info_choice = "Y"
-    else:
-        other_info_choice = (
-            show_prompt("Do you want to fill other information? (Y/N): ", yes_no=True)
-        )
-    if other_info_choice == "Y":
-        step_other_information(page, applicant)
-
-    # User checkpoint: Verify Step 8 completion
-    if not AUTO_NEXT:
-        show_prompt("✓ Step 8 Complete - Please verify other information and press Enter to continue...")
-
-    # Navigate to next step
-    click_button(page, "Next")
-
-    page.wait_for_selector("button:has-text('Next')", timeout=10_000)
-
-    # ============================================================================
-    # STEP 9: Declaration
-    # ============================================================================
-    # Ask user if they want to fill declaration
-    if AUTO_NEXT:
-        declaration_choice = "Y"
-    else:
-        declaration_choice = (
-            show_prompt("Do you want to fill declaration? (Y/N): ", yes_no=True)
-        )
-    if declaration_choice == "Y":
-        step_declaration(page, applicant)
+        if AUTO_NEXT:
+            upload_choice = "Y"
+        else:
+            upload_choice = show_prompt("Do you want to upload passport file? (Y/N): ", yes_no=True)
+            print(upload_choice)
+
+        if upload_choice == "Y":
+            # find image file in image folder with name {passport_number}.jpeg
+            image_folder = config.get("IMAGE_FOLDER")
+            if image_folder:
+                image_folder = Path(image_folder)
+                image_file = stored_image(applicant) or find_image_file(image_folder, applicant['passport_number'])
+                if image_file:
+                    with visa_trace.span(visa_trace.STEP, "upload"):
+                        upload_file(page, str(upload_path(image_file)), "passport")
+                else:
+                    print(f"Image file {image_file} not found")
+
+        for step in steps.STEPS:
+            with visa_trace.span(visa_trace.STEP, f"step {step.number}", step.number):
+                # Ask user if they want to fill this step
+                if AUTO_NEXT:
+                    choice = "Y"
+                else:
+                    choice = show_prompt(f"Do you want to {step.question}? (Y/N): ", yes_no=True)
+                if choice == "Y":
+                    run_step(page, step, applicant)
+
+                # User checkpoint: verify the step before moving on
+                if not AUTO_NEXT:
+                    show_prompt(
+                        f"✓ Step {step.number} Complete - Please verify {step.verify} and press Enter to continue..."
+                    )
 
-    # User checkpoint: Verify Step 9 completion
-    if not AUTO_NEXT:
-        show_prompt("✓ Step 9 Complete - Please verify declaration and press Enter to continue...")
+                # Navigate to next step and wait for it to load
+                next_step(page, step.number)
 
-    # Navigate to next step
-    click_button(page, "Next")
+        print_step_timings(trace.durations(), trace.durations(visa_trace.TRANSITION))
 
-    page.wait_for_selector("button:has-text('Next')", timeout=10_000)
 
+def print_step_timings(
+    timings: Dict[str, float], transitions: Optional[Dict[str, float]] = None
+):
+    """Per-step wall time breakdown (includes operator prompts when attended)."""
+    parts = " | ".join(f"{name} {seconds:.1f}s" for name, seconds in timings.items())
+    if transitions:
+        # already part of the step times
+        parts += f" | of which step transitions {sum(transitions.values()):.1f}s"
+    print(f"⏱ {parts} | total {sum(timings.values()):.1f}s")
 
-    # ============================================================================
-    # STEP 10: Upload materials
-    # ============================================================================
-    # Ask user if they want to upload materials
-    if AUTO_NEXT:
-        upload_materials_choice = "Y"
-    else:
-        upload_materials_choice = (
-            show_prompt("Do you want to upload materials? (Y/N): ", yes_no=True)
-        )
-    if upload_materials_choice == "Y":
-        step_upload_materials(page, applicant)
 
-    # User checkpoint: Verify Step 10 completion
-    if not AUTO_NEXT:
-        show_prompt("✓ Step 10 Complete - Please verify upload materials and press Enter to continue...")
+def next_step(page: Page, number: int) -> Optional[float]:
+    """Click "Next" on step *number* and return once the next step is on screen.
 
-    # Navigate to next step
-    click_button(page, "Next")
+    The new step is recognised by a title numbered like it, a route change,
+    the step indicator moving on, or the first title changing – whichever
+    shows first (``visa_steps.STEP_READY_JS``).  Returns the transition
+    latency in seconds, also traced as a ``transition`` span; ``None`` when
+    the step did not change and the operator took over.  After the last step
+    the application is already submitted and no numbered step follows, so a
+    missing change is only logged.
+    """
+    prefix = steps.next_step_prefix(number)
+    before = page.evaluate(steps.STEP_STATE_JS, prefix)
+    with visa_trace.span(visa_trace.TRANSITION, f"step {number} → {number + 1}"):
+        started = time.perf_counter()
+        click_button(page, "Next")
+        try:
+            signal = page.wait_for_function(
+                steps.STEP_READY_JS, arg=[before, prefix], timeout=STEP_TRANSITION_TIMEOUT
+            ).json_value()
+        except PlaywrightTimeoutError:
+            signal = None
+            if prefix is None:
+                logging.warning(
+                    "No page change within %d ms after the last step", STEP_TRANSITION_TIMEOUT
+                )
+                return None
+            if AUTO_NEXT:
+                raise RuntimeError(
+                    f"Step {number} did not advance within {STEP_TRANSITION_TIMEOUT} ms "
+                    "(is a required field missing?)"
+                ) from None
+        latency = time.perf_counter() - started
+    if signal is None:
+        show_prompt(f"⚠️ Step {number} did not advance – open the next step and press Enter...")
+        return None
+    logging.info("Step %d → %d ready in %.0f ms (%s)", number, number + 1, latency * 1000, signal)
+    return latency
 
-    page.wait_for_selector("button:has-text('Next')", timeout=10_000)
 
-    page.locator
-    # ============================================================================
-    # FINAL STEP: Form Submission
-    # ============================================================================
-    # Submit the completed application
-  
+def stored_image(applicant: Dict[str, Any]) -> Optional[Path]:
+    """Image path resolved when the applicant store imported this row."""
+    image_path = applicant.get("image_path")
+    if image_path and Path(image_path).exists():
+        return Path(image_path)
+    return None
 
 
 def find_image_file(image_folder: Path, passport_number: str):
-    extensions = [".jpeg", ".jpg", ".png"]
-    for ext in extensions:
-        image_file = image_folder / f"{passport_number}{ext}"
-        if image_file.exists():
-            return image_file
-    return None
+    """Image of *passport_number* in *image_folder* (any extension or case)."""
+    return image_index(image_folder).find(passport_number)
 
 
 def applicable_checkbox(container, text: str = "Not applicable") -> bool:
@@ -1435,7 +708,7 @@ def applicable_checkbox(container, text: str = "Not applicable") -> bool:
             return True
 
         # Click the label to check it
-        checkbox_label.click()
+        traced("applicable_checkbox click", checkbox_label.click)
         return True
 
     except Exception as e:
@@ -1443,21 +716,138 @@ def applicable_checkbox(container, text: str = "Not applicable") -> bool:
         return False
 
 
-def plus_day_to_date(date: str, days: int):
-    """Plus days to date."""
-    date_obj = datetime.strptime(date, "%d/%m/%Y")
-    new_date = date_obj + timedelta(days=days)
-    return new_date.strftime("%d/%m/%Y")
+def fill_remark(container, text: str, timeout: Optional[int] = None, warning: str = ""):
+    """Fill the "Please specify." textarea of a form item.
 
+    With *timeout*, wait for the textarea to appear first (it is rendered only
+    after ticking "Not applicable") and print *warning* if it never does.
+    """
+    remark_input = container.locator("textarea.el-textarea__inner")
+    if timeout is None:
+        traced("fill_remark", remark_input.fill, text)
+        return
+    try:
+        traced("remark visible", remark_input.wait_for, state="visible", timeout=timeout)
+        traced("fill_remark", remark_input.fill, text)
+    except PlaywrightTimeoutError:
+        print(warning)
+
+
+def click_all_no_radios(page: Page):
+    """Answer "No" to every yes/no question on the current step."""
+    if BULK_NO_RADIOS and bulk_click_radios(page, "no"):
+        return
+    click_no_radios_one_by_one(page)
 
-def all_travel_info_base_on_city(city: str):
-    index = city_list.index(city)
-    return {
-        "address_to_stay": address_to_stay[index],
-        "arrival_flight_no": arrival_flight_no[index],
-        "departure_flight_no": departure_flight_no[index],
-        "travel_city": city,
-    }
+
+def bulk_click_radios(page: Page, text: str, passes: int = 3) -> bool:
+    """Click all unchecked radios labelled *text* in one evaluation.
+
+    Every pass is one click evaluation plus one verification; further passes
+    pick up questions revealed by earlier answers.  Returns ``False`` when the
+    radios could not be confirmed as checked, so callers can fall back.
+    """
+    for _ in range(passes):
+        result = safe("bulk radio click", page.evaluate, steps.CLICK_RADIOS_JS, text)
+        if result is None:
+            return False
+        if not result["clicked"]:
+            return True
+        checked = safe(
+            "bulk radio verify",
+            page.wait_for_function,
+            steps.RADIOS_CHECKED_JS,
+            arg=text,
+            timeout=RADIO_CHECK_TIMEOUT,
+        )
+        if checked is None:
+            logging.warning(
+                "Bulk '%s' selection not confirmed – clicking radios one by one", text
+            )
+            return False
+        # Answers may reveal follow-up questions fetched from the server
+        wait_for_network_idle(page)
+    return True
+
+
+def click_no_radios_one_by_one(page: Page):
+    # find all radio button with label "No"
+    no_radio_buttons = page.locator("label.el-radio:text-is('No')")
+    for i in range(no_radio_buttons.count()):
+        radio = no_radio_buttons.nth(i)
+        traced("no radio click", radio.click)
+        # Element-Plus marks the label once the model has taken the value
+        safe(
+            "radio is-checked",
+            radio.and_(page.locator("label.is-checked")).wait_for,
+            state="attached",
+            timeout=RADIO_CHECK_TIMEOUT,
+        )
+    # Answers may reveal follow-up questions fetched from the server
+    wait_for_network_idle(page)
+
+
+# ---------------------- Page state waits ------------------------------- #
+
+
+class RequestTracker:
+    """Counts the page's in-flight XHR/fetch requests.
+
+    Playwright's ``networkidle`` load state only covers the initial load of a
+    single-page app, so form steps track their own API traffic instead.
+    """
+
+    def __init__(self, page):
+        self.pending = set()
+        self.last_activity = time.monotonic()
+        page.on("request", self._started)
+        page.on("requestfinished", self._ended)
+        page.on("requestfailed", self._ended)
+
+    def _started(self, request):
+        if request.resource_type in ("xhr", "fetch"):
+            self.pending.add(request)
+            self.last_activity = time.monotonic()
+
+    def _ended(self, request):
+        if request in self.pending:
+            self.pending.discard(request)
+            self.last_activity = time.monotonic()
+
+    def idle_for(self) -> float:
+        """Seconds the page has been without in-flight requests (0 if busy)."""
+        if self.pending:
+            return 0.0
+        return time.monotonic() - self.last_activity
+
+
+_request_trackers: "weakref.WeakKeyDictionary[Any, RequestTracker]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def track_requests(page) -> RequestTracker:
+    """Attach (once) and return the request tracker of *page*."""
+    tracker = _request_trackers.get(page)
+    if tracker is None:
+        tracker = _request_trackers[page] = RequestTracker(page)
+    return tracker
+
+
+def wait_for_network_idle(page: Page, quiet_ms: int = 150, timeout: int = 5_000):
+    """Return once no XHR/fetch has been in flight for *quiet_ms*."""
+    tracker = track_requests(page)
+    deadline = time.monotonic() + timeout / 1000
+    while tracker.idle_for() * 1000 < quiet_ms:
+        if time.monotonic() >= deadline:
+            logging.warning(
+                "Network still busy after %d ms (%d requests)",
+                timeout,
+                len(tracker.pending),
+            )
+            return
+        # Lets Playwright dispatch request events while we wait
+        page.wait_for_timeout(25)
 
 
 def pick_date(container, year: str, month: str, day: str, page: Page):
@@ -1467,9 +857,10 @@ def pick_date(container, year: str, month: str, day: str, page: Page):
     """
     print(f"Picking date: {year} / {month} / {day}")
     # 1) Year – plain <input>
-    container.locator(
+    year_input = container.locator(
         "div.select-date-picker-one input.el-input__inner:not([readonly]):not([disabled])"
-    ).fill(year)
+    )
+    traced("pick_date year", year_input.fill, year)
 
     # 2) Month – <el-select>
     pick_option(
@@ -1481,9 +872,10 @@ def pick_date(container, year: str, month: str, day: str, page: Page):
 
     # 3) Day – disabled until month chosen → wait until enabled
     # Wait until the day input inside this date‑picker is enabled
-    container.locator(
+    day_input = container.locator(
         "div.select-date-picker-three input.el-input__inner:not([disabled])"
-    ).wait_for(state="visible", timeout=3_000)
+    )
+    traced("pick_date day enabled", day_input.wait_for, state="visible", timeout=3_000)
 
     pick_option(
         container.locator("div.select-date-picker-three"),
@@ -1497,12 +889,16 @@ def click_radio_button(container, text: str):
     text = text.strip().lower()
     radios = container.locator("label.el-radio")
 
-    for i in range(radios.count()):
-        radio = radios.nth(i)
-        label_text = radio.locator("span.el-radio__label").inner_text().strip().lower()
-        if text in label_text:
-            safe("click_radio_button", radio.click)
-            return
+    # Resolve the matching radio in a single in-page evaluation
+    index = safe(
+        "click_radio_button lookup",
+        radios.evaluate_all,
+        steps.FIND_TEXT_JS,
+        [text, "span.el-radio__label"],
+    )
+    if index is not None and index >= 0:
+        safe("click_radio_button", radios.nth(index).click)
+        return
 
     logging.warning("Radio option '%s' not found – skipped", text)
 
@@ -1511,14 +907,19 @@ def click_button(page: Page, text: str):
     # Normalize input text
     target = text.strip().lower()
 
-    # Get all visible buttons
+    # Resolve the first visible button containing the text in one evaluation
     buttons = page.locator("button:visible")
-    for i in range(buttons.count()):
-        btn = buttons.nth(i)
-        btn_text = btn.inner_text().strip().lower()
-        if target in btn_text:
-            safe(f"click_button '{text}'", btn.click)
-            return
+    index = safe(
+        f"click_button '{text}' lookup",
+        buttons.evaluate_all,
+        steps.FIND_TEXT_JS,
+        [target, None],
+    )
+    if index is not None and index >= 0:
+        safe(f"click_button '{text}'", buttons.nth(index).click)
+        # "Next" & co. swap the step – its form items must be indexed afresh
+        steps.invalidate_index(page)
+        return
 
     logging.warning("Button with text '%s' not found – skipped", text)
 
@@ -1538,17 +939,15 @@ def pick_option(container, trigger_selector: str, text: str, page):
     # Normalize search text
     target = text.strip().lower()
 
-    # Loop through each item and click the one that matches
-    count = items.count()
-
-    for i in range(count):
-        item = items.nth(i)
-        item_text = item.inner_text().strip().lower()
-        if target in item_text:
-            safe("pick_option click", item.click)
-            # after click, wait for the dropdown to be closed
-            safe("dropdown wait hidden", dropdown.wait_for, state="hidden", timeout=3_000)
-            return
+    # Resolve the first matching option in a single in-page evaluation
+    index = safe(
+        "pick_option lookup", items.evaluate_all, steps.FIND_TEXT_JS, [target, None]
+    )
+    if index is not None and index >= 0:
+        safe("pick_option click", items.nth(index).click)
+        # after click, wait for the dropdown to be closed
+        safe("dropdown wait hidden", dropdown.wait_for, state="hidden", timeout=3_000)
+        return
 
     logging.warning("[pick_option] No match found for '%s'", text)
 
@@ -1558,17 +957,17 @@ def fill_text(container, trigger_selector: str, text: str):
 
 
 def upload_file(page: Page, file_path: str, text: str):
-    page.locator(f"label:has-text('{text}')").locator(
+    file_input = page.locator(f"label:has-text('{text}')").locator(
         "xpath=ancestor::div[contains(@class,'el-form-item')]"
-    ).locator("input[type='file']").set_input_files(file_path)
+    ).locator("input[type='file']")
+    traced("upload_file", file_input.set_input_files, file_path)
 
     wait_for_upload_and_confirm(page)
 
 
 def upload_image(page: Page, file_path: str):
-    page.locator("div.imgDetail").locator("input[type='file']").set_input_files(
-        file_path
-    )
+    file_input = page.locator("div.imgDetail").locator("input[type='file']")
+    traced("upload_image", file_input.set_input_files, file_path)
 
     wait_for_upload_and_confirm(page)
 
@@ -1579,54 +978,356 @@ def wait_for_upload_and_confirm(page: Page):
     confirm_button = page.locator(
         "button.confirm-button:has-text('Confirm the auto-filled passport details on the application form.')"
     )
-    confirm_button.wait_for(state="visible", timeout=30_000)
+    traced("confirm visible", confirm_button.wait_for, state="visible", timeout=30_000)
 
     # Click the confirm button
-    confirm_button.click()
+    traced("confirm click", confirm_button.click)
 
-    # Wait a moment for the action to complete
-    page.wait_for_timeout(1000)
+    # Wait for the dialog to close and the auto-fill requests to settle
+    safe("confirm dialog close", confirm_button.wait_for, state="hidden", timeout=5_000)
+    wait_for_network_idle(page)
 
 
-def get_family_name_given_name_from_full_name(full_name: str):
-    """Get family name and given name from full name."""
+# ---------------------------------------------------------------------------
+# Main automation routine ----------------------------------------------------
+# ---------------------------------------------------------------------------
+
 
-    # example full name: "Nguyen Van A"
-    # family name: "Nguyen"
-    # given name: "Van A"
-    if not full_name:
-        return "", ""
-    name_parts = full_name.split(" ")
-    family_name = name_parts[0]
+def open_logged_in_form(page: Page) -> bool:
+    """Open the form's first step if *page*'s context is logged in."""
+    page.goto(FORM_URL, wait_until="domcontentloaded", timeout=120000)
+    start = page.locator(steps.START_BUTTON)
+    try:
+        start.wait_for(state="visible", timeout=SESSION_CHECK_TIMEOUT)
+    except PlaywrightTimeoutError:
+        return False
+    start.click()
+    return True
 
-    given_name = " ".join(name_parts[1:])
-    return family_name, given_name
 
+def running_on_browser_host() -> bool:
+    from visa_pool import current_host
 
-def get_year_month_day_from_date(date: str):
-    """Get year, month, and day from date."""
-    day, month, year = date.split("/")
-    return year, month, day
+    return current_host() is not None
 
 
-# ---------------------------------------------------------------------------
-# Main automation routine ----------------------------------------------------
-# ---------------------------------------------------------------------------
+@contextmanager
+def form_context():
+    """Context of a single-page run, closed on exit.
+
+    On a ``visa_pool.BrowserHost`` thread (the GUI) it is opened in the host's
+    warm browser; otherwise a browser is launched for this run and closed with
+    it.  With ``CDP_URL`` set it is the attached Chrome's own context, which is
+    left open.
+    """
+    from visa_pool import current_host
+
+    if CDP_URL:
+        # The operator's context and Chrome outlive the run; stopping the
+        # driver only disconnects from them
+        with sync_playwright() as p:
+            yield attached_context(attach_browser(p))
+        return
+    host = current_host()
+    if host is not None:
+        context = new_form_context(host.browser())
+        try:
+            yield context
+        finally:
+            context.close()
+        return
+    with sync_playwright() as p:
+        browser = launch_browser(p)
+        try:
+            yield new_form_context(browser)
+        finally:
+            browser.close()
+
+
+def launch_options() -> Dict[str, Any]:
+    """Keyword arguments of ``chromium.launch`` for both engines."""
+    # Alternative browser configurations for different needs:
+    # 
+    # Option 1: Custom window size
+    # browser = p.chromium.launch(
+    #     headless=HEADLESS,
+    #     args=['--window-size=1920,1080', '--window-position=0,0']
+    # )
+    # 
+    # Option 2: Fullscreen mode
+    # browser = p.chromium.launch(
+    #     headless=HEADLESS,
+    #     args=['--start-fullscreen']
+    # )
+    # 
+    # Option 3: Specific size with resizable capability
+    # browser = p.chromium.launch(
+    #     headless=HEADLESS,
+    #     args=['--window-size=1400,900', '--disable-web-security']
+    # )
+
+    return dict(
+        headless=HEADLESS,
+        args=[
+            '--start-maximized',  # Start with maximized window
+            '--disable-blink-features=AutomationControlled',  # Make it less detectable as automated
+            '--no-first-run',  # Skip first run setup
+            '--disable-default-apps',  # Disable default apps
+        ]
+    )
+
+
+def launch_browser(p):
+    """Launch the Chromium instance used for form filling."""
+    return p.chromium.launch(**launch_options())
+
+
+def attach_failed(error: PlaywrightError) -> RuntimeError:
+    """What to tell the operator when ``CDP_URL`` cannot be attached to."""
+    return RuntimeError(
+        f"No Chrome to attach to at {CDP_URL} – start Chrome with "
+        f"--remote-debugging-port={urlparse(CDP_URL).port or 9222} first ({error})"
+    )
+
+
+def attach_browser(p):
+    """Connect to the operator's running Chrome at ``CDP_URL``."""
+    logging.info("Attaching to Chrome at %s", CDP_URL)
+    try:
+        return p.chromium.connect_over_cdp(CDP_URL)
+    except PlaywrightError as e:
+        raise attach_failed(e) from e
+
+
+def attached_context(browser):
+    """The attached Chrome's default context: the operator's profile and tabs."""
+    if not browser.contexts:
+        raise RuntimeError(f"The Chrome at {CDP_URL} has no open window")
+    context = browser.contexts[0]
+    context.set_default_timeout(120_000)
+    return context
+
+
+def on_form_site(page: Page) -> bool:
+    return urlparse(page.url).netloc == urlparse(FORM_URL).netloc
+
+
+def form_page(context) -> Page:
+    """Page of a single-page run: an attached Chrome's open form tab, if any."""
+    if CDP_URL:
+        for page in context.pages:
+            if on_form_site(page):
+                logging.info("Reusing the open form tab %s", page.url)
+                page.bring_to_front()
+                return page
+    return context.new_page()
+
+
+def close_page(page: Page):
+    """Close a tab this run opened in an attached Chrome, if it is still there."""
+    try:
+        page.close()
+    except PlaywrightError as e:
+        logging.debug("Tab already gone: %s", e)
+
+
+def saved_session_path() -> Path:
+    return session_path(SESSION_FILE, EMAIL_LOGIN)
+
+
+def saved_session() -> Optional[Dict[str, Any]]:
+    """Storage state new contexts start from (login mode only)."""
+    if USE_EXISTING_BROWSER is False and REUSE_SESSION:
+        return load_state(
+            saved_session_path(), SESSION_MAX_AGE_HOURS, (LOGIN_URL, FORM_URL)
+        )
+    return None
+
+
+def context_options() -> Dict[str, Any]:
+    """Keyword arguments of ``browser.new_context`` for both engines."""
+    return dict(
+        storage_state=saved_session(),  # None = logged out
+        viewport=None,  # Allow viewport to be resizable
+        no_viewport=True,  # Don't set any viewport constraints
+        ignore_https_errors=True,  # Ignore HTTPS certificate errors if any
+    )
+
+
+def new_form_context(browser):
+    """Create an isolated browser context configured for the visa form."""
+    context = browser.new_context(**context_options())
+    # Apply a 120-second default timeout to all actions in this context
+    context.set_default_timeout(120_000)
+    return context
+
+
+def new_request_filter() -> RequestFilter:
+    return RequestFilter(
+        first_party=(FORM_URL, QUICK_FORM_URL, LOGIN_URL),
+        block_types=BLOCK_RESOURCE_TYPES,
+        block_third_party=BLOCK_THIRD_PARTY,
+        allow_hosts=BLOCK_ALLOW_HOSTS,
+        deny_hosts=BLOCK_DENY_HOSTS,
+    )
+
+
+def filter_requests(page: Page) -> RequestFilter:
+    """Install (once) the request filter for *page*.
+
+    It goes on the page's context, or only on the page itself when the context
+    is the attached Chrome's profile, so the operator's other tabs are untouched.
+    """
+    request_filter = page_filter(page)
+    if request_filter is None:
+        request_filter = register(page, new_request_filter())
+        request_filter.install(page if CDP_URL else page.context)
+    return request_filter
+
+
+def new_asset_route() -> visa_assets.AssetRoute:
+    cache = visa_assets.asset_cache(ASSET_CACHE_DIR or None, ASSET_CACHE_MB)
+    return visa_assets.AssetRoute(cache, sites=(FORM_URL, QUICK_FORM_URL))
+
+
+def cache_assets(page: Page) -> visa_assets.AssetRoute:
+    """Install (once) the asset cache for *page*, like :func:`filter_requests`."""
+    asset_route = visa_assets.page_assets(page)
+    if asset_route is None:
+        asset_route = visa_assets.register(page, new_asset_route())
+        asset_route.install(page if CDP_URL else page.context)
+    return asset_route
+
+
+def traffic_watchers(page: Page) -> list:
+    """The request filter and asset cache of *page* that report per applicant."""
+    watchers = (page_filter(page), visa_assets.page_assets(page))
+    return [watcher for watcher in watchers if watcher is not None]
+
+
+def start_options() -> Dict[str, Any]:
+    """Runtime constants the shared start-page flow depends on."""
+    return {
+        "CACHE_ASSETS": CACHE_ASSETS,
+        "BLOCK_REQUESTS": BLOCK_REQUESTS,
+        "CDP_URL": CDP_URL,
+        "USE_EXISTING_BROWSER": USE_EXISTING_BROWSER,
+        "REUSE_SESSION": REUSE_SESSION,
+        "AUTO_NEXT": AUTO_NEXT,
+        "LOGIN_URL": LOGIN_URL,
+        "FORM_URL": FORM_URL,
+        "QUICK_FORM_URL": QUICK_FORM_URL,
+        "EMAIL_LOGIN": EMAIL_LOGIN,
+        "PASSWORD_LOGIN": PASSWORD_LOGIN,
+    }
 
 
-def login(page: Page):
-    # debug log
+def page_op(page: Page, op: steps.PageOp):
+    """Perform one operation of a shared page flow; return its result."""
+    kind = op.kind
+
+    if kind == "goto":
+        page.goto(op.arg, wait_until="domcontentloaded", timeout=120000)
+    elif kind == "fill":
+        page.fill(op.arg, op.value)
+    elif kind == "click":
+        page.click(op.arg)
+    elif kind == "open_form":
+        return open_logged_in_form(page)
+    elif kind == "prompt":
+        return show_prompt(op.arg, yes_no=bool(op.value))
+    elif kind == "print":
+        print(op.arg)
+    elif kind == "log":
+        logging.info("%s", op.arg)
+    elif kind == "url":
+        return page.url
+    elif kind == "has_cookies":
+        return bool(page.context.cookies())
+    elif kind == "clear_cookies":
+        page.context.clear_cookies()
+    elif kind == "save_session":
+        save_state(saved_session_path(), page.context.storage_state())
+    elif kind == "discard_session":
+        discard(saved_session_path())
+    elif kind == "cache_assets":
+        cache_assets(page)
+    elif kind == "filter_requests":
+        filter_requests(page)
+    else:
+        raise ValueError(f"Unknown page operation: {kind}")
+
 
-    page.fill("input[placeholder='Enter your e-mail']", EMAIL_LOGIN)
-    page.fill('input[placeholder="Enter the password"]', PASSWORD_LOGIN)
+def drive(page: Page, flow: steps.Flow):
+    """Run a shared page flow from ``visa_steps`` on *page*; return its result."""
+    result = None
+    while True:
+        try:
+            op = flow.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result = page_op(page, op)
 
 
-def open_form(page: Page):
-    page.goto(FORM_URL)
-    # debug log
-    print("Form page loaded")
+def open_start_page(page: Page):
+    """Bring *page* to the first step of the form (see ``visa_steps.start_page``)."""
+    drive(page, steps.start_page(start_options()))
 
-    page.click("button:has-text('Start filling in the form.')")
+
+def run_applicant(page: Page, applicant: Dict[str, Any], config: Dict[str, Any]):
+    """Fill the form for one applicant and return it with status and error."""
+    watchers = traffic_watchers(page)
+    before = [watcher.snapshot() for watcher in watchers]
+    try:
+        # The chosen flights and address are journaled with the result
+        applicant = itinerary().plan_travel(applicant)
+        fill_form(page, applicant, config)
+        status = "SUCCESS"
+        error_msg = ""
+    except PlaywrightTimeoutError:
+        status = "FAILURE"
+        error_msg = "Timeout waiting for success confirmation"
+        logging.error(error_msg)
+    except Exception as exc:
+        status = "FAILURE"
+        error_msg = str(exc)
+        logging.exception(
+            "Unexpected error while submitting passport %s",
+            applicant.get("passport_number"),
+        )
+    if watchers:
+        traffic = "; ".join(w.report(b) for w, b in zip(watchers, before))
+        print(f"🌐 {applicant.get('passport_number')}: {traffic}")
+    return {**applicant, "status": status, "error": error_msg}
+
+
+def open_store(config: Dict[str, Any]):
+    """Open the applicant store and sync it with DATA_FILE."""
+    from visa_store import ApplicantStore
+
+    store = ApplicantStore(Path(STORE_FILE))
+    image_folder = config.get("IMAGE_FOLDER")
+    store.sync(
+        Path(DATA_FILE),
+        lambda: iter_applicants(Path(DATA_FILE)),
+        lambda passport: find_image_file(Path(image_folder), passport) if image_folder else None,
+        Path(image_folder) if image_folder else None,
+    )
+    logging.info("Applicant store %s: %s", STORE_FILE, store.counts())
+    if config.get("START_INDEX"):
+        logging.warning("START_INDEX is ignored with STORE_FILE – use STORE_FILTER")
+    return store
+
+
+def beside_data_file(name: str) -> Path:
+    """*name* as is when absolute, else next to the data file."""
+    path = Path(name)
+    return path if path.is_absolute() else Path(DATA_FILE).parent / path
+
+
+def journal_path() -> Path:
+    """Where results are journaled."""
+    return beside_data_file(JOURNAL_FILE)
 
 
 def main(config: Dict[str, Any]):
@@ -1641,126 +1342,129 @@ def main(config: Dict[str, Any]):
         for key, value in config.items():
             globals()[key] = value
            
-    df = load_applicants(Path(DATA_FILE))
-    # log all data from df  
-    print(df)
-    logging.info("Loaded %d applicant rows from %s", len(df), DATA_FILE)
-
-    results = []  # store status for each applicant
+    start_index = config.get("START_INDEX", 0)
+    image_folder = config.get("IMAGE_FOLDER")
+    if image_folder:
+        # One scandir for the whole run instead of stats per applicant
+        image_index(Path(image_folder), refresh=True)
 
-    # Ensure Playwright browsers are available
     try:
-        ensure_browsers_available()
-    except RuntimeError as e:
-        print(f"❌ Browser setup failed: {e}")
-        print("💡 Please try one of these solutions:")
-        print("1. Install Google Chrome from https://www.google.com/chrome/")
-        print("2. Run the application again and allow browser download")
-        print("3. Check your internet connection")
-        print("4. See BROWSER_INSTALLATION.md for detailed instructions")
+        use_itinerary(load_itinerary(beside_data_file(ITINERARY_FILE)))
+    except ItineraryError as e:
+        print(f"❌ Itinerary file is invalid: {e}")
         return
-    
+
+    status_journal = Journal(journal_path())
+    store = open_store(config) if STORE_FILE else None
+    journal = JournalGroup(status_journal, store)
+    done = status_journal.succeeded() if RESUME else set()
+    if RESUME:
+        logging.info("Resume: %d passports already submitted per %s", len(done), status_journal.path)
+
+    def source_rows():
+        if store is not None:
+            rows = store.pending(STORE_FILTER)
+        else:
+            rows = iter_applicants(Path(DATA_FILE), start_index)
+        # Date columns are parsed once here, not per form field
+        return normalize_dates(rows)
+
+    # Validation and skip_invalid number the rows of source_rows() alike
+    first_row = 0 if store is not None else start_index
+    rejected = set()
+
+    def run_rows(quiet: bool = False):
+        """This run's applicants, streamed afresh on every call."""
+        rows = source_rows()
+        if rejected:
+            rows = skip_invalid(rows, rejected, first_row, quiet)
+        return skip_succeeded(rows, done, quiet) if done else rows
+
+    # Until a run below takes the journal over, a failure must still close
+    # the store and the status CSV
     try:
-        with sync_playwright() as p:
-            # Alternative browser configurations for different needs:
-            # 
-            # Option 1: Custom window size
-            # browser = p.chromium.launch(
-            #     headless=HEADLESS,
-            #     args=['--window-size=1920,1080', '--window-position=0,0']
-            # )
-            # 
-            # Option 2: Fullscreen mode
-            # browser = p.chromium.launch(
-            #     headless=HEADLESS,
-            #     args=['--start-fullscreen']
-            # )
-            # 
-            # Option 3: Specific size with resizable capability
-            # browser = p.chromium.launch(
-            #     headless=HEADLESS,
-            #     args=['--window-size=1400,900', '--disable-web-security']
-            # )
-            
-            browser = p.chromium.launch(
-                headless=HEADLESS,
-                args=[
-                    '--start-maximized',  # Start with maximized window
-                    '--disable-blink-features=AutomationControlled',  # Make it less detectable as automated
-                    '--no-first-run',  # Skip first run setup
-                    '--disable-default-apps',  # Disable default apps
-                ]
-            )
-            context = browser.new_context(
-                viewport=None,  # Allow viewport to be resizable
-                no_viewport=True,  # Don't set any viewport constraints
-                ignore_https_errors=True,  # Ignore HTTPS certificate errors if any
-            )
-            # Apply a 120-second default timeout to all actions in this context
-            context.set_default_timeout(120_000)
-            page = context.new_page()
-            if USE_EXISTING_BROWSER is False:
+        if VALIDATE_APPLICANTS:
+            # Doomed rows are found here instead of halfway through their form
+            errors = validate(source_rows(), first_row=first_row)
+            rejected = report_invalid(errors, beside_data_file(VALIDATION_REPORT))
 
-                # Let the user log in manually first.
-                logging.info("Opening login page: %s", LOGIN_URL)
+        if image_folder:
+            images = check_images(Path(image_folder), run_rows(quiet=True))
+            if PREPROCESS_IMAGES:
+                prepare_images(images, IMAGE_CACHE_DIR or None, IMAGE_MAX_SIDE, IMAGE_MAX_KB)
+
+        # Ensure Playwright browsers are available – before any driver starts
+        single = ENGINE != "async" and WORKERS <= 1
+        # On the GUI's BrowserHost the probe runs when the warm browser launches
+        hosted = single and running_on_browser_host()
+        try:
+            # An attached Chrome is the operator's; nothing to find or launch
+            if not hosted and not CDP_URL:
+                ensure_browsers_available()
+        except RuntimeError as e:
+            print(f"❌ Browser setup failed: {e}")
+            print("💡 Please try one of these solutions:")
+            print("1. Install Google Chrome from https://www.google.com/chrome/")
+            print("2. Run the application again and allow browser download")
+            print("3. Check your internet connection")
+            print("4. See BROWSER_INSTALLATION.md for detailed instructions")
+            journal.close()
+            return
+    except BaseException:
+        journal.close()
+        raise
 
-                page.goto(LOGIN_URL, wait_until="domcontentloaded", timeout=120000)
+    # Rows are streamed from the file as the run reaches them
+    applicants = run_rows()
+    logging.info("Reading applicants from %s (starting at row %d)", DATA_FILE, start_index)
 
-                # debug log
-                print("Login page loaded")
+    results = []  # store status for each applicant
+
+    if ENGINE == "async":
+        from visa_async import run_batch as run_async_batch
 
-                login(page)
+        with journal:
+            return run_async_batch(applicants, config, start_index=start_index, journal=journal)
+    if WORKERS > 1:
+        from visa_batch import run_batch
 
-                # waiting user enter to continue
-                show_prompt("Waiting Page loaded success & Press Enter to continue...")
+        with journal:
+            return run_batch(applicants, config, start_index=start_index, journal=journal)
 
-                open_form(page)
-                # debug log
-                print("Form page loaded")
-                show_prompt("Waiting Page loaded success & Press Enter to continue...")
-            else:
-                page.goto(QUICK_FORM_URL, wait_until="domcontentloaded", timeout=120000)
-                show_prompt("Waiting Page loaded success & Press Enter to continue...")
+    try:
+        with journal, form_context() as context:
+            page = form_page(context)
+            open_start_page(page)
 
-            total_applicants = len(df)
-            start_index = config.get("START_INDEX", 0)
-            for row_num, applicant in enumerate(df.to_dict(orient="records")[start_index:], start=1):
-                logging.info("Processing applicant %d / %d", row_num, total_applicants)
+            for row_num, applicant in enumerate(applicants, start=1):
+                logging.info("Processing applicant %d (row %d)", row_num, start_index + row_num - 1)
                 # log current index & current data
                 print(f"Current index: {row_num}")
                 print("=== APPLICANT DATA ===")
                 for key, value in applicant.items():
                     print(f"{key}: {value}")
                 print("====================")
-                print(f"Processing applicant {row_num} / {total_applicants}")
-                try:
-                    # Ensure we are on a fresh form for each applicant.
-                    logging.info("Filling form for applicant %d", row_num)
-                    print(f"Filling form for applicant {row_num}")
-                    fill_form(page, applicant, config)
-                    status = "SUCCESS"
-                    error_msg = ""
-                 
+                print(f"Processing applicant {row_num}")
+                # Ensure we are on a fresh form for each applicant.
+                logging.info("Filling form for applicant %d", row_num)
+                print(f"Filling form for applicant {row_num}")
+                result = run_applicant(page, applicant, config)
+                journal.record(result)
+
+                if result["status"] == "SUCCESS":
                     show_prompt("Application submitted successfully for row %d, Press Enter to continue to next applicant? (Y/N): ", yes_no=True)
-                    
+
                     logging.info("Application submitted successfully for row %d", row_num)
-                except PlaywrightTimeoutError:
-                    status = "FAILURE"
-                    error_msg = "Timeout waiting for success confirmation"
-                    logging.error(error_msg)
-                    show_prompt("Press Enter to continue to next applicant...")
-                except Exception as exc:
-                    status = "FAILURE"
-                    error_msg = str(exc)
-                    logging.exception("Unexpected error while submitting row %d", row_num)
+                else:
                     show_prompt("Press Enter to continue to next applicant...")
 
                 # Record the result
-                results.append({**applicant, "status": status, "error": error_msg})
-
-            # End of iteration.
-            browser.close()
+                results.append(result)
     except Exception as e:
+        if CDP_URL:
+            print(f"❌ Run in the attached Chrome failed: {e}")
+            return
+        forget_browser()  # probe again on the next start
         print(f"❌ Failed to launch browser: {e}")
         print("💡 This usually means:")
         print("   - No browser is installed")
@@ -1801,15 +1505,25 @@ def main(config: Dict[str, Any]):
 # ---------------------------------------------------------------------------
 
 
+def traced(desc: str, fn, *args, **kwargs):
+    """Execute *fn* as an action span of the active ``visa_trace`` trace.
+
+    For calls whose errors must propagate; :func:`safe` also swallows them.
+    """
+    with visa_trace.span(visa_trace.ACTION, desc):
+        return fn(*args, **kwargs)
+
+
 def safe(desc: str, fn, *args, **kwargs):
     """Execute *fn* ignoring Playwright locator errors.
 
     Any *PlaywrightTimeoutError*, generic *PlaywrightError*, or *ValueError* is
-    logged and suppressed so the automation can continue.
+    logged and suppressed so the automation can continue.  The call (and any
+    swallowed failure) is recorded in the active ``visa_trace`` trace.
     """
 
     try:
-        return fn(*args, **kwargs)
+        return traced(desc, fn, *args, **kwargs)
     except (PlaywrightTimeoutError, PlaywrightError, ValueError) as exc:
         logging.warning("SAFE-IGNORED: %s → %s", desc, exc)
         return None
@@ -1831,4 +1545,85 @@ def show_prompt(prompt: str, yes_no: bool = False):
     else:
         data_input = input(f"{prompt}")
         
-        return data_input.upper()
\ No newline at end of file
+        return data_input.upper()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import visa_autofill  # the batch runners read the importable module's globals
+
+    parser = argparse.ArgumentParser(
+        description="Fill China visa application forms from a spreadsheet."
+    )
+    parser.add_argument("data_file", nargs="?", default=DATA_FILE)
+    parser.add_argument("--start-index", type=int, default=0)
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip passports the journal already marks SUCCESS",
+    )
+    parser.add_argument("--journal", default=JOURNAL_FILE, help="status journal CSV")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--auto-next", action="store_true", help="run unattended")
+    parser.add_argument("--image-folder", default="")
+    parser.add_argument(
+        "--preprocess-images",
+        action="store_true",
+        help="rotate/resize/compress passport images before upload (needs Pillow)",
+    )
+    parser.add_argument(
+        "--no-validate",
+        action="store_true",
+        help="start filling without validating the applicants first",
+    )
+    parser.add_argument(
+        "--itinerary",
+        default=ITINERARY_FILE,
+        help="flights/addresses per city (JSON or CSV)",
+    )
+    parser.add_argument(
+        "--block-requests",
+        action="store_true",
+        help="skip images, fonts, trackers and third-party hosts on the form",
+    )
+    parser.add_argument(
+        "--cache-assets",
+        action="store_true",
+        help="serve the form's scripts, styles and fonts from a disk cache",
+    )
+    parser.add_argument(
+        "--cdp-url",
+        default=CDP_URL,
+        help="attach to a running Chrome, e.g. http://localhost:9222",
+    )
+    parser.add_argument("--store", default="", help="SQLite applicant store file")
+    parser.add_argument(
+        "--only",
+        action="append",
+        default=[],
+        metavar="COLUMN=VALUE",
+        help="with --store: only applicants matching, e.g. visa_type=L",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    visa_autofill.main(
+        {
+            "DATA_FILE": args.data_file,
+            "START_INDEX": args.start_index,
+            "RESUME": args.resume,
+            "JOURNAL_FILE": args.journal,
+            "WORKERS": args.workers,
+            "AUTO_NEXT": args.auto_next,
+            "IMAGE_FOLDER": args.image_folder,
+            "PREPROCESS_IMAGES": args.preprocess_images,
+            "VALIDATE_APPLICANTS": not args.no_validate,
+            "ITINERARY_FILE": args.itinerary,
+            "CDP_URL": args.cdp_url,
+            "BLOCK_REQUESTS": args.block_requests,
+            "CACHE_ASSETS": args.cache_assets,
+            "STORE_FILE": args.store,
+            "STORE_FILTER": dict(item.split("=", 1) for item in args.only),
+        }
+    )
@@ -0,0 +1,248 @@
+"""Parallel batch runner for the visa autofill automation.
+
+Applicant rows are fanned out over a pool of ``WORKERS`` browser workers.
+Every worker owns its Playwright driver, browser and ``BrowserContext`` (the
+sync API is bound to the thread that started it), so cookies set while filling
+never leak between workers; they only share the saved login session they start
+from (``visa_session``).  Attached to the operator's Chrome (``CDP_URL``), each
+worker connects on its own and fills in a tab of that Chrome's profile.
+
+Rows are assigned with ``row % workers``: the same spreadsheet always lands on
+the same workers, which keeps runs comparable when measuring how throughput
+scales with the worker count.  Each worker reads from its own bounded queue so
+the producer never materialises more than ``WORKER_QUEUE_SIZE`` rows ahead of
+any worker – applicants can be streamed straight from the spreadsheet.
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from playwright.sync_api import sync_playwright
+
+import visa_autofill as va
+from visa_journal import Journal
+
+# Sentinel telling a worker that no more rows will be queued
+_STOP = None
+
+
+@dataclass
+class WorkerProgress:
+    """Live counters for one batch worker."""
+
+    worker_id: int
+    assigned: int = 0
+    done: int = 0
+    failed: int = 0
+    current_row: Optional[int] = None
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def processed(self) -> int:
+        return self.done + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def per_minute(self) -> float:
+        return self.processed / self.elapsed * 60 if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"worker {self.worker_id}: {self.processed}/{self.assigned} rows "
+            f"({self.done} ok, {self.failed} failed) in {self.elapsed:.1f}s "
+            f"– {self.per_minute:.2f} applicants/min"
+        )
+
+
+def worker_for_row(row_num: int, workers: int) -> int:
+    """Stable row → worker assignment."""
+    return row_num % workers
+
+
+def _drain(
+    work: "queue.Queue",
+    progress: WorkerProgress,
+    results: List[Dict[str, Any]],
+    lock: threading.Lock,
+    error_msg: str,
+    journal: Optional[Journal] = None,
+    in_flight: Optional[Tuple[int, Dict[str, Any]]] = None,
+):
+    """Mark every remaining queued row as failed so the producer never blocks.
+
+    *in_flight* is the row the worker was filling when it died; it is failed
+    first.
+    """
+    while True:
+        item = in_flight or work.get()
+        in_flight = None
+        if item is _STOP:
+            return
+        row_num, applicant = item
+        result = {**applicant, "status": "FAILURE", "error": error_msg, "row": row_num}
+        with lock:
+            progress.failed += 1
+            results.append(result)
+        if journal is not None:
+            journal.record(result)
+
+
+def _worker(
+    progress: WorkerProgress,
+    work: "queue.Queue",
+    results: List[Dict[str, Any]],
+    lock: threading.Lock,
+    login_lock: threading.Lock,
+    config: Dict[str, Any],
+    journal: Optional[Journal] = None,
+):
+    tag = f"[worker {progress.worker_id}]"
+    stopped = False
+    in_flight = None  # the row taken off the queue but not yet recorded
+    try:
+        with sync_playwright() as p:
+            attached = bool(va.CDP_URL)
+            browser = va.attach_browser(p) if attached else va.launch_browser(p)
+            page = None
+            try:
+                # Logins may prompt the operator – keep them one at a time.
+                # The context is created inside the lock so it starts from the
+                # session an earlier worker has just saved.
+                with login_lock:
+                    if attached:
+                        # A tab of its own in the operator's logged-in profile
+                        context = va.attached_context(browser)
+                    else:
+                        context = va.new_form_context(browser)
+                    page = context.new_page()
+                    logging.info("%s logging in", tag)
+                    va.open_start_page(page)
+
+                while True:
+                    item = work.get()
+                    if item is _STOP:
+                        stopped = True
+                        break
+                    in_flight = item
+                    row_num, applicant = item
+                    progress.current_row = row_num
+                    logging.info(
+                        "%s row %d (passport %s)",
+                        tag,
+                        row_num,
+                        applicant.get("passport_number"),
+                    )
+                    result = va.run_applicant(page, applicant, config)
+                    with lock:
+                        if result["status"] == "SUCCESS":
+                            progress.done += 1
+                        else:
+                            progress.failed += 1
+                        results.append({**result, "row": row_num})
+                    in_flight = None
+                    if journal is not None:
+                        journal.record(result)
+                    progress.current_row = None
+                    logging.info("%s %s → %s", tag, row_num, result["status"])
+                    print(f"{tag} {progress.summary()}")
+            finally:
+                if not attached:
+                    browser.close()
+                elif page is not None:
+                    # Only the tab this worker opened – the operator's Chrome
+                    # and its profile stay as they were
+                    va.close_page(page)
+    except Exception as exc:
+        logging.exception("%s stopped", tag)
+        if not stopped:
+            _drain(
+                work,
+                progress,
+                results,
+                lock,
+                f"Worker {progress.worker_id} failed: {exc}",
+                journal,
+                in_flight,
+            )
+    finally:
+        progress.finished_at = time.monotonic()
+
+
+def run_batch(
+    applicants: Iterable[Dict[str, Any]],
+    config: Dict[str, Any],
+    workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    start_index: int = 0,
+    journal: Optional[Journal] = None,
+) -> List[Dict[str, Any]]:
+    """Fill the form for every applicant using a pool of browser workers.
+
+    Returns the per-applicant results (with ``status``, ``error`` and the
+    absolute ``row`` index) in spreadsheet order; each result is also written
+    to *journal* the moment its worker finishes it.
+    """
+    workers = max(1, workers or va.WORKERS)
+    queue_size = max(1, queue_size or va.WORKER_QUEUE_SIZE)
+    if not va.AUTO_NEXT:
+        logging.warning(
+            "Batch mode with AUTO_NEXT disabled – step prompts from %d workers "
+            "will interleave",
+            workers,
+        )
+
+    results: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+    login_lock = threading.Lock()
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+    progress = [WorkerProgress(worker_id=i) for i in range(workers)]
+
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(progress[i], queues[i], results, lock, login_lock, config, journal),
+            name=f"visa-worker-{i}",
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+
+    logging.info("Batch: %d workers", workers)
+    try:
+        for row_num, applicant in enumerate(applicants, start=start_index):
+            worker = worker_for_row(row_num, workers)
+            progress[worker].assigned += 1
+            queues[worker].put((row_num, applicant))
+    finally:
+        # Also when reading the spreadsheet fails – let the workers wind down
+        for work in queues:
+            work.put(_STOP)
+        for thread in threads:
+            thread.join()
+
+    elapsed = time.monotonic() - started
+    print("=== BATCH SUMMARY ===")
+    for worker in progress:
+        print(worker.summary())
+    total = sum(worker.processed for worker in progress)
+    rate = total / elapsed * 60 if elapsed > 0 else 0.0
+    print(
+        f"total: {total} applicants, {workers} workers, {elapsed:.1f}s "
+        f"– {rate:.2f} applicants/min"
+    )
+    print("=====================")
+
+    results.sort(key=lambda result: result["row"])
+    return results
@@ -0,0 +1,198 @@
+"""Date parsing for applicant columns.
+
+Spreadsheets mix ``dd/mm/yyyy``, ``yyyy/mm/dd``, ``d/m/yyyy``, Excel dates
+(``2025-07-20 00:00:00`` once read as text) and Excel serial numbers
+(``45858``).  :func:`normalize_dates` parses every date column of a stream of
+applicants once, a chunk at a time with ``pd.to_datetime``: the format of each
+column is detected from its first values (the candidate parsing the most of
+them wins, earlier candidates win ties) and values it misses are tried against
+the other formats.  Parsed values become :class:`YMD` tuples, which the date
+pickers and the departure-date arithmetic use as they are; anything
+unparseable is left untouched for validation to report.
+
+Day-first is assumed throughout – ``03/04/2010`` is 3 April, never 4 March.
+"""
+
+import logging
+import re
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+# Applicant columns holding dates
+DATE_COLUMNS: Tuple[str, ...] = (
+    "birth_date",
+    "date_of_arrival",
+    "spouse_dob",
+    "father_dob",
+    "mother_dob",
+    "children_dob",
+)
+
+# Candidate formats, in order of preference for ambiguous columns
+DATE_FORMATS: Tuple[str, ...] = (
+    "%d/%m/%Y",
+    "%Y/%m/%d",
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+)
+EXCEL_SERIAL = "excel serial"
+
+# Day 0 of Excel's 1900 date system (which counts a 29 Feb 1900 that never was)
+EXCEL_EPOCH = datetime(1899, 12, 30)
+EXCEL_SERIAL_PATTERN = r"\d{1,6}(?:\.0+)?"
+# 1 Jan 1900 to 31 Dec 2199
+EXCEL_SERIAL_RANGE = (1, 109574)
+
+CHUNK_SIZE = 5_000
+
+
+class YMD(NamedTuple):
+    """A parsed date; prints as ``dd/mm/yyyy`` like the spreadsheet column."""
+
+    year: int
+    month: int
+    day: int
+
+    def __str__(self) -> str:
+        return f"{self.day:02d}/{self.month:02d}/{self.year:04d}"
+
+    def parts(self) -> Tuple[str, str, str]:
+        """Zero-padded ``(year, month, day)`` strings for the date picker."""
+        return f"{self.year:04d}", f"{self.month:02d}", f"{self.day:02d}"
+
+    def plus_days(self, days: int) -> "YMD":
+        shifted = date(self.year, self.month, self.day) + timedelta(days=days)
+        return YMD(shifted.year, shifted.month, shifted.day)
+
+
+# -- single values ---------------------------------------------------------------
+
+
+def parse_date(text: str) -> YMD:
+    """Parse one date in any supported format; ``ValueError`` if none fits."""
+    text = str(text).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return YMD(parsed.year, parsed.month, parsed.day)
+    if re.fullmatch(EXCEL_SERIAL_PATTERN, text):
+        serial = int(float(text))
+        low, high = EXCEL_SERIAL_RANGE
+        if low <= serial <= high:
+            parsed = EXCEL_EPOCH + timedelta(days=serial)
+            return YMD(parsed.year, parsed.month, parsed.day)
+    raise ValueError(f"Unrecognised date: {text!r}")
+
+
+def to_ymd(value: Any) -> YMD:
+    """*value* as a :class:`YMD`, parsing it if it is still text."""
+    if isinstance(value, YMD):
+        return value
+    if isinstance(value, (tuple, list)) and len(value) == 3:
+        return YMD(*(int(part) for part in value))
+    return parse_date(value)
+
+
+# -- columns ---------------------------------------------------------------------
+
+
+def _parse_as(text: pd.Series, fmt: str) -> pd.Series:
+    if fmt != EXCEL_SERIAL:
+        return pd.to_datetime(text, format=fmt, errors="coerce")
+    low, high = EXCEL_SERIAL_RANGE
+    serials = pd.to_numeric(
+        text.where(text.str.fullmatch(EXCEL_SERIAL_PATTERN).fillna(False)),
+        errors="coerce",
+    )
+    serials = serials.where(serials.between(low, high))
+    return EXCEL_EPOCH + pd.to_timedelta(serials, unit="D")
+
+
+def detect_format(text: pd.Series) -> Optional[str]:
+    """The candidate format parsing most of *text* (``None`` if none parses any)."""
+    best, best_count = None, 0
+    for fmt in DATE_FORMATS + (EXCEL_SERIAL,):
+        count = int(_parse_as(text, fmt).notna().sum())
+        if count > best_count:
+            best, best_count = fmt, count
+    return best
+
+
+def parse_column(
+    values: pd.Series, fmt: Optional[str] = None
+) -> Tuple[pd.Series, Optional[str]]:
+    """Parse *values* (format detected unless given); unparsed values are NaT.
+
+    Returns the parsed timestamps and the column format used.
+    """
+    text = values.astype("string").str.strip()
+    present = text.notna() & text.ne("")
+    if fmt is None and present.any():
+        fmt = detect_format(text[present])
+    parsed = (
+        _parse_as(text, fmt)
+        if fmt
+        else pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    )
+    # Mixed columns: give what the column format missed to the other formats
+    for other in DATE_FORMATS + (EXCEL_SERIAL,):
+        missed = present & parsed.isna()
+        if not missed.any():
+            break
+        if other != fmt:
+            parsed = parsed.fillna(_parse_as(text[missed], other))
+    return parsed, fmt
+
+
+class DateNormalizer:
+    """Replace date strings with :class:`YMD` in a stream of applicants.
+
+    A column's format is detected from the first chunk that has values in it
+    and reused for the rest of the stream.
+    """
+
+    def __init__(self, columns: Iterable[str] = DATE_COLUMNS):
+        self.columns = tuple(columns)
+        self.formats: Dict[str, Optional[str]] = {}
+
+    def normalize_chunk(self, chunk: list):
+        for column in self.columns:
+            values = pd.Series([row.get(column) for row in chunk], dtype=object)
+            if values.isna().all():
+                continue
+            parsed, fmt = parse_column(values, self.formats.get(column))
+            if column not in self.formats and fmt:
+                self.formats[column] = fmt
+                logging.info("Date column %s looks like %s", column, fmt)
+            ok = parsed.notna().to_numpy()
+            years = parsed.dt.year.to_numpy()
+            months = parsed.dt.month.to_numpy()
+            days = parsed.dt.day.to_numpy()
+            for i, row in enumerate(chunk):
+                if ok[i]:
+                    row[column] = YMD(int(years[i]), int(months[i]), int(days[i]))
+
+    def __call__(
+        self, applicants: Iterable[Dict[str, Any]], chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        rows = iter(applicants)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            self.normalize_chunk(chunk)
+            yield from chunk
+
+
+def normalize_dates(
+    applicants: Iterable[Dict[str, Any]], columns: Iterable[str] = DATE_COLUMNS
+) -> Iterator[Dict[str, Any]]:
+    """Stream *applicants* with their date columns parsed into :class:`YMD`."""
+    return DateNormalizer(columns)(applicants)
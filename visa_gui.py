@@ -4,7 +4,6 @@ Position: Senior Software Engineer
 """
 
 import sys
-import threading
 import queue
 from pathlib import Path
 import os
@@ -35,6 +34,7 @@ from PyQt5.QtWidgets import (
 
 # ----------- business imports (same as before) ---------------------------
 from visa_autofill import main as run_visa_autofill
+from visa_pool import BrowserHost
 # ---------------- default config -----------------------------------------
 PLUS_DAY_TO_DATE = 4
 DATA_FILE = "application.xlsx"
@@ -47,6 +47,12 @@ AUTO_NEXT = False
 QUICK_FORM_URL = "https://consular.mfa.gov.cn/VISA/?visadata=eyJndWlkIjoiMTcwOTcxMjk0MDU0OTAiLCJleHBpcmVzX2luIjoiIiwidG1wX3NlY3JldCI6InZjZW50ZXJfMTcwOTcxMjk0MDU0OTBfOWEwZGE2MjZkODVmYWE5NzBjYTMzYzJlZjdmYmIxNjlfMTkxODM3MzhfMTc1MTM4OTU5MzE3MF9iOTBhYzA5ZTc1MDQ4ZTlmNTBmMGU2MWI5MWViYTM2YiIsInRva2VuIjoiWW1WallXWmpOVGxoWkRFM1kyVmhNMlE0TkdJMU9XUXlOemxtT0RGa056QXpObUl6T0RBeU0yTXhPR05pWm1JMk1tVmlPRE01TmpVek0yVmxPV1JtTlE9PSIsImxhbmciOiJlbl9VUyIsImVtYmFzc3lJZCI6IlZOTUIiLCJwYWdlcyI6Im5vZGUiLCJ1aWQiOiIyYTM4ZDUzYTdjYzI0ZmRhYTgxYjVhNGM1YzJlNzUzMCIsImVtYWlsIjoiaGllbnRyYW5nMjRodmlzYUBnbWFpbC5jb20iLCJwbHQiOiJ2Y2VudGVyIn0%3D"  # shortened for brevity
 FORM_URL = "https://consular.mfa.gov.cn/VISA/node"
 CURRENT_INDEX = 0
+WORKERS = 1
+RESUME = False
+PREPROCESS_IMAGES = False
+CDP_URL = ""
+BLOCK_REQUESTS = False
+CACHE_ASSETS = False
 # ---------------- UI helper ----------------------------------------------
 class LogEmitter(QObject):
     new_text = pyqtSignal(str)
@@ -132,6 +138,11 @@ class VisaAutofillWindow(QMainWindow):
         self.log_queue: queue.Queue[str] = queue.Queue()
         self._log_emitter = LogEmitter()
         self._log_emitter.new_text.connect(self._append_log)
+        # Runs execute on this thread and reuse its warm browser, which is
+        # launched in the background while the operator fills in the form
+        self._browser_host = BrowserHost().start(warm=True)
+        # Set once the window closes: pending and later prompts cancel the run
+        self._closing = False
 
 
         # ---------------- build ui ------------------
@@ -234,6 +245,56 @@ class VisaAutofillWindow(QMainWindow):
         # Start from row index
         opt_layout.addWidget(QLabel("Start from row index"), 5, 0)
         opt_layout.addWidget(self._start_index_edit, 5, 1)
+
+        # Parallel browser workers (batch mode)
+        self._workers_spin = QSpinBox()
+        self._workers_spin.setRange(1, 8)
+        self._workers_spin.setValue(WORKERS)
+        self._workers_spin.setMinimumWidth(80)
+        self._workers_spin.setToolTip("Number of browsers filling forms in parallel")
+        opt_layout.addWidget(QLabel("Parallel workers"), 6, 0)
+        opt_layout.addWidget(self._workers_spin, 6, 1)
+
+        # Resume: skip passports the status journal already marks SUCCESS
+        self._resume_chk = QCheckBox("Resume – skip passports already submitted")
+        self._resume_chk.setChecked(RESUME)
+        self._resume_chk.setToolTip(
+            "Skip passports recorded as SUCCESS in submission_status.csv next to the input file"
+        )
+        opt_layout.addWidget(self._resume_chk, 7, 0, 1, 2)
+
+        # Shrink passport photos before upload (needs Pillow)
+        self._preprocess_chk = QCheckBox("Compress passport images before upload")
+        self._preprocess_chk.setChecked(PREPROCESS_IMAGES)
+        self._preprocess_chk.setToolTip(
+            "Rotate, resize and re-encode large photos once before the run; results are cached"
+        )
+        opt_layout.addWidget(self._preprocess_chk, 8, 0, 1, 2)
+
+        # Attach to the operator's running Chrome instead of launching one
+        self._cdp_edit = QLineEdit(CDP_URL)
+        self._cdp_edit.setPlaceholderText("http://localhost:9222")
+        self._cdp_edit.setToolTip(
+            "DevTools URL of a Chrome started with --remote-debugging-port; its logged-in tabs are reused"
+        )
+        opt_layout.addWidget(QLabel("Attach to Chrome"), 9, 0)
+        opt_layout.addWidget(self._cdp_edit, 9, 1)
+
+        # Skip images, fonts and trackers on the form pages
+        self._block_chk = QCheckBox("Block images, fonts and trackers")
+        self._block_chk.setChecked(BLOCK_REQUESTS)
+        self._block_chk.setToolTip(
+            "Faster page loads: the form's own scripts and requests are kept, login pages are not filtered"
+        )
+        opt_layout.addWidget(self._block_chk, 10, 0, 1, 2)
+
+        # Keep the form's scripts and styles on disk between applicants and runs
+        self._assets_chk = QCheckBox("Cache the form's scripts and styles")
+        self._assets_chk.setChecked(CACHE_ASSETS)
+        self._assets_chk.setToolTip(
+            "Serve unchanged scripts, styles and fonts from ~/.cache/visa_autofill/assets"
+        )
+        opt_layout.addWidget(self._assets_chk, 11, 0, 1, 2)
         
         # Make the input columns stretch properly
         opt_layout.setColumnStretch(1, 1)
@@ -417,9 +478,15 @@ class VisaAutofillWindow(QMainWindow):
             "PLUS_DAY_TO_DATE": self._plus_spin.value(),
             "START_INDEX": int(self._start_index_edit.text().strip()),
             "IMAGE_FOLDER": self._image_folder_edit.text().strip(),
+            "WORKERS": self._workers_spin.value(),
+            "RESUME": self._resume_chk.isChecked(),
+            "PREPROCESS_IMAGES": self._preprocess_chk.isChecked(),
+            "CDP_URL": self._cdp_edit.text().strip(),
+            "BLOCK_REQUESTS": self._block_chk.isChecked(),
+            "CACHE_ASSETS": self._assets_chk.isChecked(),
         }
-        # fire background thread
-        threading.Thread(target=self._worker, args=(conf,), daemon=True).start()
+        # run on the browser host thread (keeps the browser warm between runs)
+        self._browser_host.submit(self._worker, conf)
 
     def _worker(self, conf):
         # Patch stdout/stderr for the duration
@@ -440,6 +507,10 @@ class VisaAutofillWindow(QMainWindow):
             call returns we can safely read that value from the worker thread.
             """
 
+            if self._closing:
+                # the window is gone – nobody can answer; cancel the run
+                sys.exit(0)
+
             # --- Yes / No question ------------------------------------------
             if "(y/n" in prompt.lower():
                 # Ensure attribute exists
@@ -467,6 +538,8 @@ class VisaAutofillWindow(QMainWindow):
                 Qt.ConnectionType.BlockingQueuedConnection,
                 Q_ARG(str, prompt),
             )
+            if self._closing:
+                sys.exit(0)
             return ""
 
         _builtin.input = gui_input   
@@ -482,7 +555,8 @@ class VisaAutofillWindow(QMainWindow):
             _sys.stdout, _sys.stderr = old_stdout, old_stderr
         
             QTimer.singleShot(0, lambda: self._run_btn.setEnabled(True))
-            QTimer.singleShot(0, lambda: (QMessageBox.information(self, "Visa Autofill", "Process finished."), None)[1])
+            if not self._closing:
+                QTimer.singleShot(0, lambda: (QMessageBox.information(self, "Visa Autofill", "Process finished."), None)[1])
             self._run_btn.setEnabled(True)
 
     # ------------------------------------------------------------------
@@ -496,6 +570,9 @@ class VisaAutofillWindow(QMainWindow):
     @pyqtSlot(str)
     def _ask_yes_no(self, prompt: str):
         """Yes/No dialog executed on the GUI thread.  Stores result on ``self``."""
+        if self._closing:
+            self._yes_no_result = "C"
+            return
 
         choice = QMessageBox.question(
             self,
@@ -511,8 +588,16 @@ class VisaAutofillWindow(QMainWindow):
     @pyqtSlot(str)
     def _show_info(self, prompt: str):
         """Simple information dialog executed on the GUI thread."""
+        if self._closing:
+            return
         QMessageBox.information(self, "Visa Autofill", prompt.strip())
 
+    def closeEvent(self, event):
+        # A run blocked on a prompt is cancelled rather than waited for
+        self._closing = True
+        self._browser_host.close()
+        super().closeEvent(event)
+
 
 # ------------------------------------------------------------------------
 
@@ -0,0 +1,271 @@
+"""Passport image lookup for ``IMAGE_FOLDER``.
+
+One ``os.scandir`` pass maps every file's normalised stem (trimmed, upper
+case) to its path, so ``E01203813.JPG`` or ``e01203813.png`` are found too and
+looking an applicant up is a dict access instead of a ``stat`` per candidate
+extension – which adds up on network-mounted image shares.
+
+With ``PREPROCESS_IMAGES`` the images of a run are also prepared before the
+browser starts: EXIF rotation applied, the long side capped at
+``IMAGE_MAX_SIDE`` and re-encoded as JPEG under ``IMAGE_MAX_KB``, in a process
+pool.  Results are cached on disk under a hash of the file content and those
+settings, so a re-run prepares nothing twice.  This needs Pillow; without it
+the original files are uploaded.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional – only needed for PREPROCESS_IMAGES
+    Image = ImageOps = None
+
+# Preferred when one passport has several files; other extensions rank last
+IMAGE_SUFFIXES = (".jpeg", ".jpg", ".png")
+
+
+def normalize_passport(value: Any) -> str:
+    return str(value).strip().upper() if value is not None else ""
+
+
+def _rank(name: str) -> int:
+    suffix = os.path.splitext(name)[1].lower()
+    return (
+        IMAGE_SUFFIXES.index(suffix)
+        if suffix in IMAGE_SUFFIXES
+        else len(IMAGE_SUFFIXES)
+    )
+
+
+class ImageIndex:
+    """Normalised passport number → image file of one folder."""
+
+    def __init__(self, folder: Path):
+        self.folder = Path(folder)
+        self.files: Dict[str, Path] = {}
+        self.build()
+
+    def build(self):
+        files: Dict[str, Path] = {}
+        try:
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or not entry.is_file():
+                        continue
+                    key = normalize_passport(os.path.splitext(entry.name)[0])
+                    current = files.get(key)
+                    if current is None or _rank(entry.name) < _rank(current.name):
+                        files[key] = Path(entry.path)
+        except FileNotFoundError:
+            logging.warning("Image folder %s does not exist", self.folder)
+        self.files = files
+        logging.info("Indexed %d images in %s", len(files), self.folder)
+
+    def find(self, passport_number: Any) -> Optional[Path]:
+        return self.files.get(normalize_passport(passport_number))
+
+    def split(
+        self, applicants: Iterable[Dict[str, Any]]
+    ) -> Tuple[List[Path], List[str]]:
+        """Images of *applicants*, and passports (or row labels) without one."""
+        found, missing = [], []
+        for row_num, applicant in enumerate(applicants):
+            passport = applicant.get("passport_number")
+            image = self.find(passport)
+            if image:
+                found.append(image)
+            else:
+                missing.append(
+                    str(passport) if passport else f"row {row_num} (no passport)"
+                )
+        return found, missing
+
+    def missing(self, applicants: Iterable[Dict[str, Any]]) -> List[str]:
+        """Passport numbers (or row labels) of *applicants* without an image."""
+        return self.split(applicants)[1]
+
+
+_indexes: Dict[Path, ImageIndex] = {}
+
+
+def image_index(folder: Path, refresh: bool = False) -> ImageIndex:
+    """Shared index of *folder*, built on first use (or again with *refresh*)."""
+    key = Path(folder).resolve()
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = ImageIndex(key)
+    elif refresh:
+        index.build()
+    return index
+
+
+def check_images(folder: Path, applicants: Iterable[Dict[str, Any]]) -> List[Path]:
+    """Print which of *applicants* have no image in *folder*; return the rest."""
+    found, missing = image_index(folder).split(applicants)
+    if missing:
+        shown = ", ".join(missing[:20]) + (" …" if len(missing) > 20 else "")
+        print(
+            f"⚠️ {len(missing)} applicant(s) have no passport image in {folder}: {shown}"
+        )
+        logging.warning("%d applicants without passport image", len(missing))
+    else:
+        print(f"✅ Every applicant has a passport image in {folder}")
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Preprocessing ---------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "visa_autofill" / "images"
+
+# Tried in turn until the encoded image fits the target size
+JPEG_QUALITIES = (90, 85, 80, 75, 70, 60, 50)
+
+# source image → prepared file, filled by prepare_images()
+_prepared: Dict[Path, Path] = {}
+
+
+def _cache_key(data: bytes, max_side: int, max_kb: int) -> str:
+    digest = hashlib.sha256(data)
+    digest.update(f"|{max_side}|{max_kb}".encode())
+    return digest.hexdigest()[:32]
+
+
+def _encode(image: "Image.Image", max_bytes: int) -> bytes:
+    for quality in JPEG_QUALITIES:
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=quality, optimize=True)
+        if buffer.tell() <= max_bytes:
+            break
+    return buffer.getvalue()
+
+
+def preprocess_image(source: Path, cache_dir: Path, max_side: int, max_kb: int) -> Path:
+    """Prepared copy of *source* in *cache_dir*, or *source* itself.
+
+    The source is returned unchanged when it is already an upright JPEG within
+    the limits.  Raises when it cannot be read or decoded (the pool workers of
+    :func:`prepare_images` turn that into an error result).  Runs in pool
+    workers, so it only takes picklable arguments and touches no module state.
+    """
+    data = source.read_bytes()
+    target = cache_dir / f"{_cache_key(data, max_side, max_kb)}.jpg"
+    if target.exists():
+        return target
+
+    max_bytes = max_kb * 1024
+    with Image.open(io.BytesIO(data)) as image:
+        upright = (
+            image.format == "JPEG"
+            and image.getexif().get(0x0112, 1) == 1  # EXIF orientation
+        )
+        if upright and max(image.size) <= max_side and len(data) <= max_bytes:
+            return source
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        encoded = _encode(image, max_bytes)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(encoded)
+        os.replace(tmp, target)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return target
+
+
+def _prepare(
+    source: Path, cache_dir: Path, max_side: int, max_kb: int
+) -> Tuple[Path, str]:
+    """Pool worker: the prepared path and ``""``, or *source* and the error.
+
+    Any failure – an unreadable file, a decompression bomb, a full disk – stays
+    with its image instead of aborting ``pool.map`` for the whole run; the
+    portal then gets the original, as before.
+    """
+    try:
+        return preprocess_image(source, cache_dir, max_side, max_kb), ""
+    except Exception as e:
+        return source, f"{type(e).__name__}: {e}"
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def prepare_images(
+    images: Iterable[Path],
+    cache_dir: Optional[Path] = None,
+    max_side: int = 2000,
+    max_kb: int = 1024,
+    workers: Optional[int] = None,
+) -> Dict[Path, Path]:
+    """Preprocess *images* ahead of the run; :func:`upload_path` then uses them.
+
+    Decoding and re-encoding are CPU bound, so they run in a process pool.  A
+    frozen (PyInstaller) build would start the GUI again in every spawned
+    process, so there threads do the work instead.
+    """
+    if Image is None:
+        logging.warning("Pillow is not installed – uploading images unprocessed")
+        print("⚠️ Image preprocessing needs Pillow (pip install Pillow) – skipped")
+        return {}
+
+    sources = list(dict.fromkeys(Path(image) for image in images))
+    if not sources:
+        return {}
+    cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+    executor = (
+        ThreadPoolExecutor if getattr(sys, "frozen", False) else ProcessPoolExecutor
+    )
+    results: Dict[Path, Path] = {}
+    failed: Dict[Path, str] = {}
+    with executor(max_workers=workers) as pool:
+        prepared = pool.map(
+            _prepare,
+            sources,
+            [cache_dir] * len(sources),
+            [max_side] * len(sources),
+            [max_kb] * len(sources),
+        )
+        for source, (path, error) in zip(sources, prepared):
+            results[source] = path
+            if error:
+                failed[source] = error
+
+    _prepared.update(results)
+    for source, error in failed.items():
+        logging.warning("Cannot preprocess %s: %s", source, error)
+    before = sum(_size(source) for source in sources)
+    after = sum(_size(path) for path in results.values())
+    print(
+        f"🖼 Prepared {len(sources) - len(failed)} image(s): "
+        f"{before / 1024**2:.1f} MB → {after / 1024**2:.1f} MB"
+    )
+    if failed:
+        print(
+            f"⚠️ {len(failed)} image(s) could not be prepared and are uploaded "
+            f"as they are (see the log)"
+        )
+    return results
+
+
+def upload_path(image: Path) -> Path:
+    """What to upload for *image*: its prepared copy when there is one."""
+    prepared = _prepared.get(Path(image))
+    return prepared if prepared is not None and prepared.exists() else Path(image)
@@ -0,0 +1,243 @@
+"""Travel itinerary table: flights and hotel address per arrival city.
+
+Step 6 needs an arrival flight, a departure flight and an address to stay for
+the applicant's ``travel_city``.  They used to live in four parallel lists in
+``visa_steps``; now they are a table keyed by city, loaded from
+``ITINERARY_FILE`` (JSON or CSV, next to the data file) and checked as a whole
+when it is loaded.  A city may list several flights and addresses; which one
+an applicant gets is picked round-robin, or by arrival date so everyone
+arriving on the same day shares a flight.  Without the file the built-in table
+below is used.
+
+JSON::
+
+    {
+      "selection": "round-robin",
+      "cities": {
+        "ShangHai,Shanghai": {
+          "arrival_flights": ["VN3542", "VJ5232"],
+          "departure_flights": ["VN3543", "VJ5233"],
+          "addresses": ["Heng Sheng WanLi Square, ..."]
+        }
+      }
+    }
+
+CSV – one row per option, blank cells allowed, ``selection`` is round-robin::
+
+    city,arrival_flight,departure_flight,address
+"""
+
+import csv
+import itertools
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from visa_dates import to_ymd
+
+ROUND_ROBIN, BY_DATE = "round-robin", "date"
+SELECTIONS = (ROUND_ROBIN, BY_DATE)
+
+# Applicant columns an itinerary fills (a value already in the row wins)
+TRAVEL_COLUMNS = ("arrival_flight_no", "departure_flight_no", "address_to_stay")
+
+
+class ItineraryError(ValueError):
+    """The itinerary file is unreadable or inconsistent."""
+
+
+@dataclass(frozen=True)
+class CityTravel:
+    """Travel options of one arrival city (the form's "Province,City" option)."""
+
+    city: str
+    arrival_flights: Tuple[str, ...]
+    departure_flights: Tuple[str, ...]
+    addresses: Tuple[str, ...]
+
+
+class Itinerary:
+    """City → :class:`CityTravel`, with the per-applicant choice of options."""
+
+    def __init__(self, cities: Mapping[str, CityTravel], selection: str = ROUND_ROBIN):
+        self.cities: Dict[str, CityTravel] = dict(cities)
+        self.selection = selection
+        self._lock = threading.Lock()
+        self._turns: Dict[str, Iterator[int]] = {}
+
+    def __contains__(self, city: Any) -> bool:
+        return city in self.cities
+
+    def city_names(self) -> List[str]:
+        return list(self.cities)
+
+    def _turn(self, city: str, applicant: Mapping[str, Any]) -> int:
+        if self.selection == BY_DATE and applicant.get("date_of_arrival"):
+            return date(*to_ymd(applicant["date_of_arrival"])).toordinal()
+        with self._lock:
+            return next(self._turns.setdefault(city, itertools.count()))
+
+    def choose(
+        self, city: str, applicant: Optional[Mapping[str, Any]] = None
+    ) -> Dict[str, str]:
+        """The flights and address for one applicant travelling to *city*."""
+        travel = self.cities.get(city)
+        if travel is None:
+            raise ValueError(
+                f"Unknown travel city {city!r} (expected one of: "
+                f"{', '.join(self.cities)})"
+            )
+        turn = self._turn(city, applicant or {})
+        return {
+            "arrival_flight_no": travel.arrival_flights[
+                turn % len(travel.arrival_flights)
+            ],
+            "departure_flight_no": travel.departure_flights[
+                turn % len(travel.departure_flights)
+            ],
+            "address_to_stay": travel.addresses[turn % len(travel.addresses)],
+            "travel_city": city,
+        }
+
+    def plan_travel(self, applicant: Dict[str, Any]) -> Dict[str, Any]:
+        """*applicant* with the :data:`TRAVEL_COLUMNS` it leaves blank filled."""
+        if all(applicant.get(column) for column in TRAVEL_COLUMNS):
+            return applicant
+        city = str(applicant.get("travel_city") or "").strip()
+        chosen = self.choose(city, applicant)
+        return {
+            **applicant,
+            **{
+                column: applicant.get(column) or chosen[column]
+                for column in TRAVEL_COLUMNS
+            },
+        }
+
+
+# fmt: off
+DEFAULT_CITIES = {
+    "ShangHai,Shanghai": CityTravel(
+        "ShangHai,Shanghai", ("VN3542",), ("VN3543",),
+        ("Heng Sheng WanLi Square, No. 3, Shanghai Int'l Tourism Resort and Disney Land",),
+    ),
+    "GuangDong,Guangzhou": CityTravel(
+        "GuangDong,Guangzhou", ("VN0502",), ("VN0503",),
+        ("Room 2120, Floor 21 Zheng Jia Huan Shi Centre Building, No.372 Huanshi East Road, Yuexiu District, Guangzhou,China, 510000",),
+    ),
+    "GuangDong,Shenzhen": CityTravel(
+        "GuangDong,Shenzhen", ("VN3544",), ("VN3545",),
+        ("Golden Bull Plaza Tianxia International Center, Nanshan Science and Technology Park, Shenzhen",),
+    ),
+    "FuJian,Xiamen": CityTravel(
+        "FuJian,Xiamen", ("VN3550",), ("VN3531",),
+        ("Room 2120, Floor 21 Zheng Jia Huan Shi Centre Building, No.372 Huanshi East Road, Yuexiu District, Guangzhou,China, 510000",),
+    ),
+}
+# fmt: on
+
+
+# -- loading ---------------------------------------------------------------------
+
+
+def _options(value: Any, where: str, problems: List[str]) -> Tuple[str, ...]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        problems.append(f"{where}: expected a list of strings")
+        return ()
+    options = tuple(str(item).strip() for item in value if str(item).strip())
+    if not options:
+        problems.append(f"{where}: needs at least one entry")
+    return options
+
+
+def parse_itinerary(data: Any, source: str = "itinerary") -> Itinerary:
+    """Build an :class:`Itinerary` from decoded JSON, reporting every problem."""
+    if not isinstance(data, dict) or not isinstance(data.get("cities"), dict):
+        raise ItineraryError(f"{source}: expected an object with a 'cities' object")
+    problems: List[str] = []
+    selection = data.get("selection", ROUND_ROBIN)
+    if selection not in SELECTIONS:
+        problems.append(f"selection {selection!r} is not one of {SELECTIONS}")
+
+    cities: Dict[str, CityTravel] = {}
+    for city, entry in data["cities"].items():
+        city = str(city).strip()
+        if not city:
+            problems.append("a city has an empty name")
+            continue
+        if not isinstance(entry, dict):
+            problems.append(f"{city}: expected an object")
+            continue
+        cities[city] = CityTravel(
+            city,
+            _options(entry.get("arrival_flights"), f"{city}.arrival_flights", problems),
+            _options(
+                entry.get("departure_flights"), f"{city}.departure_flights", problems
+            ),
+            _options(entry.get("addresses"), f"{city}.addresses", problems),
+        )
+    if not cities:
+        problems.append("no cities")
+    if problems:
+        raise ItineraryError(f"{source}: " + "; ".join(problems))
+    return Itinerary(cities, selection)
+
+
+def _csv_data(rows: Iterable[Dict[str, str]]) -> Dict[str, Any]:
+    cities: Dict[str, Dict[str, List[str]]] = {}
+    for row in rows:
+        city = (row.get("city") or "").strip()
+        entry = cities.setdefault(
+            city, {"arrival_flights": [], "departure_flights": [], "addresses": []}
+        )
+        for column, key in (
+            ("arrival_flight", "arrival_flights"),
+            ("departure_flight", "departure_flights"),
+            ("address", "addresses"),
+        ):
+            if (row.get(column) or "").strip():
+                entry[key].append(row[column])
+    return {"selection": ROUND_ROBIN, "cities": cities}
+
+
+def load_itinerary(path: Optional[Path]) -> Itinerary:
+    """Load *path* (JSON or CSV); the built-in table when it does not exist."""
+    if path is None or not Path(path).exists():
+        logging.info("No itinerary file %s – using the built-in table", path)
+        return Itinerary(DEFAULT_CITIES)
+    path = Path(path)
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            if path.suffix.lower() == ".csv":
+                data = _csv_data(csv.DictReader(fh))
+            else:
+                data = json.load(fh)
+    except (OSError, ValueError) as e:
+        raise ItineraryError(f"{path}: {e}") from e
+    itinerary = parse_itinerary(data, str(path))
+    logging.info(
+        "Loaded itinerary for %d cities from %s (%s)",
+        len(itinerary.cities),
+        path,
+        itinerary.selection,
+    )
+    return itinerary
+
+
+_active = Itinerary(DEFAULT_CITIES)
+
+
+def itinerary() -> Itinerary:
+    """The itinerary of the current run."""
+    return _active
+
+
+def use_itinerary(table: Itinerary) -> Itinerary:
+    global _active
+    _active = table
+    return table
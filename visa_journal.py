@@ -0,0 +1,214 @@
+"""Append-only submission status journal.
+
+Every finished applicant is appended to a CSV file in the layout of
+``submission_status.csv`` (:data:`JOURNAL_COLUMNS`: the applicant columns plus
+``status`` / ``error``) and fsynced before the run moves on, so a crash loses
+at most the applicant in flight.  Every row is written against that one
+header, whichever applicant finishes first.  A journal with fewer columns – an
+older release's – or a result with columns of its own (an extra spreadsheet
+column) rewrites the file with the union of both headers rather than losing a
+field.  With ``RESUME`` the journal is read back first and passports already
+recorded as ``SUCCESS`` are skipped – no hunting for ``START_INDEX`` and no
+finished work redone.
+"""
+
+import csv
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from visa_itinerary import TRAVEL_COLUMNS
+
+# Batch bookkeeping that does not belong in the status file
+_INTERNAL_KEYS = {"row"}
+
+# The spreadsheet's columns (application.xlsx)
+APPLICANT_COLUMNS = (
+    "full_name",
+    "birth_date",
+    "country",
+    "province",
+    "city",
+    "marital_status",
+    "id_number",
+    "passport_type",
+    "passport_number",
+    "place_of_issue",
+    "visa_type",
+    "entries",
+    "occupation",
+    "home_address",
+    "phone_number",
+    "father_fullname",
+    "father_nationality",
+    "father_dob",
+    "mother_fullname",
+    "mother_nationality",
+    "mother_dob",
+    "spouse_fullname",
+    "spouse_dob",
+    "spouse_nationality",
+    "spouse_city",
+    "children_fullname",
+    "children_nationality",
+    "children_dob",
+    "date_of_arrival",
+    "travel_city",
+    "emergency_fullname",
+    "emergency_relationship",
+    "emergency_phone",
+)
+
+# Columns closing every journal row, after the applicant's own
+RESULT_COLUMNS = ("status", "error", "recorded_at")
+
+# The header of a new journal: the spreadsheet's columns, those a run adds
+# (the itinerary's choice, the applicant store's image) and the result
+JOURNAL_COLUMNS = APPLICANT_COLUMNS + TRAVEL_COLUMNS + ("image_path",) + RESULT_COLUMNS
+
+
+def _merged(header: Iterable[str], columns: Iterable[str]) -> List[str]:
+    """*header* plus the *columns* it lacks, result columns kept last."""
+    merged = [key for key in header if key not in RESULT_COLUMNS]
+    merged += [
+        key for key in columns if key not in merged and key not in RESULT_COLUMNS
+    ]
+    return merged + list(RESULT_COLUMNS)
+
+
+class Journal:
+    """Thread-safe, append-only CSV of submission results."""
+
+    def __init__(self, path: Path, columns: Iterable[str] = JOURNAL_COLUMNS):
+        self.path = Path(path)
+        self.columns = tuple(columns)
+        self._lock = threading.Lock()
+        self._fh = None
+        self._writer: Optional[csv.DictWriter] = None
+
+    # -- reading ---------------------------------------------------------------
+
+    def _header(self) -> List[str]:
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return []
+        with open(self.path, newline="", encoding="utf-8-sig") as fh:
+            return next(csv.reader(fh), [])
+
+    def succeeded(self) -> Set[str]:
+        """Passport numbers with at least one ``SUCCESS`` entry."""
+        if not self._header():
+            return set()
+        with open(self.path, newline="", encoding="utf-8-sig") as fh:
+            return {
+                row["passport_number"]
+                for row in csv.DictReader(fh)
+                # a row cut short by a crash has no status and is redone
+                if row.get("status") == "SUCCESS" and row.get("passport_number")
+            }
+
+    # -- writing -----------------------------------------------------------------
+
+    def _open(self):
+        fieldnames = self._header()
+        if fieldnames and set(self.columns) - set(fieldnames):
+            self._migrate(_merged(fieldnames, self.columns))
+            return
+        complete = True
+        if fieldnames:
+            with open(self.path, "rb") as fh:
+                fh.seek(-1, os.SEEK_END)
+                complete = fh.read(1) in (b"\n", b"\r")
+        self._fh = open(self.path, "a", newline="", encoding="utf-8")
+        if not complete:
+            # finish the line a crash left half written
+            self._fh.write("\n")
+        self._writer = csv.DictWriter(
+            self._fh, fieldnames=fieldnames or list(self.columns), restval=""
+        )
+        if not fieldnames:
+            self._writer.writeheader()
+
+    def _migrate(self, fieldnames: List[str]):
+        """Rewrite the journal under the wider header *fieldnames*, atomically."""
+        if self._fh is not None:
+            self._fh.close()
+        with open(self.path, newline="", encoding="utf-8-sig") as fh:
+            rows = list(csv.DictReader(fh))
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", newline="", encoding="utf-8") as fh:
+            # extrasaction: cells beyond the old header (None key) were never named
+            writer = csv.DictWriter(
+                fh, fieldnames=fieldnames, restval="", extrasaction="ignore"
+            )
+            writer.writeheader()
+            writer.writerows(rows)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
+        logging.info("Journal %s now has the columns %s", self.path, fieldnames)
+        self._fh = open(self.path, "a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._fh, fieldnames=fieldnames, restval="")
+
+    def record(self, result: Dict[str, Any]):
+        """Append *result* and force it to disk."""
+        row = {k: v for k, v in result.items() if k not in _INTERNAL_KEYS}
+        row["recorded_at"] = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            if self._writer is None:
+                self._open()
+            fieldnames = self._writer.fieldnames
+            if set(row) - set(fieldnames):
+                self._migrate(_merged(fieldnames, row))
+            self._writer.writerow(row)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = self._writer = None
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class JournalGroup:
+    """Record every result in several journals (e.g. CSV and applicant store)."""
+
+    def __init__(self, *journals):
+        self.journals = [journal for journal in journals if journal is not None]
+
+    def record(self, result: Dict[str, Any]):
+        for journal in self.journals:
+            journal.record(result)
+
+    def close(self):
+        for journal in self.journals:
+            journal.close()
+
+    def __enter__(self) -> "JournalGroup":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def skip_succeeded(
+    applicants: Iterable[Dict[str, Any]], done: Set[str], quiet: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """Drop applicants whose passport is already in *done*."""
+    for applicant in applicants:
+        passport = applicant.get("passport_number")
+        if passport and str(passport) in done:
+            if not quiet:
+                logging.info("Skipping passport %s – already submitted", passport)
+                print(f"⏭ Skipping {passport} – already marked SUCCESS")
+            continue
+        yield applicant
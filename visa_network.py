@@ -0,0 +1,177 @@
+"""Request filter for the form pages.
+
+Every step of the form app pulls in images, fonts and third-party analytics
+and tracking scripts that the automation never looks at, and each of them
+costs a download on every page load.  :class:`RequestFilter` is a Playwright
+``route`` handler that aborts those requests and lets the rest through.  It is
+installed once a page has reached the form, so login pages (and their
+captchas) are never filtered.
+
+Rules, first match wins:
+
+1. a host on the deny list is blocked (analytics, trackers, ad pixels);
+2. a host on the allow list is never blocked;
+3. documents, scripts, stylesheets and the form's XHR/fetch calls are never
+   blocked by type; any type in ``block_types`` is;
+4. with ``block_third_party``, requests to hosts outside the form's own sites
+   are blocked – off by default, since a script the form loads from a CDN
+   would be blocked too unless its host is allow-listed.
+
+Host entries match the host and its subdomains (``baidu.com`` also matches
+``hm.baidu.com``).  Blocked requests are counted per reason, and bytes
+actually downloaded are counted from ``Content-Length``.  An aborted request
+never reports a size, so its saving cannot be measured.  Calling
+:meth:`RequestFilter.report` with the snapshot taken before an applicant
+gives that applicant's share.
+"""
+
+import logging
+import weakref
+from collections import Counter
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+# Resource types blocked by default – the form works without all of them
+BLOCK_TYPES = ("image", "media", "font")
+
+# Types the form cannot work without, whatever ``block_types`` says
+ESSENTIAL_TYPES = {"document", "script", "stylesheet", "xhr", "fetch"}
+
+# Analytics / tracking hosts seen on or typical for the portal's pages
+TRACKER_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "hm.baidu.com",
+    "cnzz.com",
+    "umeng.com",
+    "facebook.net",
+    "clarity.ms",
+)
+
+# Second-level labels under which a site is one label deeper (consular.mfa.gov.cn)
+_PUBLIC_SECOND_LEVEL = {"com", "gov", "org", "net", "edu", "co", "ac"}
+
+DOWNLOADED = "downloaded bytes"
+
+
+def site_of(host: str) -> str:
+    """The registrable part of *host*: ``mfa.gov.cn`` for ``consular.mfa.gov.cn``."""
+    labels = host.lower().rstrip(".").split(".")
+    keep = 2
+    if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in _PUBLIC_SECOND_LEVEL:
+        keep = 3
+    return ".".join(labels[-keep:])
+
+
+def host_matches(host: str, entries: Iterable[str]) -> bool:
+    host = host.lower()
+    for entry in entries:
+        entry = entry.lower().lstrip(".")
+        if host == entry or host.endswith("." + entry):
+            return True
+    return False
+
+
+class RequestFilter:
+    """Route handler aborting the requests the form pages do not need."""
+
+    def __init__(
+        self,
+        first_party: Iterable[str] = (),
+        block_types: Iterable[str] = BLOCK_TYPES,
+        block_third_party: bool = False,
+        allow_hosts: Iterable[str] = (),
+        deny_hosts: Iterable[str] = TRACKER_HOSTS,
+    ):
+        # first_party: URLs or hosts of the form's own sites
+        self.sites = {
+            site_of(urlparse(url).hostname or url) for url in first_party if url
+        }
+        self.block_types = set(block_types) - ESSENTIAL_TYPES
+        self.block_third_party = block_third_party
+        self.allow_hosts = tuple(allow_hosts)
+        self.deny_hosts = tuple(deny_hosts)
+        self.counts: Counter = Counter()
+
+    def reason(self, url: str, resource_type: str) -> Optional[str]:
+        """Why a request is blocked, or ``None`` to let it through."""
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            return None  # data:, blob: – nothing to download
+        host = parsed.hostname or ""
+        if host_matches(host, self.deny_hosts):
+            return "denied host"
+        if host_matches(host, self.allow_hosts):
+            return None
+        if resource_type in self.block_types:
+            return resource_type
+        if self.block_third_party and self.sites and site_of(host) not in self.sites:
+            return "third-party"
+        return None
+
+    # -- Playwright handlers -----------------------------------------------------
+
+    def _blocked(self, request) -> Optional[str]:
+        reason = self.reason(request.url, request.resource_type)
+        if reason:
+            self.counts[reason] += 1
+            logging.debug("Blocked %s (%s)", request.url, reason)
+        return reason
+
+    def _downloaded(self, response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.counts[DOWNLOADED] += int(length)
+
+    def handle(self, route):
+        if self._blocked(route.request):
+            route.abort("blockedbyclient")
+        else:
+            route.fallback()  # later routes (or the network) handle it
+
+    async def handle_async(self, route):
+        if self._blocked(route.request):
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()
+
+    def install(self, target):
+        """Filter a sync ``BrowserContext`` or ``Page``."""
+        target.route("**/*", self.handle)
+        target.on("response", self._downloaded)
+
+    async def install_async(self, target):
+        """Filter an async ``BrowserContext`` or ``Page``."""
+        await target.route("**/*", self.handle_async)
+        target.on("response", self._downloaded)
+
+    # -- reporting ---------------------------------------------------------------
+
+    def snapshot(self) -> Counter:
+        return Counter(self.counts)
+
+    def report(self, since: Optional[Counter] = None) -> str:
+        """Requests blocked (by reason) and bytes downloaded since *since*."""
+        delta = self.counts - (since or Counter())
+        downloaded = delta.pop(DOWNLOADED, 0)
+        blocked = sum(delta.values())
+        reasons = ", ".join(f"{reason} {n}" for reason, n in delta.most_common())
+        return (
+            f"blocked {blocked} requests"
+            + (f" ({reasons})" if reasons else "")
+            + f", downloaded {downloaded / 1024:.0f} KB"
+        )
+
+
+_filters: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def page_filter(page) -> Optional[RequestFilter]:
+    """The filter installed for *page*, if any."""
+    return _filters.get(page)
+
+
+def register(page, request_filter: RequestFilter) -> RequestFilter:
+    _filters[page] = request_filter
+    return request_filter
@@ -0,0 +1,173 @@
+"""A warm browser kept alive between GUI runs.
+
+Every click of "Run" used to start a Playwright driver and launch Chromium,
+only to close both when the run ended.  :class:`BrowserHost` owns one
+long-lived thread holding a driver and a launched browser; runs are submitted
+to that thread (the sync API only works on the thread that started it) and a
+single-page ``main`` running there takes the warm browser instead of launching
+one – a fresh ``BrowserContext`` per run keeps runs isolated.
+
+Before each run the browser is health-checked with a context round-trip; a
+crashed or disconnected browser (or a dead driver) is relaunched, so a run
+never inherits a broken one.  Batch and async runs still start their own
+drivers, one per worker thread or event loop.
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from playwright.sync_api import Error as PlaywrightError
+from playwright.sync_api import sync_playwright
+
+import visa_autofill as va
+from visa_probe import cached_browser
+
+_local = threading.local()
+
+
+def current_host() -> Optional["BrowserHost"]:
+    """The :class:`BrowserHost` whose thread is running the caller, if any."""
+    return getattr(_local, "host", None)
+
+
+class BrowserHost:
+    """One thread owning a Playwright driver and a warm browser."""
+
+    def __init__(self):
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._serve, name="browser-host", daemon=True
+        )
+        self._playwright = None
+        self._browser = None
+        self._headless: Optional[bool] = None
+        # Set while a job runs – it may be blocked on the operator
+        self._busy = threading.Event()
+
+    def start(self, warm: bool = True) -> "BrowserHost":
+        """Start the host thread and, if a browser is known to work, launch it.
+
+        Warming up is skipped until the first run when no browser has been
+        probed yet – finding one may need to ask the operator.
+        """
+        self._thread.start()
+        if warm and cached_browser() is not None:
+            self.submit(self.browser)
+        return self
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Run ``fn(*args, **kwargs)`` on the host thread."""
+        future: Future = Future()
+        self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    # -- host thread -----------------------------------------------------------
+
+    def _serve(self):
+        _local.host = self
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            future, fn, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._busy.set()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except SystemExit as exc:  # "Cancel" in a GUI prompt
+                logging.info("Run cancelled")
+                future.set_exception(exc)
+            except BaseException as exc:
+                logging.exception("Browser host job failed")
+                future.set_exception(exc)
+            finally:
+                self._busy.clear()
+        self._shutdown()
+
+    def _healthy(self) -> bool:
+        if self._browser is None or not self._browser.is_connected():
+            return False
+        if self._headless != va.HEADLESS:
+            return False
+        try:
+            self._browser.new_context().close()
+        except PlaywrightError as e:
+            logging.warning("Warm browser failed its health check: %s", e)
+            return False
+        return True
+
+    def _launch(self):
+        if self._playwright is None:
+            # Sets PLAYWRIGHT_BROWSERS_PATH, which the driver reads at start
+            va.ensure_browsers_available()
+            self._playwright = sync_playwright().start()
+        self._browser = va.launch_browser(self._playwright)
+        self._headless = va.HEADLESS
+
+    def browser(self):
+        """The warm browser, relaunched first if it is gone (host thread only)."""
+        if threading.current_thread() is not self._thread:
+            raise RuntimeError("BrowserHost.browser() called off the host thread")
+        if self._healthy():
+            return self._browser
+        if self._browser is not None:
+            logging.info("Relaunching the warm browser")
+            self._close_browser()
+        try:
+            self._launch()
+        except PlaywrightError:
+            # The driver itself may have died with the browser – restart both
+            logging.warning("Restarting the Playwright driver", exc_info=True)
+            self._stop_driver()
+            self._launch()
+        return self._browser
+
+    def _close_browser(self):
+        try:
+            self._browser.close()
+        except PlaywrightError:
+            pass
+        self._browser = None
+
+    def _stop_driver(self):
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:  # already gone
+                pass
+            self._playwright = None
+
+    def _shutdown(self):
+        if self._browser is not None:
+            self._close_browser()
+        self._stop_driver()
+
+    # -- any thread ------------------------------------------------------------
+
+    @property
+    def busy(self) -> bool:
+        """Whether a submitted job is running on the host thread."""
+        return self._busy.is_set()
+
+    def close(self, timeout: float = 10):
+        """Close the browser and stop the host thread.
+
+        Waits up to *timeout* for an idle host to close its browser.  A job
+        still running is not waited for: it may be blocked on a prompt that
+        only the closing caller could answer.  The host thread is a daemon and
+        shuts the browser down once that job returns, or dies with the process.
+        """
+        if self._thread.is_alive():
+            self._jobs.put(None)
+            if not self.busy:
+                self._thread.join(timeout)
+
+    def __enter__(self) -> "BrowserHost":
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        self.close()
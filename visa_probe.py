@@ -0,0 +1,74 @@
+"""On-disk cache of the browser found by ``ensure_browsers_available``.
+
+Finding a browser means starting a Playwright driver to ask for Chromium's
+executable path and, failing that, launching every system Chrome candidate
+once – seconds on each start.  The browser that worked is remembered in
+:data:`PROBE_FILE` (its path, size, mtime and, when known, version) and a later
+start only ``stat``s that path: same file, same Playwright release, same
+``PLAYWRIGHT_BROWSERS_PATH`` – no driver, no browser.  An updated or removed
+browser no longer matches and the full probe runs again.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+PROBE_FILE = Path.home() / ".cache" / "visa_autofill" / "browser_probe.json"
+
+PLAYWRIGHT, SYSTEM = "playwright", "system"
+
+
+def _playwright_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("playwright")
+    except Exception:  # frozen builds may ship without package metadata
+        return ""
+
+
+def _fingerprint(path: str) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {
+        "path": path,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "playwright": _playwright_version(),
+        "browsers_path": os.environ.get("PLAYWRIGHT_BROWSERS_PATH", ""),
+    }
+
+
+def cached_browser() -> Optional[Dict[str, Any]]:
+    """The remembered browser if it is still the same file, else ``None``."""
+    try:
+        with open(PROBE_FILE, encoding="utf-8") as fh:
+            probe = json.load(fh)
+        current = _fingerprint(probe["path"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if any(probe.get(key) != value for key, value in current.items()):
+        logging.info("Browser changed since the last probe – probing again")
+        return None
+    return probe
+
+
+def remember_browser(path: str, kind: str = PLAYWRIGHT, version: str = ""):
+    """Record a browser that was just found to work."""
+    try:
+        probe = {**_fingerprint(path), "kind": kind, "version": version}
+        PROBE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = PROBE_FILE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(probe, indent=2), encoding="utf-8")
+        os.replace(tmp, PROBE_FILE)
+    except OSError as e:
+        logging.warning("Could not cache the browser probe: %s", e)
+
+
+def forget_browser():
+    """Drop the cached probe, e.g. after the cached browser failed to launch."""
+    try:
+        PROBE_FILE.unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,115 @@
+"""Saved login session (Playwright ``storage_state``) shared between runs.
+
+After the operator logs in once, the cookies and local storage of that context
+are written to a session file; later runs – and every parallel worker context
+of a run – start from it and go straight to the form.  A session is not used
+when it is older than ``SESSION_MAX_AGE_HOURS``, one of its cookies has
+expired or none of them belongs to the portal, and the engines drop it as
+soon as the portal sends them back to the login page, so a dead session costs
+one page load and then the usual login.
+
+The file holds authentication cookies: it lives in the user's cache directory
+by default and is only readable by its owner.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+DEFAULT_SESSION_DIR = Path.home() / ".cache" / "visa_autofill"
+
+
+def session_path(configured: str, account: str) -> Path:
+    """*configured*, or a per-account file in :data:`DEFAULT_SESSION_DIR`."""
+    if configured:
+        return Path(configured)
+    digest = hashlib.sha1(account.strip().lower().encode()).hexdigest()[:12]
+    return DEFAULT_SESSION_DIR / f"session-{digest}.json"
+
+
+def _sets_cookies_for(domain: str, host: str) -> bool:
+    domain = domain.lstrip(".").lower()
+    return host == domain or host.endswith("." + domain)
+
+
+def expired_reason(
+    state: Dict[str, Any],
+    saved_at: float,
+    max_age_hours: float,
+    urls: Iterable[str] = (),
+) -> Optional[str]:
+    """Why *state* cannot be reused, or ``None`` when it looks alive.
+
+    With *urls* (the portal's login and form pages) at least one cookie must
+    belong to one of their hosts – a session saved for another portal is not
+    a login to this one.
+    """
+    now = time.time()
+    if max_age_hours and now - saved_at > max_age_hours * 3600:
+        return f"older than {max_age_hours:g} h"
+    cookies = state.get("cookies")
+    if not cookies or not isinstance(cookies, list):
+        return "no cookies"
+    if not all(isinstance(cookie, dict) for cookie in cookies):
+        return "malformed cookies"
+    for cookie in cookies:
+        expires = cookie.get("expires", -1)
+        if expires is not None and 0 < expires < now:
+            return f"cookie {cookie.get('name')} expired"
+    hosts = [urlparse(url).hostname for url in urls if url]
+    hosts = [host.lower() for host in hosts if host]
+    if hosts and not any(
+        _sets_cookies_for(cookie.get("domain", ""), host)
+        for cookie in cookies
+        for host in hosts
+    ):
+        return f"no cookies for {', '.join(hosts)}"
+    return None
+
+
+def load_state(
+    path: Path, max_age_hours: float, urls: Iterable[str] = ()
+) -> Optional[Dict[str, Any]]:
+    """The saved storage state at *path* if it is still usable for *urls*."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            state = json.load(fh)
+        saved_at = path.stat().st_mtime
+        if not isinstance(state, dict):
+            raise ValueError("not a storage state")
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning("Ignoring unreadable session file %s: %s", path, e)
+        return None
+    reason = expired_reason(state, saved_at, max_age_hours, urls)
+    if reason:
+        logging.info("Saved session %s not reused: %s", path, reason)
+        discard(path)
+        return None
+    return state
+
+
+def save_state(path: Path, state: Dict[str, Any]):
+    """Write *state* atomically, readable by the current user only."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(state, fh)
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    logging.info("Saved login session to %s", path)
+
+
+def discard(path: Path):
+    path.unlink(missing_ok=True)
@@ -0,0 +1,703 @@
+"""Shared step definitions for the China visa form.
+
+The ten steps are described once, declaratively, in :data:`STEPS`: every
+:class:`Field` names its widget kind, where it lives (:class:`Target`) and
+which applicant column feeds it.  :func:`plan` turns a step into the
+:class:`Action` list for one applicant (skipping empty values), and the sync
+engine in ``visa_autofill`` and the asyncio engine in ``visa_async`` execute
+those actions – so the two can never drift apart; only the low-level widget
+helpers exist twice.  Getting a page to the form (login, saved session,
+attached Chrome) is likewise written once, in :func:`start_page`, as the
+:class:`PageOp` operations both engines perform.
+
+This module is deliberately free of Playwright imports: building a locator is
+a local operation that works the same on sync and async ``Page`` objects.
+"""
+
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generator, List, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+from visa_dates import to_ymd
+from visa_itinerary import itinerary
+
+# ---------------------------------------------------------------------------
+# Static form data ----------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+declare_person = {
+    "name": "TRUONG GIANG TRAVEL",
+    "relationship": "AGENT",
+    "phone": "0901269595",
+    "address": "134 9K,  TAM DONG 23 ST, THOI TAM THON VILLAGE, HOC MON DISTRICT, HO CHI MINH CITY",
+}
+
+# ---------------------------------------------------------------------------
+# Targets & actions ---------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+FORM_ITEM = "xpath=ancestor::div[contains(@class,'el-form-item')]"
+INPUT = "input.el-input__inner"
+EDITABLE_INPUT = "input.el-input__inner:not([readonly]):not([disabled])"
+TEXTAREA = "textarea.el-textarea__inner"
+
+
+@dataclass(frozen=True)
+class Target:
+    """Where an action happens.
+
+    ``selector`` narrows the search scope (``.first`` of it when *first* is
+    set).  ``for_id`` / ``label`` then resolve the enclosing ``el-form-item``
+    of a ``<label for=...>`` or of a label containing that text.  A target
+    with only a selector is the selected element itself.
+    """
+
+    selector: Optional[str] = None
+    first: bool = False
+    for_id: Optional[str] = None
+    label: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Action:
+    """One widget interaction inside a step.
+
+    kind      – select | text | radio | date | checkbox | remark | click |
+                upload | no_radios | note
+    value     – text to type/pick, ``(year, month, day)`` for dates, file path
+                for uploads, message for notes
+    selector  – input selector inside the form item (text / select / upload)
+    timeout   – remark only: wait this long for the textarea to appear
+    message   – remark only: printed when the textarea never appears
+    """
+
+    kind: str
+    target: Optional[Target] = None
+    value: Any = None
+    selector: str = INPUT
+    timeout: Optional[int] = None
+    message: str = ""
+
+
+# In-page lookups ------------------------------------------------------------
+# Run through ``Locator.evaluate_all`` so resolving the matching element costs
+# one CDP round-trip instead of one ``inner_text()`` per candidate.
+
+# Index of the first element whose text (or the text of its *sub* descendant)
+# contains *needle* – case-insensitive, like the Python loops it replaces.
+FIND_TEXT_JS = """
+(elements, [needle, sub]) => elements.findIndex((el) => {
+    const node = sub ? el.querySelector(sub) : el;
+    return !!node && node.innerText.trim().toLowerCase().includes(needle);
+})
+"""
+
+
+def item(label: str) -> Target:
+    """Form item whose label contains *label*."""
+    return Target(label=label)
+
+
+def item_for(for_id: str, scope: Optional[str] = None) -> Target:
+    """Form item of ``<label for=for_id>``, optionally inside *scope*."""
+    return Target(selector=scope, first=scope is not None, for_id=for_id)
+
+
+def card(title: str) -> str:
+    return f"div.el-card:has(span.title:has-text('{title}'))"
+
+
+def header(title: str) -> str:
+    return f"div.choice-botton-header.el-row:has(span.title:has-text('{title}'))"
+
+
+# Steps 7/8: click every visible, unchecked radio labelled exactly *needle*
+# (trimmed, case-insensitive – "no" must not match "Not sure" or "None") and
+# report what was done.
+CLICK_RADIOS_JS = """
+(needle) => {
+    const radios = [...document.querySelectorAll("label.el-radio")].filter(
+        (el) => el.offsetParent !== null
+            && el.innerText.trim().toLowerCase() === needle);
+    const pending = radios.filter((el) => !el.classList.contains("is-checked"));
+    pending.forEach((el) => el.click());
+    return {total: radios.length, clicked: pending.length};
+}
+"""
+
+# Truthy once every visible radio labelled *needle* shows as checked.
+RADIOS_CHECKED_JS = """
+(needle) => [...document.querySelectorAll("label.el-radio")]
+    .filter((el) => el.offsetParent !== null
+        && el.innerText.trim().toLowerCase() === needle)
+    .every((el) => el.classList.contains("is-checked"))
+"""
+
+# Tag every el-form-item with ``data-va-field`` and report which label ``for=``
+# ids and label texts point at which tag.  Tags survive until Vue replaces the
+# node, which is why the index is rebuilt after every step transition.
+INDEX_FIELDS_JS = """
+() => {
+    const index = {forIds: {}, labels: []};
+    let next = Number(document.body.dataset.vaFieldSeq || 0);
+    document.querySelectorAll("div.el-form-item label").forEach((label) => {
+        const item = label.closest("div.el-form-item");
+        if (!item) return;
+        if (!item.dataset.vaField) item.dataset.vaField = String(next++);
+        const id = item.dataset.vaField;
+        const forId = label.getAttribute("for");
+        if (forId) (index.forIds[forId] = index.forIds[forId] || []).push(id);
+        index.labels.push([label.textContent.replace(/\\s+/g, " ").trim(), id]);
+    });
+    document.body.dataset.vaFieldSeq = String(next);
+    return index;
+}
+"""
+
+# What identifies the step on screen: the SPA route, the active step of an
+# Element-Plus step indicator (-1 without one), the first visible heading,
+# card title or form label, and whether a title numbered like the expected
+# step (*prefix* "4." for step 4: "4.1 Highest diploma/degree") is visible.
+STEP_STATE_JS = """
+(prefix) => {
+    const titles = [...document.querySelectorAll(
+            "h1, h2, h3, span.title, .el-form-item__label")]
+        .filter((el) => el.offsetWidth || el.offsetHeight || el.getClientRects().length)
+        .map((el) => el.textContent.replace(/\\s+/g, " ").trim())
+        .filter(Boolean);
+    return {
+        route: location.pathname + location.search + location.hash,
+        active: [...document.querySelectorAll(".el-step")].findIndex(
+            (el) => el.querySelector(".is-process") !== null),
+        title: titles[0] || "",
+        expected: !!prefix && titles.some((text) => text.startsWith(prefix)),
+    };
+}
+"""
+
+# After "Next": which signal shows the new step, or false while it has not.
+# A route or indicator change only counts once the step has rendered a title.
+STEP_READY_JS = f"""
+([before, prefix]) => {{
+    const now = ({STEP_STATE_JS})(prefix);
+    if (now.expected && !before.expected) return "step title";
+    if (!now.title) return false;
+    if (now.route !== before.route) return "route";
+    if (now.active !== before.active && now.active >= 0) return "step indicator";
+    if (now.title !== before.title) return "content";
+    return false;
+}}
+"""
+
+# Fill many text inputs in one evaluation.  Uses the native value setter plus
+# input/change events so Vue's v-model sees the new value; returns per entry
+# whether the input was found and writable.
+FILL_BATCH_JS = """
+(entries) => entries.map(([itemSelector, inputSelector, value]) => {
+    const item = document.querySelector(itemSelector);
+    const input = item && item.querySelector(inputSelector);
+    if (!input || input.disabled || input.readOnly) return false;
+    const proto = input.tagName === "TEXTAREA"
+        ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(proto, "value").set.call(input, value);
+    input.dispatchEvent(new Event("input", {bubbles: true}));
+    input.dispatchEvent(new Event("change", {bubbles: true}));
+    return true;
+})
+"""
+
+
+class FieldIndex:
+    """Resolved form items of the current step, keyed by label for= and text.
+
+    Built from one ``INDEX_FIELDS_JS`` evaluation; lookups are local and turn
+    a target into a plain ``[data-va-field]`` selector instead of the
+    ``label:has-text(...)`` + XPath ancestor walk.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        data = data or {}
+        self.for_ids: Dict[str, List[str]] = data.get("forIds", {})
+        self.labels: List[Tuple[str, str]] = [
+            (text.lower(), field_id) for text, field_id in data.get("labels", [])
+        ]
+        self._by_text: Dict[str, List[str]] = {}
+        # Set by invalidate_index: the tags are gone, stop resolving through them
+        self.stale = False
+
+    def ids_for(self, target: Target) -> List[str]:
+        if self.stale:
+            return []
+        if target.for_id:
+            return self.for_ids.get(target.for_id, [])
+        if target.label:
+            needle = " ".join(target.label.split()).lower()
+            if needle not in self._by_text:
+                ids = [fid for text, fid in self.labels if needle in text]
+                self._by_text[needle] = list(dict.fromkeys(ids))
+            return self._by_text[needle]
+        return []
+
+    def selector_for(self, target: Target) -> Optional[str]:
+        ids = self.ids_for(target)
+        if not ids:
+            return None
+        return ",".join(f"div[data-va-field='{field_id}']" for field_id in ids)
+
+    def batch_entry(self, action: "Action") -> Optional[List[str]]:
+        """``[item, input, value]`` for :data:`FILL_BATCH_JS`, if batchable.
+
+        Only unscoped text fields the index knows can be addressed with plain
+        ``querySelector`` – everything else goes through the widget helpers.
+        """
+        if action.kind != "text" or action.target is None or action.target.selector:
+            return None
+        ids = self.ids_for(action.target)
+        if not ids:
+            return None
+        return [f"div[data-va-field='{ids[0]}']", action.selector, action.value]
+
+
+# One index per page; the engines build it lazily and drop it on navigation.
+_field_indexes: "weakref.WeakKeyDictionary[Any, FieldIndex]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def cached_index(page) -> Optional[FieldIndex]:
+    return _field_indexes.get(page)
+
+
+def store_index(page, data: Optional[Dict[str, Any]]) -> FieldIndex:
+    index = _field_indexes[page] = FieldIndex(data)
+    return index
+
+
+def invalidate_index(page):
+    index = _field_indexes.pop(page, None)
+    if index is not None:
+        index.stale = True
+
+
+def locate(root, target: Target, index: Optional[FieldIndex] = None):
+    """Build the locator for *target* below *root* (sync or async API).
+
+    With a :class:`FieldIndex`, label targets resolve straight to the tagged
+    form item; targets the index does not know (e.g. items rendered after it
+    was built) fall back to the label + ancestor chain.  The engines check an
+    indexed locator still matches (Vue may have replaced the tagged node) and
+    call :func:`invalidate_index` and locate again without the index if not.
+    """
+    node = root
+    if target.selector:
+        node = node.locator(target.selector)
+        if target.first:
+            node = node.first
+    indexed = index.selector_for(target) if index is not None else None
+    if indexed:
+        node = node.locator(indexed)
+    elif target.for_id:
+        node = node.locator(f"label[for='{target.for_id}']").locator(FORM_ITEM)
+    elif target.label:
+        node = node.locator(f"label:has-text('{target.label}')").locator(FORM_ITEM)
+    return node
+
+
+# ---------------------------------------------------------------------------
+# Data helpers ---------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def plus_day_to_date(date, days: int):
+    """Plus days to date (a ``YMD`` or any format ``visa_dates`` parses)."""
+    return str(to_ymd(date).plus_days(days))
+
+
+def all_travel_info_base_on_city(city: str):
+    """Flights and address for *city* from the run's itinerary table."""
+    return itinerary().choose(city)
+
+
+def get_family_name_given_name_from_full_name(full_name: str):
+    """Get family name and given name from full name."""
+
+    # example full name: "Nguyen Van A"
+    # family name: "Nguyen"
+    # given name: "Van A"
+    if not full_name:
+        return "", ""
+    name_parts = full_name.split(" ")
+    family_name = name_parts[0]
+
+    given_name = " ".join(name_parts[1:])
+    return family_name, given_name
+
+
+def get_year_month_day_from_date(date):
+    """Get year, month, and day from date.
+
+    Rows from ``main`` carry ``YMD`` tuples parsed once at load time; plain
+    strings (in any format ``visa_dates`` knows) are parsed here.
+    """
+    return to_ymd(date).parts()
+
+
+# ---------------------------------------------------------------------------
+# Form schema ----------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Field:
+    """Declarative description of one widget of a step.
+
+    The value comes from the applicant ``column`` (passed through
+    ``transform(value, options)`` when given) or is the constant ``value``.
+    Fields whose column is empty are skipped unless ``always`` is set;
+    ``when`` / ``unless`` gate a field on another column being filled / empty.
+    ``kind``, ``target``, ``selector``, ``timeout`` and ``message`` carry over
+    to the resulting :class:`Action` unchanged.
+    """
+
+    kind: str
+    target: Optional[Target] = None
+    column: Optional[str] = None
+    value: Any = None
+    transform: Optional[Callable[[Any, Mapping[str, Any]], Any]] = None
+    when: Optional[str] = None
+    unless: Optional[str] = None
+    always: bool = False
+    selector: str = INPUT
+    timeout: Optional[int] = None
+    message: str = ""
+
+
+@dataclass(frozen=True)
+class StepDef:
+    number: int
+    question: str  # "Do you want to ...?" prompt
+    verify: str  # what the operator checks before "Next"
+    fields: Tuple[Field, ...]
+
+
+Plan = List[Action]
+
+
+def is_empty(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, float) and value != value:  # NaN
+        return True
+    return isinstance(value, str) and not value.strip()
+
+
+def plan(step: StepDef, applicant: Dict[str, Any], options: Mapping[str, Any]) -> Plan:
+    """Resolve *step* for one applicant into the actions to execute."""
+    actions: Plan = []
+    for field in step.fields:
+        if field.when and is_empty(applicant.get(field.when)):
+            continue
+        if field.unless and not is_empty(applicant.get(field.unless)):
+            continue
+        if field.column:
+            value = applicant.get(field.column)
+            if is_empty(value) and not field.always:
+                continue
+            if field.transform:
+                value = field.transform(value, options)
+            if is_empty(value) and not field.always:
+                continue
+        else:
+            value = field.value
+        if field.kind in ("text", "select", "radio") and not isinstance(value, str):
+            value = str(value)
+        actions.append(
+            Action(
+                field.kind,
+                field.target,
+                value,
+                field.selector,
+                field.timeout,
+                field.message,
+            )
+        )
+    return actions
+
+
+# Value transforms -------------------------------------------------------------
+
+
+def family_name(value: str, options: Mapping[str, Any]) -> str:
+    return get_family_name_given_name_from_full_name(value)[0]
+
+
+def given_name(value: str, options: Mapping[str, Any]) -> str:
+    return get_family_name_given_name_from_full_name(value)[1]
+
+
+def ymd(value: Any, options: Mapping[str, Any]):
+    return get_year_month_day_from_date(value)
+
+
+def departure_ymd(value: Any, options: Mapping[str, Any]):
+    return to_ymd(value).plus_days(options["PLUS_DAY_TO_DATE"]).parts()
+
+
+def visa_type(value: str, options: Mapping[str, Any]) -> str:
+    return f"({value})"
+
+
+def occupation_remark(value: Optional[str], options: Mapping[str, Any]) -> str:
+    return "Student" if (value or "").lower() == "student" else "Bussiness Owner"
+
+
+# Steps ------------------------------------------------------------------------
+
+
+# fmt: off
+def _relative(
+    prefix: str, scope: str, key: str, spouse: bool = False
+) -> Tuple[Field, ...]:
+    """Name, nationality and birth date fields of one relative card."""
+    gate = f"{prefix}_fullname"
+    fields = (
+        Field("text", item_for(f"{key}.familyName", scope), gate, transform=family_name, selector=EDITABLE_INPUT),
+        Field("text", item_for(f"{key}.firstName", scope), gate, transform=given_name, selector=EDITABLE_INPUT),
+        Field("select", item_for(f"{key}.nationalityCountry", scope), f"{prefix}_nationality", when=gate),
+        Field("date", item_for(f"{key}.birthday", scope), f"{prefix}_dob", transform=ymd, when=gate),
+    )
+    if spouse:
+        return fields + (
+            Field("select", item_for(f"{key}.birthCountry", scope), f"{prefix}_nationality", when=gate),
+            Field("text", item_for(f"{key}.birthCity", scope), f"{prefix}_city", when=gate),
+            Field("text", item_for(f"{key}.address", scope), "home_address", when=gate, selector=TEXTAREA),
+        )
+    return fields + (
+        Field("radio", item_for(f"{key}.inChinaFlag", scope), value="No", when=gate),
+    )
+
+
+def _not_applicable(prefix: str, title: str, remark: bool = True) -> Tuple[Field, ...]:
+    """Tick "Not applicable" on a relative card the applicant left empty."""
+    gate = f"{prefix}_fullname"
+    fields = (Field("checkbox", Target(selector=header(title)), value="Not applicable", unless=gate),)
+    if remark:
+        fields += (Field("remark", item_for(f"notApplyItems.{prefix}.remark"), value="DESEASED", unless=gate),)
+    return fields + (Field("note", value=f"No {prefix} information provided", unless=gate),)
+
+
+# fmt: on
+
+
+INVITATION_HEADER = header("6.2 Inviting person/contact or organization in China")
+
+# fmt: off
+STEPS = [
+    StepDef(1, "fill personal information", "personal information", (
+        Field("select", item("1.4A Country/region"), "country"),
+        Field("text", item("1.4B Province/state"), "province"),
+        # The form's city is filled with the province, as agents always did
+        Field("text", item("1.4C City"), "province"),
+        Field("radio", item("1.5A Marital status"), "marital_status"),
+        Field("text", item("1.6B ID number in the country of nationality"), "id_number"),
+        Field("radio", item("1.6C Do you have any other nationality?"), value="No"),
+        Field("radio", item("1.6F Do you have permanent resident status in any other country or region?"), value="No"),
+        Field("radio", item("Have you ever had any other nationalities or resident status?"), value="No"),
+        Field("radio", item("1.7A Type of passport/travel document"), value="Ordinary"),
+        Field("text", item("1.7D Place of issue"), "place_of_issue"),
+    )),
+    StepDef(2, "fill visa type", "visa type selection", (
+        Field("select", Target(selector=card("2.1 The type of visa that you are applying for and the main purpose of your visit to China")), "visa_type", transform=visa_type),
+        Field("radio", Target(selector=card("2.2 Service type")), value="Normal"),
+        Field("text", item("2.3A Visa validity of your application (months)"), value="3"),
+        Field("text", item("2.3B Maximum duration of stay of your application (days)"), value="30"),
+        Field("radio", item("2.3C Entries of your application"), "entries"),
+    )),
+    StepDef(3, "fill work information", "work information", (
+        Field("select", Target(selector=card("3.1 Current occupation")), "occupation"),
+        # 3.2 Work experience in the past five years – "Not applicable"
+        Field("checkbox", Target(selector=card("3.2 Work experience in the past five years")), value="Not applicable"),
+        Field(
+            "remark", item("Please specify."), "occupation", transform=occupation_remark, always=True, timeout=5000,
+            message="Warning: Could not find 'Please specify' textarea for work experience, skipping...",
+        ),
+    )),
+    StepDef(4, "fill education information", "education information", (
+        Field("checkbox", Target(selector=card("4.1 Highest diploma/degree")), value="Not applicable"),
+        Field(
+            "remark", item("Please specify."), value="Not mentioned", timeout=5000,
+            message="Warning: Could not find 'Please specify' textarea for education, skipping...",
+        ),
+    )),
+    StepDef(5, "fill family information", "family information", (
+        Field("text", item("5.1 Current home address"), "home_address"),
+        Field("text", item("5.2 Phone number"), "phone_number"),
+        Field("text", item("5.3 Mobile phone number"), "phone_number"),
+        *_relative("spouse", "div.el-card:has(div.el-row:has-text('5.5A Spouse'))", "spouses.0", spouse=True),
+        *_relative("father", card("5.5B Father"), "father.0"),
+        *_not_applicable("father", "5.5B Father"),
+        *_relative("mother", card("5.5C Mother"), "mother.0"),
+        *_not_applicable("mother", "5.5C Mother"),
+        *_relative("children", card("5.5D Children"), "children.0"),
+        *_not_applicable("children", "5.5D Children", remark=False),
+        # 5.5E Do you have any immediate relatives in China?
+        Field("radio", item_for("relativeRelativeFlag"), value="No"),
+    )),
+    StepDef(6, "fill travel information", "travel information", (
+        Field("date", item_for("arrivalCityDate"), "date_of_arrival", transform=ymd),
+        # Flights and address come from the itinerary table (visa_itinerary)
+        Field("text", item_for("arrivalVehicleType"), "arrival_flight_no"),
+        Field("select", item_for("arrivalCity"), "travel_city"),
+        Field("select", item_for("stayInfo.0.stayCity"), "travel_city"),
+        Field("text", item_for("stayInfo.0.travelAddr"), "address_to_stay"),
+        Field("date", item_for("stayInfo.0.arrivalDate"), "date_of_arrival", transform=ymd),
+        Field("date", item_for("stayInfo.0.leaveDate"), "date_of_arrival", transform=departure_ymd),
+        Field("date", item_for("leaveDate"), "date_of_arrival", transform=departure_ymd),
+        Field("text", item_for("leaveVehicleType"), "departure_flight_no"),
+        Field("select", item_for("leaveCity"), "travel_city"),
+        # 6.2 Inviting person – "Not applicable"
+        Field("click", Target(selector=f"{INVITATION_HEADER} label.el-checkbox", first=True)),
+        Field("remark", item_for("notApplyItems.invitation.remark"), value="NONE"),
+        # 6.3 Emergency contact
+        Field("text", item_for("emergencyContactFamilyName"), "emergency_fullname", transform=family_name),
+        Field("text", item_for("emergencyContactFirstName"), "emergency_fullname", transform=given_name),
+        Field("text", item_for("emergencyPhoneNumber"), "emergency_phone"),
+        Field("text", item_for("emergencyRelation"), "emergency_relationship"),
+        # 6.4A Who will pay for this travel? / 6.5A Same passport?
+        Field("radio", item_for("payForTravel"), value="Self"),
+        Field("radio", item_for("havePeersFlag"), value="No"),
+    )),
+    StepDef(7, "fill previous travel information", "previous travel information", (
+        Field("no_radios"),
+    )),
+    StepDef(8, "fill other information", "other information", (
+        Field("no_radios"),
+    )),
+    StepDef(9, "fill declaration", "declaration", (
+        Field("click", Target(selector="label.el-radio:has-text('The person who fills in the application on behalf of the applicant')")),
+        Field("text", item_for("agentName"), value=declare_person["name"]),
+        Field("text", item_for("relationship"), value=declare_person["relationship"]),
+        Field("text", item_for("agentAddr"), value=declare_person["address"]),
+        Field("text", item_for("agentTel"), value=declare_person["phone"]),
+        Field("click", Target(selector="label.el-radio:has-text('I understand and agree with the above.')")),
+    )),
+    StepDef(10, "upload materials", "upload materials", (
+        Field("upload", Target(selector="div.uploadFile:has-text('The page with photo')"), value="example_visa.jpg", selector="input[type='file']"),
+    )),
+]
+# fmt: on
+
+
+def next_step_prefix(number: int) -> Optional[str]:
+    """Title prefix of the step after *number* ("4." after 3); none after the last."""
+    return f"{number + 1}." if number < len(STEPS) else None
+
+
+# ---------------------------------------------------------------------------
+# Start page -----------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+START_BUTTON = "button:has-text('Start filling in the form.')"
+EMAIL_INPUT = "input[placeholder='Enter your e-mail']"
+PASSWORD_INPUT = 'input[placeholder="Enter the password"]'
+PAGE_LOADED = "Waiting Page loaded success & Press Enter to continue..."
+
+
+@dataclass(frozen=True)
+class PageOp:
+    """One page-level operation of :func:`start_page`.
+
+    kind  – goto | fill | click | open_form | prompt | print | log | url |
+            has_cookies | clear_cookies | save_session | discard_session |
+            cache_assets | filter_requests
+    arg   – URL (goto), selector (fill / click), text (prompt / print / log)
+    value – text to fill; ``True`` for a yes/no prompt
+
+    ``open_form`` opens the form's first step if the page is logged in and
+    results in whether it did; ``prompt``, ``url`` and ``has_cookies`` result
+    in the answer, the page's URL and whether its context has cookies.
+    """
+
+    kind: str
+    arg: str = ""
+    value: Any = None
+
+
+# Yields PageOps, is sent each one's result, returns the flow's result
+Flow = Generator[PageOp, Any, Any]
+
+
+def start_page(options: Mapping[str, Any]) -> Flow:
+    """Bring a page to the first step of the form.
+
+    Attached to a Chrome (``CDP_URL``) it uses that Chrome's login; in login
+    mode it resumes the saved session or has the operator log in; otherwise
+    it opens ``QUICK_FORM_URL``.  *options* holds those settings by name.
+    """
+    # Installed before the first load so even that is served from the cache
+    if options["CACHE_ASSETS"]:
+        yield PageOp("cache_assets")
+    if options["CDP_URL"]:
+        yield from _attach(options)
+    elif options["USE_EXISTING_BROWSER"] is False:
+        # A context created from a saved session already has cookies
+        resumed = (
+            options["REUSE_SESSION"]
+            and (yield PageOp("has_cookies"))
+            and (yield from _resume_session())
+        )
+        if not resumed:
+            yield from _log_in(options, PAGE_LOADED)
+            if options["REUSE_SESSION"]:
+                yield PageOp("save_session")
+    else:
+        yield PageOp("goto", options["QUICK_FORM_URL"])
+        yield PageOp("prompt", PAGE_LOADED)
+    # Login pages stay unfiltered – their captcha is an image.  Routes added
+    # later run first: blocked requests never reach the asset cache.
+    if options["BLOCK_REQUESTS"]:
+        yield PageOp("filter_requests")
+
+
+def _log_in(options: Mapping[str, Any], prompt: str) -> Flow:
+    """Prefill the login page, let the operator finish, open the form."""
+    yield PageOp("log", f"Opening login page: {options['LOGIN_URL']}")
+    yield PageOp("goto", options["LOGIN_URL"])
+    yield PageOp("print", "Login page loaded")
+    yield PageOp("fill", EMAIL_INPUT, options["EMAIL_LOGIN"])
+    yield PageOp("fill", PASSWORD_INPUT, options["PASSWORD_LOGIN"])
+    yield PageOp("prompt", prompt)
+    yield PageOp("goto", options["FORM_URL"])
+    yield PageOp("print", "Form page loaded")
+    yield PageOp("click", START_BUTTON)
+    yield PageOp("prompt", PAGE_LOADED)
+
+
+def _resume_session() -> Flow:
+    """Open the form with a restored session; ``False`` once it has expired."""
+    if (yield PageOp("open_form")):
+        yield PageOp("print", "🔑 Reused saved login session")
+        return True
+    url = yield PageOp("url")
+    yield PageOp("log", f"Saved session expired (landed on {url}) – logging in again")
+    yield PageOp("discard_session")
+    yield PageOp("clear_cookies")
+    return False
+
+
+def _attach(options: Mapping[str, Any]) -> Flow:
+    """Bring a tab of the attached Chrome to the form, logging in if needed."""
+    if not options["AUTO_NEXT"]:
+        # The operator may already be on the step they want to start from
+        url = yield PageOp("url")
+        if urlparse(url).netloc == urlparse(options["FORM_URL"]).netloc:
+            question = f"Attached to {url} – fill from this page? "
+            if (yield PageOp("prompt", question, True)) == "Y":
+                return
+    if (yield PageOp("open_form")):
+        yield PageOp("print", "🔗 Attached to Chrome – form opened with its login")
+        return
+    yield from _log_in(
+        options, "Log in in the attached Chrome & Press Enter to continue..."
+    )
@@ -0,0 +1,229 @@
+"""Optional SQLite store of applicants and their submission status.
+
+The spreadsheet is imported once (and again only when it or the image folder
+changes); every row becomes an ``applicants`` record keyed by passport number
+with its status, travel city, visa type and resolved passport image, each
+indexed.  Passports no longer in the spreadsheet are marked ``REMOVED`` and
+are not pending again unless they reappear.  ``main`` then pulls pending work
+with one query, so re-runs and filtered runs ("only L visas to Shanghai")
+start without re-parsing the spreadsheet.  Results are written back as they finish, alongside the CSV
+journal.
+
+Enable it with ``STORE_FILE`` (e.g. ``"applicants.db"``); ``STORE_FILTER``
+narrows the run, e.g. ``{"visa_type": "L", "travel_city": "ShangHai,Shanghai"}``.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional
+
+PENDING, SUCCESS, FAILURE = "PENDING", "SUCCESS", "FAILURE"
+# No longer in the spreadsheet
+REMOVED = "REMOVED"
+
+# Columns a run can be filtered on – each one is indexed
+FILTER_COLUMNS = ("passport_number", "status", "travel_city", "visa_type")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS applicants (
+    passport_number TEXT PRIMARY KEY,
+    row INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'PENDING',
+    error TEXT NOT NULL DEFAULT '',
+    travel_city TEXT,
+    visa_type TEXT,
+    image_path TEXT,
+    data TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS applicants_status ON applicants (status);
+CREATE INDEX IF NOT EXISTS applicants_travel_city ON applicants (travel_city);
+CREATE INDEX IF NOT EXISTS applicants_visa_type ON applicants (visa_type);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+UPSERT = """
+INSERT INTO applicants (passport_number, row, travel_city, visa_type, image_path, data)
+VALUES (:passport_number, :row, :travel_city, :visa_type, :image_path, :data)
+ON CONFLICT (passport_number) DO UPDATE SET
+    row = excluded.row,
+    travel_city = excluded.travel_city,
+    visa_type = excluded.visa_type,
+    image_path = excluded.image_path,
+    data = excluded.data,
+    status = CASE WHEN status = 'REMOVED' THEN 'PENDING' ELSE status END
+"""
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class ApplicantStore:
+    """Applicants and their status in one SQLite file.
+
+    Writes go through one connection guarded by a lock (batch workers report
+    results from their own threads); :meth:`pending` reads on a connection of
+    its own, which WAL mode lets run alongside those writes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    # -- import --------------------------------------------------------------------
+
+    def _source_stamp(self, data_file: Path, image_folder: Optional[Path]) -> str:
+        stat = data_file.stat()
+        stamp = f"{data_file.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+        if image_folder is not None and image_folder.is_dir():
+            # A file added, removed or renamed in the folder changes its mtime
+            folder = image_folder.stat()
+            stamp += f"|{image_folder.resolve()}|{folder.st_mtime_ns}"
+        return stamp
+
+    def sync(
+        self,
+        data_file: Path,
+        rows: Callable[[], Iterable[Dict[str, Any]]],
+        image_for: Callable[[str], Optional[Path]] = lambda passport: None,
+        image_folder: Optional[Path] = None,
+    ) -> int:
+        """Import *rows()* unless *data_file* and *image_folder* are unchanged
+        since the last import.
+
+        Existing passports keep their status; their data, city, visa type and
+        image are refreshed.  Passports missing from *rows()* are marked
+        :data:`REMOVED`.  Returns the number of rows imported (0 when the
+        import was skipped).
+        """
+        stamp = self._source_stamp(data_file, image_folder)
+        found = self._db.execute("SELECT value FROM meta WHERE key = 'source'")
+        if (found.fetchone() or [None])[0] == stamp:
+            logging.info("Applicant store %s is up to date", self.path)
+            return 0
+
+        records = []
+        for row_num, applicant in enumerate(rows()):
+            passport = applicant.get("passport_number")
+            if not passport:
+                logging.warning("Row %d has no passport number – not stored", row_num)
+                continue
+            image = image_for(str(passport))
+            records.append(
+                {
+                    "passport_number": str(passport),
+                    "row": row_num,
+                    "travel_city": applicant.get("travel_city"),
+                    "visa_type": applicant.get("visa_type"),
+                    "image_path": str(image) if image else None,
+                    "data": json.dumps(applicant, ensure_ascii=False, default=str),
+                }
+            )
+        with self._lock, self._db:
+            self._db.executemany(UPSERT, records)
+            self._db.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS imported"
+                " (passport_number TEXT PRIMARY KEY)"
+            )
+            self._db.execute("DELETE FROM imported")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO imported VALUES (?)",
+                ((record["passport_number"],) for record in records),
+            )
+            removed = self._db.execute(
+                "UPDATE applicants SET status = ?, updated_at = ? WHERE status != ?"
+                " AND passport_number NOT IN (SELECT passport_number FROM imported)",
+                (REMOVED, _now(), REMOVED),
+            ).rowcount
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('source', ?)",
+                (stamp,),
+            )
+        logging.info("Imported %d applicants into %s", len(records), self.path)
+        if removed:
+            logging.info(
+                "%d passports no longer in %s marked removed", removed, data_file
+            )
+        return len(records)
+
+    # -- queries -------------------------------------------------------------------
+
+    def pending(
+        self, filters: Optional[Mapping[str, Any]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Applicants not yet submitted successfully, in spreadsheet order.
+
+        *filters* maps :data:`FILTER_COLUMNS` to a value or a list of values;
+        filtering on ``status`` replaces the default "not SUCCESS or REMOVED".
+        """
+        filters = dict(filters or {})
+        where, params = [], []
+        if "status" not in filters:
+            where.append("status NOT IN (?, ?)")
+            params.extend([SUCCESS, REMOVED])
+        for column, wanted in filters.items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(
+                    f"Cannot filter on {column!r}; use one of {FILTER_COLUMNS}"
+                )
+            values = (
+                list(wanted) if isinstance(wanted, (list, tuple, set)) else [wanted]
+            )
+            where.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        query = "SELECT data, image_path FROM applicants"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY row"
+
+        reader = sqlite3.connect(self.path)
+        try:
+            for data, image_path in reader.execute(query, params):
+                applicant = json.loads(data)
+                if image_path:
+                    applicant["image_path"] = image_path
+                yield applicant
+        finally:
+            reader.close()
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._db.execute(
+            "SELECT status, COUNT(*) FROM applicants GROUP BY status"
+        )
+        return dict(rows.fetchall())
+
+    # -- results (same interface as visa_journal.Journal) --------------------------
+
+    def record(self, result: Dict[str, Any]):
+        passport = result.get("passport_number")
+        if not passport:
+            return
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE applicants SET status = ?, error = ?, updated_at = ?"
+                " WHERE passport_number = ?",
+                (
+                    result.get("status", FAILURE),
+                    result.get("error") or "",
+                    _now(),
+                    str(passport),
+                ),
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "ApplicantStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,203 @@
+"""Per-applicant timing traces for the form filling engines.
+
+A trace records wall time for every step, every field (one ``Action`` of a
+step plan) and every Playwright call made through ``safe()`` or ``traced()``
+– including the failures ``safe()`` swallows, which otherwise only show up as
+``SAFE-IGNORED`` log lines.  The active trace lives in a ``ContextVar``: each batch worker
+thread and each asyncio page task sees only its own applicant's trace, and
+the helpers below are no-ops when nothing is being traced.
+
+With ``TRACE_DIR`` set, every applicant's trace is written there as
+``<passport>.json`` and ``<passport>.csv``.  ``python visa_trace.py TRACE_DIR``
+ranks the slowest fields across all traces of a batch.
+"""
+
+import csv
+import json
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# span kinds, outermost first
+APPLICANT, STEP, FIELD, ACTION = "applicant", "step", "field", "action"
+# "Next" until the following step is on screen (inside its step's span)
+TRANSITION = "transition"
+
+
+@dataclass
+class Span:
+    """One timed operation; times are milliseconds from the trace start."""
+
+    kind: str
+    name: str
+    start_ms: float
+    duration_ms: float = 0.0
+    step: Optional[int] = None
+    field: Optional[str] = None
+    ok: bool = True
+    error: str = ""
+
+
+CSV_COLUMNS = ["applicant"] + [f.name for f in fields(Span)]
+
+
+class Trace:
+    """Spans recorded while filling the form for one applicant."""
+
+    def __init__(self, applicant: str):
+        self.applicant = applicant
+        self.spans: List[Span] = []
+        self._origin = time.perf_counter()
+        self._open: List[Span] = []
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self._origin) * 1000
+
+    @contextmanager
+    def span(self, kind: str, name: str, step: Optional[int] = None):
+        parent = self._open[-1] if self._open else None
+        current = Span(
+            kind,
+            name,
+            round(self._now_ms(), 3),
+            step=step if step is not None else parent and parent.step,
+            field=name if kind == FIELD else parent and parent.field,
+        )
+        self.spans.append(current)
+        self._open.append(current)
+        try:
+            yield current
+        except BaseException as exc:
+            current.ok = False
+            current.error = current.error or f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            current.duration_ms = round(self._now_ms() - current.start_ms, 3)
+            self._open.pop()
+
+    def durations(self, kind: str = STEP) -> Dict[str, float]:
+        """Seconds spent per span name of *kind*, in first-seen order."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            if span.kind == kind:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms / 1000
+        return totals
+
+    def rows(self) -> Iterator[Dict]:
+        for span in self.spans:
+            yield {"applicant": self.applicant, **asdict(span)}
+
+    def export(self, directory: Path) -> Path:
+        """Write ``<applicant>.json`` and ``<applicant>.csv`` into *directory*."""
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = directory / (self.applicant or "applicant")
+        with open(stem.with_suffix(".json"), "w", encoding="utf-8") as fh:
+            json.dump(
+                {"applicant": self.applicant, "spans": [asdict(s) for s in self.spans]},
+                fh,
+                ensure_ascii=False,
+                indent=1,
+            )
+        with open(stem.with_suffix(".csv"), "w", newline="", encoding="utf-8") as fh:
+            writer = csv.DictWriter(fh, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.rows())
+        return stem.with_suffix(".json")
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("visa_trace", default=None)
+
+
+def current() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def tracing(applicant: str, directory: Optional[str] = None):
+    """Trace everything inside the block as one applicant's run.
+
+    The trace is exported to *directory* on exit, also when the run failed.
+    """
+    trace = Trace(str(applicant))
+    token = _current.set(trace)
+    try:
+        with trace.span(APPLICANT, trace.applicant):
+            yield trace
+    finally:
+        _current.reset(token)
+        if directory:
+            trace.export(Path(directory))
+
+
+@contextmanager
+def span(kind: str, name: str, step: Optional[int] = None):
+    """Time the block in the active trace (no-op when not tracing)."""
+    trace = _current.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(kind, name, step) as current_span:
+        yield current_span
+
+
+def field_name(action) -> str:
+    """Readable name of the field an ``Action`` touches."""
+    target = action.target
+    if target is not None:
+        name = target.label or target.for_id or target.selector
+        if name:
+            return f"{action.kind}:{name}"
+    return action.kind
+
+
+# ---------------------------------------------------------------------------
+# Batch report ----------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def slowest_fields(directory: Path, top: int = 20) -> List[Dict]:
+    """Aggregate field spans of every CSV trace in *directory*, slowest first."""
+    stats: Dict[tuple, Dict] = {}
+    for path in sorted(directory.glob("*.csv")):
+        with open(path, newline="", encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                if row["kind"] != FIELD:
+                    continue
+                key = (row["step"], row["name"])
+                entry = stats.setdefault(
+                    key,
+                    {
+                        "step": row["step"],
+                        "field": row["name"],
+                        "runs": 0,
+                        "failed": 0,
+                        "total_ms": 0.0,
+                        "max_ms": 0.0,
+                    },
+                )
+                duration = float(row["duration_ms"])
+                entry["runs"] += 1
+                entry["failed"] += row["ok"] != "True"
+                entry["total_ms"] += duration
+                entry["max_ms"] = max(entry["max_ms"], duration)
+    for entry in stats.values():
+        entry["mean_ms"] = entry["total_ms"] / entry["runs"]
+    return sorted(stats.values(), key=lambda e: e["mean_ms"], reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python visa_trace.py TRACE_DIR")
+    print(
+        f"{'step':>4}  {'mean ms':>9}  {'max ms':>9}  {'runs':>5}  {'fail':>4}  field"
+    )
+    for entry in slowest_fields(Path(sys.argv[1])):
+        print(
+            f"{entry['step'] or '-':>4}  {entry['mean_ms']:9.1f}  "
+            f"{entry['max_ms']:9.1f}  {entry['runs']:>5}  {entry['failed']:>4}  "
+            f"{entry['field']}"
+        )
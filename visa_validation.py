@@ -0,0 +1,245 @@
+"""Upfront applicant validation.
+
+Bad data used to surface mid-form: an unparseable date raised in
+``get_year_month_day_from_date`` at step 5, an unknown ``travel_city`` raised
+``ValueError`` from the travel lookup at step 6 – after login, upload and
+four filled steps.  :func:`validate` checks every row before a browser starts,
+column by column over a DataFrame (vectorized ``str`` / ``isin`` /
+``to_datetime`` operations instead of per-field Python), and ``main`` skips the
+rows it rejects.  Every problem is written to a per-row CSV report.
+
+Applicants are consumed in chunks so a streamed spreadsheet is never
+materialised whole.
+"""
+
+import csv
+import logging
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+import pandas as pd
+
+from visa_dates import parse_column
+from visa_itinerary import itinerary
+
+# Columns the form cannot be submitted without (empty ones are skipped by plan()
+# and the portal then refuses "Next")
+REQUIRED_COLUMNS: Tuple[str, ...] = (
+    "passport_number",
+    "country",
+    "province",
+    "marital_status",
+    "id_number",
+    "place_of_issue",
+    "visa_type",
+    "entries",
+    "occupation",
+    "home_address",
+    "phone_number",
+    "date_of_arrival",
+    "travel_city",
+    "emergency_fullname",
+    "emergency_relationship",
+    "emergency_phone",
+)
+
+# Extra required columns per visa type (upper case), on top of REQUIRED_COLUMNS
+REQUIRED_BY_VISA_TYPE: Dict[str, Tuple[str, ...]] = {}
+
+# A relative's remaining columns are required once their full name is given
+RELATIVE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "spouse": ("spouse_nationality", "spouse_dob", "spouse_city"),
+    "father": ("father_nationality", "father_dob"),
+    "mother": ("mother_nationality", "mother_dob"),
+    "children": ("children_nationality", "children_dob"),
+}
+
+# Dates the form's date pickers are filled from
+DATE_COLUMNS: Tuple[str, ...] = (
+    "date_of_arrival",
+    "spouse_dob",
+    "father_dob",
+    "mother_dob",
+    "children_dob",
+)
+
+PHONE_COLUMNS: Tuple[str, ...] = ("phone_number", "emergency_phone")
+PHONE_SEPARATORS = r"[\s.()\-]"
+PHONE_PATTERN = r"\+?\d{8,15}"
+
+REPORT_COLUMNS = ["row", "passport_number", "full_name", "column", "value", "error"]
+
+CHUNK_SIZE = 5_000
+
+
+def _blank(values: pd.Series) -> pd.Series:
+    return values.isna() | values.str.strip().eq("")
+
+
+def _errors(
+    frame: pd.DataFrame, mask: pd.Series, column: str, message: str
+) -> pd.DataFrame:
+    hit = frame[mask.fillna(False).astype(bool)]
+    return pd.DataFrame(
+        {
+            "row": hit.index,
+            "passport_number": hit["passport_number"].fillna("").to_numpy(),
+            "full_name": hit["full_name"].fillna("").to_numpy(),
+            "column": column,
+            "value": hit[column].fillna("").to_numpy(),
+            "error": message,
+        },
+        columns=REPORT_COLUMNS,
+    )
+
+
+def validate_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Every problem in *frame*, one report row each (empty when all is well)."""
+    columns = set(REQUIRED_COLUMNS) | set(DATE_COLUMNS) | set(PHONE_COLUMNS)
+    columns.add("full_name")
+    columns |= {f"{prefix}_fullname" for prefix in RELATIVE_COLUMNS}
+    columns |= {column for extra in RELATIVE_COLUMNS.values() for column in extra}
+    columns |= {column for extra in REQUIRED_BY_VISA_TYPE.values() for column in extra}
+    missing = sorted(columns - set(frame.columns))
+    frame = frame.reindex(columns=list(frame.columns) + missing).astype("string")
+    blank = {column: _blank(frame[column]) for column in columns}
+
+    found: List[pd.DataFrame] = []
+    for column in REQUIRED_COLUMNS:
+        found.append(_errors(frame, blank[column], column, "required"))
+
+    visa_types = frame["visa_type"].str.strip().str.upper()
+    for visa_type, extra in REQUIRED_BY_VISA_TYPE.items():
+        wanted = visa_types.eq(visa_type.upper())
+        for column in extra:
+            found.append(
+                _errors(
+                    frame,
+                    wanted & blank[column],
+                    column,
+                    f"required for visa type {visa_type}",
+                )
+            )
+
+    for prefix, extra in RELATIVE_COLUMNS.items():
+        named = ~blank[f"{prefix}_fullname"]
+        for column in extra:
+            found.append(
+                _errors(
+                    frame,
+                    named & blank[column],
+                    column,
+                    f"required when {prefix}_fullname is given",
+                )
+            )
+
+    for column in DATE_COLUMNS:
+        parsed, _ = parse_column(frame[column])
+        found.append(
+            _errors(
+                frame,
+                ~blank[column] & parsed.isna(),
+                column,
+                "not a recognised date (e.g. dd/mm/yyyy, yyyy/mm/dd)",
+            )
+        )
+
+    cities = frame["travel_city"].str.strip()
+    known = itinerary().city_names()
+    found.append(
+        _errors(
+            frame,
+            ~blank["travel_city"] & ~cities.isin(known),
+            "travel_city",
+            f"unknown city (expected one of: {', '.join(known)})",
+        )
+    )
+
+    for column in PHONE_COLUMNS:
+        digits = frame[column].str.replace(PHONE_SEPARATORS, "", regex=True)
+        found.append(
+            _errors(
+                frame,
+                ~blank[column] & ~digits.str.fullmatch(PHONE_PATTERN),
+                column,
+                "not a phone number (8-15 digits, optional leading +)",
+            )
+        )
+
+    return pd.concat(found, ignore_index=True).sort_values("row", kind="stable")
+
+
+def validate(
+    applicants: Iterable[Dict[str, Any]],
+    first_row: int = 0,
+    chunk_size: int = CHUNK_SIZE,
+) -> pd.DataFrame:
+    """Validate *applicants*; ``row`` in the result counts from *first_row*."""
+    rows = iter(applicants)
+    reports = []
+    start = first_row
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        frame = pd.DataFrame.from_records(chunk)
+        frame.index = pd.RangeIndex(start, start + len(chunk))
+        reports.append(validate_frame(frame))
+        start += len(chunk)
+    if not reports:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    return pd.concat(reports, ignore_index=True)
+
+
+def write_report(errors: pd.DataFrame, path: Path):
+    """Write *errors* to *path* as CSV; a clean run removes a stale report."""
+    if errors.empty:
+        path.unlink(missing_ok=True)
+        return
+    errors.to_csv(path, index=False, quoting=csv.QUOTE_MINIMAL, encoding="utf-8-sig")
+
+
+def report_invalid(errors: pd.DataFrame, path: Path) -> Set[int]:
+    """Print a summary of *errors*, write the report; return the rejected rows."""
+    write_report(errors, path)
+    if errors.empty:
+        print("✅ Every applicant passed validation")
+        return set()
+    rejected = set(errors["row"].astype(int))
+    print(
+        f"⚠️ {len(rejected)} applicant(s) fail validation and will be skipped "
+        f"({len(errors)} problem(s), see {path}):"
+    )
+    for line in errors.head(10).itertuples(index=False):
+        print(
+            f"   row {line.row} {line.passport_number or '(no passport)'}: "
+            f"{line.column} {line.value!r} – {line.error}"
+        )
+    if len(errors) > 10:
+        print(f"   … {len(errors) - 10} more")
+    logging.warning("%d applicants fail validation, see %s", len(rejected), path)
+    return rejected
+
+
+def skip_invalid(
+    applicants: Iterable[Dict[str, Any]],
+    rejected: Set[int],
+    first_row: int = 0,
+    quiet: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """Drop the rejected rows of *applicants*, counted as :func:`validate` does.
+
+    Rows are matched by position rather than passport number, so a rejected
+    row without a passport does not take every other such row with it.
+    """
+    for row, applicant in enumerate(applicants, first_row):
+        if row in rejected:
+            if not quiet:
+                logging.info(
+                    "Skipping row %d (passport %s) – failed validation",
+                    row,
+                    applicant.get("passport_number"),
+                )
+            continue
+        yield applicant